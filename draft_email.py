@@ -3,94 +3,115 @@
 """
 Created on Tue Dec  2 16:40:14 2025
 
-Create email drafts for OBiWoW participants (Apple mail app), send as bcc
+Create email drafts for OBiWoW participants, send as bcc.
+Drafts go to Apple Mail, an mbox file or a Maildir folder, or are sent through an SMTP server (see obiwow/mail_drafts.py)
 
 @author: ekaterinaavershina
 """
 
-import pandas as pd
-import subprocess as sp
 import argparse
+import os
+import smtplib
+import subprocess
+import sys
+from typing import List, Optional
 
-parser = argparse.ArgumentParser(description='Create Apple Mail drafts for workshops from a registration table')
+from obiwow.mail_drafts import AppleMailBackend, Draft, MaildirBackend, MboxBackend, SmtpBackend
 
-parser.add_argument('-i','--input',required=True, help='Path to CSV file with registrations (one row per participant)')
+link='https://www.mn.uio.no/bils/english/events/oslo-bioinfomatics-week/oslo-bioinformatics-workshop-week-2025/'
+sender='oslo-bioinfo-workshops@ifi.uio.no'
 
-args=parser.parse_args()
 
-#Input registration file
-file=args.input
-data=pd.read_csv(file, sep=';')
+def mail_body(title):
+    #Email text
+    return f"""Thank you for registering for the "{title}" workshop.
 
-link='https://www.mn.uio.no/bils/english/events/oslo-bioinfomatics-week/oslo-bioinformatics-workshop-week-2025/'
-sender='oslo-bioinfo-workshops@ifi.uio.no'
+Please take note of any requirements of the workshop you subscribed to on the workshop website:
+{link}
+
+Further information and updates to relevant workshops will be communicated by mail.
+
+Thank you again for your registration. If you have any questions or wish to modify your registration,
+please contact us at oslo-bioinfo-workshops@ifi.uio.no.
 
+Regards,
+Trainee Committee of BiLS (Bioinformatics in Life Science) at University of Oslo
+"""
 
-def applescript_escape(s: str) -> str:
-    #AppleScript-formatting
-    s = s.replace("\\", "\\\\")
-    s = s.replace('"', '\\"')
-    return s
 
+def build_drafts(data) -> List[Draft]:
+    """
+    Build one draft per workshop, with its participants as BCC recipients.
 
-def create_mail_draft(subject, sender, body, bcc_list):
-    
-    subject_esc = applescript_escape(subject)
-    body_esc = applescript_escape(body)
-    sender_esc=applescript_escape(sender)
+    Args:
+        data (pd.DataFrame): The registrations, with the columns 'workshop' and 'var3' (email).
 
-    # AppleScript-linjer for å legge inn BCC-mottakere
-    bcc_lines = []
-    for email in bcc_list:
-        email_esc = applescript_escape(email)
-        bcc_lines.append(
-            f'        make new bcc recipient at end of bcc recipients of newMessage with properties {{address:"{email_esc}"}}'
-        )
+    Returns:
+        List[Draft]: The drafts.
+    """
+    drafts = []
+    for title, group in data.groupby("workshop", dropna=False):
 
-    bcc_block = "\n".join(bcc_lines) if bcc_lines else "        -- no recipients"
+        title = title.replace('_',' ')
+        subject=f"Your registration to the OBiWoW2025 workshop '{title}'"
 
-    applescript = f'''
-set subjectText to "{subject_esc}"
-set bodyText to "{body_esc}"
-set senderAddress to "{sender_esc}"
+        bcc_emails = group['var3'].unique().tolist()
 
-tell application "Mail"
-    set newMessage to make new outgoing message with properties {{subject:subjectText, content:bodyText, sender:senderAddress}}
-    tell newMessage
-{bcc_block}
-        set visible to true
-    end tell
-    save newMessage
-end tell
-'''
-    sp.run(["osascript", "-e", applescript], check=True)
+        print(f"Making draft for {title}: ({len(bcc_emails)} participants)")
+        drafts.append(Draft(subject=subject, sender=sender, body=mail_body(title), bcc=tuple(bcc_emails)))
+    return drafts
 
 
-for title, group in data.groupby("workshop", dropna=False):
+def main(argv: Optional[List[str]] = None) -> None:
+    import pandas as pd
 
-    title = title.replace('_',' ')
-    subject=f"Your registration to the OBiWoW2025 workshop '{title}'"
+    parser = argparse.ArgumentParser(description='Create mail drafts for workshops from a registration table')
 
-    bcc_emails = group['var3'].unique().tolist()
+    parser.add_argument('-i','--input',required=True, help='Path to CSV file with registrations (one row per participant)')
+    parser.add_argument('--backend', choices=['apple', 'mbox', 'maildir', 'smtp'], default='apple',
+                        help='Where the drafts go: Apple Mail (macOS), an mbox file, a Maildir folder, '
+                             'or sent through an SMTP server (default: apple)')
+    parser.add_argument('-o', '--output', default='drafts.mbox',
+                        help='The mbox file or Maildir folder to write the drafts to (default: drafts.mbox)')
+    parser.add_argument('--smtp-host', default='localhost', help='SMTP server (default: localhost)')
+    parser.add_argument('--smtp-port', type=int, default=25, help='SMTP port (default: 25)')
+    parser.add_argument('--smtp-user', help='SMTP user name; the password is read from OBIWOW_SMTP_PASSWORD')
+    parser.add_argument('--starttls', action='store_true', help='Use STARTTLS on the SMTP connection')
+    parser.add_argument('--rate', type=float, default=1.0,
+                        help='Maximum number of mails sent per second over SMTP (default: 1)')
+    parser.add_argument('--max-recipients', type=int, default=100,
+                        help='Maximum number of BCC recipients per mail sent over SMTP (default: 100)')
 
-    #Email text
-    body = f"""Thank you for registering for the "{title}" workshop.
+    args=parser.parse_args(argv)
 
-Please take note of any requirements of the workshop you subscribed to on the workshop website:
-{link}
+    #Input registration file
+    file=args.input
+    data=pd.read_csv(file, sep=';')
 
-Further information and updates to relevant workshops will be communicated by mail.
+    drafts = build_drafts(data)
 
-Thank you again for your registration. If you have any questions or wish to modify your registration,
-please contact us at oslo-bioinfo-workshops@ifi.uio.no.
+    if args.backend == 'mbox':
+        backend = MboxBackend(args.output)
+    elif args.backend == 'maildir':
+        backend = MaildirBackend(args.output)
+    elif args.backend == 'smtp':
+        backend = SmtpBackend(args.smtp_host, args.smtp_port, username=args.smtp_user,
+                              password=os.environ.get('OBIWOW_SMTP_PASSWORD'), starttls=args.starttls,
+                              max_per_second=args.rate, max_recipients=args.max_recipients)
+    else:
+        backend = AppleMailBackend()
 
-Regards,
-Trainee Committee of BiLS (Bioinformatics in Life Science) at University of Oslo
-"""
+    try:
+        count = backend.deliver(drafts)
+    except (smtplib.SMTPException, OSError, subprocess.CalledProcessError) as e:
+        print(f"Error in {args.backend} backend: {e}")
+        print(f"{backend.delivered} of the mails were delivered before the error")
+        sys.exit(1)
 
-    print(f"Making draft for {title}: ({len(bcc_emails)} participants)")
-    create_mail_draft(subject=subject, sender=sender, body=body, bcc_list=bcc_emails)
+    if args.backend in ('mbox', 'maildir'):
+        print(f"{count} drafts written to {args.output}")
+    print("Done")
 
-print("Done")
 
-    
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,20 @@
-import csv
-from pprint import pprint
-import json
-import subprocess
-from pathlib import Path
+import argparse
+import os
 import sys
+from typing import List, Optional
+
+import pandas as pd
+
+from obiwow.evaluation_cube import ALL_WORKSHOPS, build_cube, load_topics
+from obiwow.evaluation_stats import comparison_table, write_comparison
+from obiwow import report_engine
+from obiwow.report_engine import FORMATS, EvaluationReport, render_native_reports
+from obiwow.report_manifest import (ReportManifest, format_summary, plan_reports, report_fingerprint,
+                                    template_fingerprint)
+from obiwow.report_runner import ReportJob, content_qmd_path, render_reports, report_qmd_path
+from obiwow.schedule_loader import load_schedule
+from obiwow.seat_badges import registrations_by_workshop
+from obiwow.title_matcher import TitleMatcher
 
 """
 Script to generate evaluation report for OBiWoW
@@ -11,56 +22,41 @@ Input:
 - evaluation_results.csv: file with dump from Google Form for evaluation
 - schedule.json: Schedule file generated by tsv_to_html.py
 
-* Generates a quarto markdown file with the header content for the 
-  evaluation report, setting wotkshop title and path to evaluation_results.csv.
-  This file has as include the qmd file that generates the report.
-* Uses quarto to convert the quarto markdown file to pdf.
+* Reads the evaluation export once and writes the counts of the responses and
+  the comments per workshop to evaluation_cube.json (see obiwow/evaluation_cube.py),
+  which each report loads.
+* Renders the reports in this process with matplotlib, as PDF or HTML
+  (see obiwow/report_engine.py).
+* Or, with `--engine quarto`, uses quarto to render the parameterized document
+  OBiWoW_workshop_evaluation_report.qmd to pdf with the workshop ID and title of each report,
+  several batches at the same time, each in its own temporary folder (see obiwow/report_runner.py).
 * Moves the pdf to the correct folder, same as where the list of registered
   participants is.
 * Also generates a report for all workshops combined.
+* Writes a table comparing the workshops (mean, median and confidence interval of the scale
+  questions, share of 'Yes', response rate), as CSV and HTML (see obiwow/evaluation_stats.py).
+* Only renders the reports of workshops whose responses changed since the last run,
+  and the report for all workshops if any of them did (see obiwow/report_manifest.py).
 """
 
-def do_cmd(cmd, dryrun = False):
-    """
-    Run a shell command
-    """
-    if dryrun:
-        print(f"Would be running: {cmd}")
-        return
-    else:
-        print(f"Running: {cmd}")
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    if result.stdout:
-        print(result.stdout)
-    else:
-        print(result.stderr)
-
-def run_quarto(qmd_content):
-    """
-    Run quarto to convert qmd to pdf
-    """
-
-    with open("OBiWoW_workshop_evaluation_report.qmd", 'w') as outfile:
-        outfile.write(qmd_content)
-
-    cmd = "quarto render OBiWoW_workshop_evaluation_report.qmd"
-    do_cmd(cmd)
-
-def move_file(old_location, new_location):
-    """
-    Move file from old_location to new_location
-    Code generated by Github Copilot
-    """
-    old_location_path = Path(old_location)
-    new_location_path = Path(new_location)
-    
-    if old_location_path.is_file():
-        print(f"Moving: {old_location} to {new_location}")
-        old_location_path.rename(new_location_path)
-    else:
-        print(f"No file found at {old_location}")
-
-if  __name__ == '__main__':
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description='Render the evaluation reports for each workshop and for all workshops')
+    parser.add_argument('--engine', choices=['native', 'quarto'], default='native',
+                        help='Render the reports in this process with matplotlib, or with Quarto (default: native)')
+    parser.add_argument('-f', '--format', choices=FORMATS, default='pdf',
+                        help='Format of the reports of the native engine (default: pdf)')
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                        help='Number of reports rendered at the same time with Quarto (default: 4)')
+    parser.add_argument('--quarto', default='quarto', help='The Quarto executable (default: quarto)')
+    parser.add_argument('--daemon', type=int, default=60,
+                        help='Seconds Quarto keeps the Jupyter kernel of a batch alive between reports, '
+                             '0 to start one per report (default: 60)')
+    parser.add_argument('--chart-cache', default=None,
+                        help='Folder of the cache of the charts (default: chart_cache in the evaluation folder)')
+    parser.add_argument('--force', action='store_true',
+                        help='Render all reports, also the ones whose responses did not change')
+    args = parser.parse_args(argv)
     
     year = 2025
     course_name = f"Oslo Bioinformatics Workshop Week {year}"
@@ -77,88 +73,108 @@ if  __name__ == '__main__':
 
     # Schedule file generated by tsv_to_html.py
     infile_dict = "/path/to/OBiWoW_scripts/outputs/schedule.json"
-    with open(infile_dict, 'r') as file:
-        dict_schedule = json.load(file)
+    schedule = load_schedule(infile_dict, use_index=True)
+
+    # Registration counts kept by `python -m obiwow stats`, for the response rates
+    path_registration_counts = "/path/to/OBiWoW_scripts/outputs/registration_stats.json"
+
+    # Match the workshop titles given in the evaluation form to the schedule,
+    # and list the ones that had to be guessed so they can be checked
+    evaluation_title_column = "Which workshop are you writing your answers for?"
+    title_matcher = TitleMatcher.from_schedule(schedule)
+    responses = pd.read_csv(path_evaluation)
+    response_workshop_ids = title_matcher.match_ids(responses[evaluation_title_column])
+    n_guessed = title_matcher.write_audit(evaluation_all_folder + "/title_mapping.tsv")
+    if n_guessed:
+        print(f"{n_guessed} workshop titles were guessed or not found, check '{evaluation_all_folder}/title_mapping.tsv'")
+
+    # Counts of the responses per workshop and topic, shared by all reports
+    path_cube = evaluation_all_folder + "/evaluation_cube.json"
+    cube = build_cube(responses, response_workshop_ids, load_topics())
+    cube.save(path_cube)
 
     ###################################
     # Create report for all workshops #
     ###################################
-    print(f"Workshop: All workshops")
-
-    qmd_content = f"""
-<!-- DO NOT EDIT THIS FILE
-This file is automatically generated by the script evaluation.py
--->
----
-title: Evaluation report for {course_name}
-subtitle: All workshops
-execute:
-  echo: false
-format: pdf
----
-
-```{{python}}
-workshop_title = 'All workshops'
-path_evaluation = '{path_evaluation}'
-```
-"""
-    qmd_content += "{{< include OBiWoW_workshop_evaluation_report_content.qmd >}}\n"
-    
-    # convert to PDF using quarto
-    run_quarto(qmd_content)
+    # reports to render: their title and where the pdf goes
+    reports = []
 
-    # move output pdf to evaluation folder
+    # output pdf goes to evaluation folder
     out_folder = evaluation_all_folder
     out_file = out_folder + "/ObiWoW_workshop_evaluation_report_all_workshops.pdf"
-    move_file("OBiWoW_workshop_evaluation_report.pdf", out_file)        
+    reports.append(EvaluationReport("All workshops", ALL_WORKSHOPS, f"Evaluation report for {course_name}",
+                                    "All workshops", out_file))
 
     ###################################
     # Create report for each workshop #
     ###################################
     
-    for key in dict_schedule:
-        workshop_title = dict_schedule[key]['title']
+    for workshop in schedule.values():
+        workshop_title = workshop.title
         if workshop_title.startswith("Networking event"):
             continue
         # title without spaces and special characters
-        workshop_short_title = workshop_title.replace(" ", "_").replace(":", "").replace("/", "")
-        workshop_short_title = workshop_short_title.replace("&", "").replace("__", "_").replace("'","")
-        print(f"Workshop: {workshop_title}")
-        
-        qmd_content = f"""
-<!-- DO NOT EDIT THIS FILE
-This file is automatically generated by the script evaluation.py
--->
----
-title: {course_name}
-subtitle: \"Evaluation report for '{workshop_title}'\"
-execute:
-  echo: false
-format: pdf
----
-
-```{{python}}
-workshop_title = "{workshop_title}"
-path_evaluation = '{path_evaluation}'
-```
-"""     
-        qmd_content += "{{< include OBiWoW_workshop_evaluation_report_content.qmd >}}\n"
-
-        # convert to PDF using quarto
-        run_quarto(qmd_content)
-
-        # check if output pdf exists
-        if not Path("OBiWoW_workshop_evaluation_report.pdf").is_file():
-            print("Something went wrong, no pdf generated")
-            sys.exit(1)
-        # move output pdf to workshop folder
+        workshop_short_title = workshop.slug
+
+        # output pdf goes to workshop folder, created if it does not yet exist
         out_folder = workshop_email_folder + "/" + workshop_short_title
         out_file = out_folder + "/Evaluation_report.pdf"
-        # create output folder if it does not yet exist
-        out_folder = Path(out_folder)
-        out_folder.mkdir(parents=True, exist_ok=True)
-        move_file("OBiWoW_workshop_evaluation_report.pdf", out_file)
-        
+        reports.append(EvaluationReport(workshop_title, workshop.id, course_name,
+                                        f"Evaluation report for '{workshop_title}'", out_file))
+
         # add `break` here for debugging
         # break
+
+    if args.engine == 'native' and args.format != 'pdf':
+        reports = [EvaluationReport(report.name, report.workshop_id, report.title, report.subtitle,
+                                    report.output_path[:-len('.pdf')] + f".{args.format}")
+                   for report in reports]
+
+    # comparison of all workshops, ranked by the overall impression
+    titles = {report.workshop_id: report.name for report in reports if report.workshop_id != ALL_WORKSHOPS}
+    comparison = comparison_table(cube, titles, registrations_by_workshop(path_registration_counts, schedule))
+    schedule.close()
+    write_comparison(comparison, evaluation_all_folder + "/evaluation_comparison.csv",
+                     evaluation_all_folder + "/evaluation_comparison.html", f"Evaluation of {course_name}")
+
+    # only the reports whose responses or templates changed since the last run
+    if args.engine == 'quarto':
+        template_files = [str(report_qmd_path()), str(content_qmd_path()), report_engine.__file__]
+    else:
+        template_files = [report_engine.__file__]
+    template = template_fingerprint(template_files, args.engine, args.format)
+    fingerprints = [report_fingerprint(cube, report, template) for report in reports]
+    manifest = ReportManifest(evaluation_all_folder + "/evaluation_reports.json")
+    # charts already drawn for the same counts are reused
+    chart_cache_dir = os.path.abspath(args.chart_cache or evaluation_all_folder + "/chart_cache")
+    to_render, skipped = plan_reports(reports, fingerprints, manifest, ALL_WORKSHOPS, force=args.force)
+
+    if args.engine == 'quarto':
+        # convert to PDF using quarto, the parameters and titles are passed as YAML files
+        jobs = [ReportJob(reports[i].name, {'workshop_title': reports[i].name, 'workshop_id': reports[i].workshop_id,
+                                            'path_cube': os.path.abspath(path_cube),
+                                            'chart_cache_dir': chart_cache_dir},
+                          reports[i].output_path, {'title': reports[i].title, 'subtitle': reports[i].subtitle})
+                for i in to_render]
+        results = render_reports(jobs, workers=args.workers, quarto=args.quarto, daemon=args.daemon)
+    else:
+        # all reports in this process, from the counts
+        results = render_native_reports(cube, [reports[i] for i in to_render], fmt=args.format,
+                                        chart_cache_dir=chart_cache_dir)
+    for i, result in zip(to_render, results):
+        if result.ok:
+            manifest.record(reports[i].output_path, fingerprints[i])
+    manifest.save()
+    print(format_summary(results, [reports[i] for i in skipped]))
+
+    failed = [result for result in results if not result.ok]
+    for result in failed:
+        print(f"Something went wrong for '{result.name}', no report generated:\n{result.error}")
+    if failed:
+        print(f"{len(failed)} of {len(results)} reports failed")
+        sys.exit(1)
     print("Done!")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,112 +1,198 @@
-from obiwow.data_reader_parser import standardise_time_of_day_column, write_html_page
+import argparse
+from typing import List, Optional
+
+import generate_room_schedule
+from obiwow.data_reader_parser import write_html_page
 from obiwow.data_reader_parser import (
-    parse_yaml, parse_csv_to_pandas, merge_submission_schedule,
-    add_start_end_time_to_schedule, annotate_networking_event, write_ical_files, write_schedule_json,
-    expand_multiday_workshops
+    import_all_config, prepare_schedule, parse_csv_to_pandas, merge_submission_schedule, write_ical_files,
+    write_schedule_json
 )
+from obiwow.allocation import OverbookingPolicy
+from obiwow.artifact_store import ArtifactStore, schedule_fingerprint
+from obiwow.pipeline import Stage, run_pipeline
+from obiwow.render_cache import RenderCache
+from obiwow.seat_badges import seat_badges, update_badges
 from obiwow.tsv_to_html import generate_workshop_body, generate_schedule_table, generate_full_html_page
 
 
-def import_all_config() -> dict:
-    """
-    Import all configuration files.
+def load_submissions(paths: dict):
+    return parse_csv_to_pandas(paths['input']['survey_results']['file_path'],
+                               paths['input']['survey_results']['delimiter'])
 
-    Returns:
-        dict: A dictionary containing all configuration data.
-    """
-    paths_config = parse_yaml('config/paths.yaml')
-    yearly_config = parse_yaml('config/yearly_config.yaml')
-    nettskjema_columns = parse_yaml('config/nettskjema_columns.yaml')
-    schedule_columns = parse_yaml('config/schedule_columns.yaml')
-    rooms_config = parse_yaml('config/rooms.yaml')
-
-    return {
-        'paths': paths_config,
-        'yearly': yearly_config,
-        'nettskjema_columns': nettskjema_columns,
-        'schedule_columns': schedule_columns,
-        'rooms': rooms_config
-    }
-
-
-def generate_html() -> None:
-    """
-    Generate the HTML and iCalendar files for the workshop website.
-    """
-    DEBUG = False # for printing out debugging info
-    config = import_all_config()
 
-    # registration_open = config['yearly'].get('registration_open', False)
-    paths = config['paths']
-    yearly = config['yearly']
-    nettskjema_columns = config['nettskjema_columns']
-    schedule_columns = config['schedule_columns']
-    rooms = config['rooms']
-
-    df_submissions = parse_csv_to_pandas(paths['input']['survey_results']['file_path'],
-                                         paths['input']['survey_results']['delimiter'])
-    df_schedule = parse_csv_to_pandas(paths['input']['schedule']['file_path'],
-                                      paths['input']['schedule']['delimiter'])
-
-    title_column = schedule_columns['title_column']
-    if df_schedule is not None and title_column in df_schedule.columns:
-        df_schedule = df_schedule[
-            df_schedule[title_column].fillna("").astype(str).str.strip().ne("Example")
-        ]
-
-        # Expand multi-day workshops to per-day entries (with titled suffixes, per requirements)
-        df_schedule = expand_multiday_workshops(df_schedule, schedule_columns)
-    # Remove rows with cancelled workshops
-    #df_schedule = df_schedule[df_schedule[schedule_columns['status_column']] != 'cancelled']
-
-    # Assign start/end time columns to the schedule DataFrame
-    df_schedule = add_start_end_time_to_schedule(df_schedule, schedule_columns)
-    if DEBUG:
-        # DEBUG: print the DataFrame columns and first rows to verify time columns
-        print("Schedule DataFrame columns after time assignment:", df_schedule.columns.tolist())
-        print(df_schedule[[schedule_columns['title_column'],
-                        schedule_columns['date_column'],
-                        schedule_columns.get('time_column', 'Time'),
-                        schedule_columns.get('duration_column', 'Length'),
-                        schedule_columns.get('start_time_column', 'Start time'),
-                        schedule_columns.get('end_time_column', 'End time')]].head(10))
-        # DEBUG: print first few expanded schedule entries and their computed times
-        print(df_schedule[[schedule_columns['title_column'],
-                        schedule_columns['date_column'],
-                        schedule_columns.get('time_column', 'Time'),
-                        schedule_columns.get('duration_column', 'Length'),
-                        schedule_columns.get('start_time_column', 'start_time'),
-                        schedule_columns.get('end_time_column', 'end_time')]].head(10))
-    standardise_time_of_day_column(df_schedule, schedule_columns)
-    df_schedule = add_start_end_time_to_schedule(df_schedule, schedule_columns)
-    df_schedule = annotate_networking_event(df_schedule, schedule_columns)
-
-    df_merge_submission_schedule = merge_submission_schedule(df_submissions, df_schedule, nettskjema_columns,
-                                                             schedule_columns)
+def merge(df_submissions, df_schedule, nettskjema_columns: dict, schedule_columns: dict):
+    return merge_submission_schedule(df_submissions, df_schedule, nettskjema_columns, schedule_columns)
+
+
+def store_artifacts(df_schedule, df_merge_submission_schedule, artifact_store: ArtifactStore,
+                    fingerprint: str) -> str:
+    if artifact_store.fingerprint('schedule') != fingerprint or \
+            artifact_store.fingerprint('merged_submission_schedule') != fingerprint:
+        artifact_store.save('schedule', fingerprint, df_schedule)
+        artifact_store.save('merged_submission_schedule', fingerprint, df_merge_submission_schedule)
+    return str(artifact_store.store_dir)
 
-    list_workshop_body = generate_workshop_body(df_merge_submission_schedule, nettskjema_columns, schedule_columns,
-                                                yearly, rooms)
 
-    string_schedule_table = generate_schedule_table(df_schedule, schedule_columns, yearly)
+def compute_badges(df_schedule, schedule_columns: dict, yearly: dict, paths: dict) -> dict:
+    # No badges (and the page as before) when registration is closed or there are no counts yet
+    counts_path = paths.get('registration_counts', {}).get('file_path')
+    if not yearly.get('registration_open') or not counts_path:
+        return {}
+    return seat_badges(df_schedule, schedule_columns, counts_path,
+                       OverbookingPolicy(factor=yearly.get('overbooking_factor', 1.0)))
 
 
-    string_full_page = generate_full_html_page(string_schedule_table, list_workshop_body, yearly, paths)
+def render_schedule_table(df_schedule, schedule_columns: dict, yearly: dict, seats_badges: dict) -> str:
+    return generate_schedule_table(df_schedule, schedule_columns, yearly, seats_badges)
+
+
+def render_workshop_body(df_merge_submission_schedule, nettskjema_columns: dict, schedule_columns: dict,
+                         yearly: dict, rooms: dict, render_cache: Optional[RenderCache], workers: int,
+                         seats_badges: dict) -> list:
+    list_workshop_body = generate_workshop_body(df_merge_submission_schedule, nettskjema_columns, schedule_columns,
+                                                yearly, rooms, cache=render_cache, workers=workers,
+                                                seats_badges=seats_badges)
+    if render_cache is not None:
+        print(f"Workshop sections: {render_cache.hits} reused from cache, {render_cache.misses} rendered.")
+    return list_workshop_body
 
+
+def write_page(schedule_table: str, workshop_body: list, yearly: dict, paths: dict) -> str:
+    string_full_page = generate_full_html_page(schedule_table, workshop_body, yearly, paths)
     write_html_page(string_full_page, paths)
+    return paths['output']['html']['file_path']
+
 
+def write_ics(df_merge_submission_schedule, paths: dict, schedule_columns: dict, rooms: dict, yearly: dict) -> str:
     write_ical_files(df_merge_submission_schedule, paths['output']['ics']['dir_path'], schedule_columns, rooms, yearly)
+    return paths['output']['ics']['dir_path']
+
+
+def write_json(df_schedule, schedule_columns: dict, paths: dict) -> str:
+    write_schedule_json(df_schedule, schedule_columns, paths['output']['schedule_json']['file_path'], write_index=True)
+    return paths['output']['schedule_json']['file_path']
+
+
+def write_rooms(schedule_json: str, paths: dict) -> str:
+    room_schedule = paths['output'].get('room_schedule', {})
+    outfile = room_schedule.get('file_path', "outputs/room_schedule.md")
+    generate_room_schedule.main(['--schedule', schedule_json, '--outfile', outfile,
+                                 '--csv-outfile', room_schedule.get('csv_file_path', "outputs/room_schedule.csv")])
+    return outfile
+
+
+# Stages of the website pipeline. Once the merged frame exists, the HTML, calendar files and
+# JSON/room schedule branches are independent and run concurrently.
+STAGES = [
+    Stage('submissions', load_submissions, inputs=('paths',), outputs=('df_submissions',)),
+    Stage('schedule', prepare_schedule, inputs=('paths', 'schedule_columns'), outputs=('df_schedule',)),
+    Stage('merge', merge, inputs=('df_submissions', 'df_schedule', 'nettskjema_columns', 'schedule_columns'),
+          outputs=('df_merge_submission_schedule',)),
+    Stage('artifacts', store_artifacts,
+          inputs=('df_schedule', 'df_merge_submission_schedule', 'artifact_store', 'fingerprint'),
+          outputs=('artifacts',)),
+    Stage('badges', compute_badges, inputs=('df_schedule', 'schedule_columns', 'yearly', 'paths'),
+          outputs=('seats_badges',)),
+    Stage('workshop_body', render_workshop_body,
+          inputs=('df_merge_submission_schedule', 'nettskjema_columns', 'schedule_columns', 'yearly', 'rooms',
+                  'render_cache', 'workers', 'seats_badges'),
+          outputs=('workshop_body',)),
+    Stage('schedule_table', render_schedule_table,
+          inputs=('df_schedule', 'schedule_columns', 'yearly', 'seats_badges'), outputs=('schedule_table',)),
+    Stage('html', write_page, inputs=('schedule_table', 'workshop_body', 'yearly', 'paths'), outputs=('html',)),
+    Stage('ics', write_ics, inputs=('df_merge_submission_schedule', 'paths', 'schedule_columns', 'rooms', 'yearly'),
+          outputs=('ics',)),
+    Stage('json', write_json, inputs=('df_schedule', 'schedule_columns', 'paths'), outputs=('schedule_json',)),
+    Stage('rooms', write_rooms, inputs=('schedule_json', 'paths'), outputs=('room_schedule',)),
+]
+
+
+def generate_html(use_cache: bool = True, workers: int = 1, targets: Optional[List[str]] = None,
+                  executor: str = 'thread', jobs: Optional[int] = None) -> None:
+    """
+    Generate the HTML and iCalendar files for the workshop website.
 
-    write_schedule_json(df_schedule, schedule_columns, paths['output']['schedule_json']['file_path'])
+    Args:
+        use_cache (bool): Reuse rendered workshop sections from the render cache when their content is unchanged,
+            and the stored schedule frames when the exports and configuration are unchanged.
+        workers (int): Number of worker processes used to render the workshop sections.
+        targets (Optional[List[str]]): Names of the stages to run, with their dependencies. All stages if None.
+        executor (str): How independent stages run: 'thread', 'process' or 'serial'.
+        jobs (Optional[int]): Maximum number of stages running at the same time.
+    """
+    config = import_all_config()
+    paths = config['paths']
+
+    render_cache = None
+    if use_cache and 'cache' in paths:
+        render_cache = RenderCache(paths['cache']['dir_path'],
+                                   max_entries=paths['cache'].get('max_entries', 1000))
+
+    # Reuse the normalized schedule and merged frame if the exports and configuration did not change
+    artifact_store = ArtifactStore(paths.get('artifacts', {}).get('dir_path', 'outputs/artifacts'))
+    fingerprint = schedule_fingerprint(config)
+    values = dict(config, render_cache=render_cache, workers=workers, artifact_store=artifact_store,
+                  fingerprint=fingerprint)
+    if use_cache:
+        df_schedule = artifact_store.load('schedule', fingerprint)
+        df_merge_submission_schedule = artifact_store.load('merged_submission_schedule', fingerprint)
+        if df_schedule is not None and df_merge_submission_schedule is not None:
+            print(f"Using the schedule stored in '{artifact_store.store_dir}', the inputs did not change.")
+            values.update(df_schedule=df_schedule, df_merge_submission_schedule=df_merge_submission_schedule)
+
+    values = run_pipeline(STAGES, values, targets=targets, executor=executor, max_workers=jobs)
 
     print("Success! Output files written to disk.")
-    print(f"Use '{paths['output']['html']['file_path']}' as raw html for the workshop website.")
-    print(
-        f"Copy '*.ics' files in the '{paths['output']['ics']['dir_path']}' folder so that they are in {paths['output']['ics']['dir_path']}.")
+    if 'html' in values:
+        print(f"Use '{paths['output']['html']['file_path']}' as raw html for the workshop website.")
+    if 'ics' in values:
+        print(
+            f"Copy '*.ics' files in the '{paths['output']['ics']['dir_path']}' folder so that they are in {paths['output']['ics']['dir_path']}.")
+
 
+def update_seat_badges() -> None:
+    """
+    Update the seats-left badges of the generated page from the latest registration counts, without rendering
+    the page or the calendar files again. The page is generated again if badges were added or removed.
+    """
+    config = import_all_config()
+    paths = config['paths']
+    artifact_store = ArtifactStore(paths.get('artifacts', {}).get('dir_path', 'outputs/artifacts'))
+    df_schedule = artifact_store.load('schedule', schedule_fingerprint(config))
+    if df_schedule is None:
+        df_schedule = prepare_schedule(paths, config['schedule_columns'])
+    badges = compute_badges(df_schedule, config['schedule_columns'], config['yearly'], paths)
+    changed = update_badges(paths['output']['html']['file_path'], badges)
+    if changed is None:
+        print("The workshops with a badge changed, generating the page again.")
+        generate_html(targets=['html'])
+    else:
+        print(f"{changed} seats-left badges updated in '{paths['output']['html']['file_path']}'.")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Generate the workshop website, calendar files and schedule JSON')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Rebuild the schedule and render every workshop section again instead of reusing stored '
+                             'frames and the render cache')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Number of worker processes for rendering workshop sections (default: 1)')
+    parser.add_argument('--target', action='append', choices=[stage.name for stage in STAGES],
+                        help='Only run this stage and the stages it depends on (can be repeated)')
+    parser.add_argument('--executor', choices=['thread', 'process', 'serial'], default='thread',
+                        help='How independent stages run (default: thread)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Maximum number of stages running at the same time')
+    parser.add_argument('--badges', action='store_true',
+                        help='Only update the seats-left badges of the generated page from the registration counts')
+    args = parser.parse_args(argv)
+
+    if args.badges:
+        update_seat_badges()
+        return
+    generate_html(use_cache=not args.no_cache, workers=args.workers, targets=args.target,
+                  executor=args.executor, jobs=args.jobs)
 
-import subprocess
 
 if __name__ == "__main__":
-    generate_html()
-    # Generate the markdown room schedule as the final step
-    subprocess.run(["python3", "generate_room_schedule.py"], check=True)
+    main()
@@ -0,0 +1,5 @@
+import sys
+
+from obiwow.cli import main
+
+sys.exit(main())
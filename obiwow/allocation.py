@@ -0,0 +1,217 @@
+"""
+Allocate workshop seats to registrations.
+
+Registrations are handled in submission order: a registration is accepted while the workshop has seats left
+(its max attendance times the overbooking factor), otherwise it goes to the waiting list. A registration for
+a workshop whose sessions overlap a workshop the same person was already accepted to is skipped as a clash.
+
+The seat ranking is computed per workshop in one vectorized pass; only registrations of people with overlapping
+sessions are looked at one by one, in submission order.
+"""
+import bisect
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from obiwow.schedule_loader import Workshop
+
+ACCEPTED = 'accepted'
+WAITLIST = 'waitlist'
+CLASH = 'clash'
+DUPLICATE = 'duplicate'
+UNKNOWN = 'unknown'
+
+_UNLIMITED = np.iinfo(np.int64).max
+
+
+@dataclass(frozen=True)
+class OverbookingPolicy:
+    """
+    Number of seats offered per workshop: its max attendance times an overbooking factor
+    (e.g. 1.25 in 2022, 1.7 in 2023, as not everybody registered shows up).
+
+    Attributes:
+        factor (float): Overbooking factor for all workshops.
+        workshop_factors (Mapping[str, float]): Overbooking factor of specific workshops, by workshop ID.
+        default_max_attendance (Optional[int]): Max attendance of workshops without one. No limit if None.
+    """
+    factor: float = 1.0
+    workshop_factors: Mapping[str, float] = field(default_factory=dict)
+    default_max_attendance: Optional[int] = None
+
+    def seats(self, workshop: Workshop) -> Optional[int]:
+        """
+        Return the number of seats of a workshop, or None if it has no limit.
+        """
+        max_attendance = workshop.max_attendance
+        if not isinstance(max_attendance, int):
+            try:
+                max_attendance = int(max_attendance)
+            except (TypeError, ValueError):
+                max_attendance = self.default_max_attendance
+        if max_attendance is None:
+            return None
+        return int(max_attendance * self.workshop_factors.get(workshop.id, self.factor))
+
+
+def parse_timeslot(date: str, timeslot: str) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Parse a session of the schedule, e.g. ('10.11.25', '9:00-12:00').
+
+    Returns:
+        Optional[Tuple[datetime, datetime]]: Start and end of the session, or None if they cannot be parsed.
+    """
+    match = re.match(r'\s*(\d{1,2}[:.]\d{2})\s*-\s*(\d{1,2}[:.]\d{2})\s*$', timeslot or '')
+    if not match:
+        return None
+    try:
+        day = datetime.strptime(date, '%d.%m.%y')
+        start, end = (datetime.strptime(value.replace('.', ':'), '%H:%M').time() for value in match.groups())
+    except ValueError:
+        return None
+    return datetime.combine(day, start), datetime.combine(day, end)
+
+
+def workshop_sessions(workshop: Workshop) -> List[Tuple[datetime, datetime]]:
+    """
+    Return the sessions of a workshop, one per day. Days without their own timeslot use the first one.
+    """
+    sessions = []
+    for i, date in enumerate(workshop.dates):
+        timeslot = workshop.timeslots[i] if i < len(workshop.timeslots) else \
+            workshop.timeslots[0] if workshop.timeslots else ''
+        session = parse_timeslot(date, timeslot)
+        if session is not None:
+            sessions.append(session)
+    return sessions
+
+
+def clash_matrix(workshops: List[Workshop]) -> np.ndarray:
+    """
+    Return a boolean matrix telling which workshops have overlapping sessions.
+    Workshops without parsable sessions clash with none.
+    """
+    sessions = [workshop_sessions(workshop) for workshop in workshops]
+    matrix = np.zeros((len(workshops), len(workshops)), dtype=bool)
+    for i in range(len(workshops)):
+        for j in range(i + 1, len(workshops)):
+            matrix[i, j] = matrix[j, i] = any(start_a < end_b and start_b < end_a
+                                              for start_a, end_a in sessions[i] for start_b, end_b in sessions[j])
+    return matrix
+
+
+def allocate(registrations: pd.DataFrame, schedule: Mapping[str, Workshop],
+             policy: Optional[OverbookingPolicy] = None, email_column: str = 'email',
+             workshop_column: str = 'workshop_id') -> pd.DataFrame:
+    """
+    Assign a status to each registration, in submission order.
+
+    Args:
+        registrations (pd.DataFrame): One row per registration, in submission order, with the email of the
+            participant and the ID of the workshop (None if unknown).
+        schedule (Mapping[str, Workshop]): The schedule, see `obiwow.schedule_loader.load_schedule`.
+        policy (Optional[OverbookingPolicy]): The number of seats per workshop. Max attendance if None.
+        email_column (str): The column with the emails. Compared without case and surrounding spaces.
+        workshop_column (str): The column with the workshop IDs.
+
+    Returns:
+        pd.DataFrame: The registrations with the added columns
+            - `status`: 'accepted', 'waitlist', 'clash' (overlaps a workshop the person was accepted to),
+              'duplicate' (same person and workshop as an earlier registration) or 'unknown' (workshop not in
+              the schedule)
+            - `waitlist_position`: 1 for the first on the waiting list of the workshop, 0 when not waiting
+            - `clash_with`: ID of the accepted workshop a clashing registration overlaps
+    """
+    policy = policy or OverbookingPolicy()
+    workshops = list(schedule.values())
+    workshop_codes = {workshop.id: code for code, workshop in enumerate(workshops)}
+    seats = np.array([_UNLIMITED if policy.seats(workshop) is None else policy.seats(workshop)
+                      for workshop in workshops] + [0], dtype=np.int64)
+    overlaps = clash_matrix(workshops)
+
+    result = registrations.copy()
+    n = len(result)
+    workshop_ids = result[workshop_column]
+    codes = pd.Index(list(workshop_codes)).get_indexer(workshop_ids.where(workshop_ids.notna(), None).astype(str))
+    emails = result[email_column].astype(str).str.strip().str.lower().to_numpy()
+    email_codes = pd.factorize(emails)[0]
+
+    known = codes >= 0
+    duplicate = known & pd.DataFrame({'email': email_codes, 'code': codes}).duplicated().to_numpy()
+    eligible = known & ~duplicate
+    positions = np.arange(n)
+
+    # Seat rank of each eligible registration if nobody clashed
+    eligible_codes = pd.Series(codes[eligible])
+    base_rank = np.full(n, -1, dtype=np.int64)
+    base_rank[eligible] = eligible_codes.groupby(eligible_codes).cumcount().to_numpy()
+
+    # Earlier registrations of the same person for an overlapping workshop
+    candidates = pd.DataFrame({'email': email_codes[eligible], 'code': codes[eligible],
+                               'position': positions[eligible]})
+    candidates = candidates[candidates['email'].duplicated(keep=False)]
+    pairs = candidates.merge(candidates, on='email', suffixes=('_earlier', ''))
+    pairs = pairs[(pairs['position_earlier'] < pairs['position'])
+                  & overlaps[pairs['code_earlier'].to_numpy(), pairs['code'].to_numpy()]]
+
+    clash = np.zeros(n, dtype=bool)
+    clash_with = np.full(n, -1, dtype=np.int64)
+    # Positions of the clashing registrations per workshop, in submission order
+    clashes_before: Dict[int, List[int]] = {}
+
+    def is_accepted(position: int) -> bool:
+        code = codes[position]
+        rank = base_rank[position] - bisect.bisect_left(clashes_before.get(code, []), position)
+        return rank < seats[code]
+
+    pairs = pairs.sort_values(['position', 'position_earlier'])
+    for position, earlier_position, earlier_code in zip(pairs['position'].tolist(),
+                                                        pairs['position_earlier'].tolist(),
+                                                        pairs['code_earlier'].tolist()):
+        if not clash[position] and not clash[earlier_position] and is_accepted(earlier_position):
+            clash[position] = True
+            clash_with[position] = earlier_code
+            clashes_before.setdefault(codes[position], []).append(position)
+
+    # Seat rank once the clashing registrations are left out
+    seated = eligible & ~clash
+    seated_codes = pd.Series(codes[seated])
+    rank = np.full(n, -1, dtype=np.int64)
+    rank[seated] = seated_codes.groupby(seated_codes).cumcount().to_numpy()
+    accepted = seated & (rank < seats[codes])
+
+    status = np.full(n, UNKNOWN, dtype=object)
+    status[duplicate] = DUPLICATE
+    status[seated] = WAITLIST
+    status[accepted] = ACCEPTED
+    status[clash] = CLASH
+    result['status'] = status
+    result['waitlist_position'] = np.where(seated & ~accepted, rank - seats[codes] + 1, 0)
+    ids = np.array([workshop.id for workshop in workshops] + [None], dtype=object)
+    result['clash_with'] = np.where(clash, ids[clash_with], None)
+    return result
+
+
+def allocation_summary(allocation: pd.DataFrame, schedule: Mapping[str, Workshop],
+                       policy: Optional[OverbookingPolicy] = None,
+                       workshop_column: str = 'workshop_id') -> pd.DataFrame:
+    """
+    Count the registrations per workshop and status.
+
+    Returns:
+        pd.DataFrame: One row per workshop with its title, seats and the number of registrations per status.
+    """
+    policy = policy or OverbookingPolicy()
+    counts = pd.crosstab(allocation[workshop_column].astype(str), allocation['status'])
+    rows = []
+    for workshop_id, workshop in schedule.items():
+        row = {'workshop_id': workshop_id, 'title': workshop.title, 'seats': policy.seats(workshop)}
+        for status in (ACCEPTED, WAITLIST, CLASH, DUPLICATE):
+            row[status] = int(counts.at[workshop_id, status]) \
+                if workshop_id in counts.index and status in counts.columns else 0
+        rows.append(row)
+    return pd.DataFrame(rows)
@@ -0,0 +1,165 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from obiwow.data_reader_parser import merge_submission_schedule, parse_csv_to_pandas, prepare_schedule
+from obiwow.render_cache import file_fingerprint, hash_content
+
+# Bump when the way the frames are built changes, so stored frames are rebuilt
+STORE_VERSION = 1
+
+try:
+    from pyarrow import feather
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+_INDEX_COLUMN = '__index__'
+
+
+def fingerprint_inputs(file_paths: Iterable[str], *config: dict) -> str:
+    """
+    Compute a fingerprint of input files and configuration values.
+
+    Args:
+        file_paths (Iterable[str]): The input files; their content is hashed.
+        *config (dict): Configuration values the artifacts depend on.
+
+    Returns:
+        str: The fingerprint as a hexadecimal digest.
+    """
+    return hash_content(STORE_VERSION, [file_fingerprint(path) for path in file_paths], config)
+
+
+class ArtifactStore:
+    """
+    Store of intermediate DataFrames, written as Feather files (or pickles when pyarrow is not installed)
+    together with the fingerprint of the inputs they were built from.
+
+    A manifest (`manifest.json`) records the file, format and fingerprint of each artifact, so a stored frame
+    is only returned when it was built from the same inputs.
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = Path(store_dir)
+        self.manifest_path = self.store_dir / 'manifest.json'
+
+    def _read_manifest(self) -> Dict[str, dict]:
+        try:
+            with open(self.manifest_path, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, manifest: Dict[str, dict]) -> None:
+        tmp_path = self.manifest_path.with_name(f"manifest.json.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as file:
+            json.dump(manifest, file, indent=4)
+        os.replace(tmp_path, self.manifest_path)
+
+    def fingerprint(self, name: str) -> Optional[str]:
+        """
+        Return the fingerprint of the stored artifact `name`, or None if there is none.
+        """
+        return self._read_manifest().get(name, {}).get('fingerprint')
+
+    def save(self, name: str, fingerprint: str, df: pd.DataFrame) -> None:
+        """
+        Store a DataFrame under `name` with the fingerprint of its inputs.
+
+        The index is stored as a column, so it is restored exactly on loading.
+        Frames that Feather cannot hold (e.g. columns with mixed types) are pickled instead.
+        """
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        file_format = None
+        if HAS_PYARROW:
+            file_path = self.store_dir / f"{name}.feather"
+            try:
+                df.reset_index(names=_INDEX_COLUMN).to_feather(file_path)
+                file_format = 'feather'
+            except Exception as e:
+                print(f"WARNING: Could not write '{name}' as Feather, using pickle instead: {e}")
+        if file_format is None:
+            file_path = self.store_dir / f"{name}.pkl"
+            df.to_pickle(file_path)
+            file_format = 'pickle'
+
+        manifest = self._read_manifest()
+        manifest[name] = {'file': file_path.name, 'format': file_format, 'fingerprint': fingerprint}
+        self._write_manifest(manifest)
+
+    def load(self, name: str, fingerprint: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Load the artifact `name`, memory-mapping Feather files.
+
+        Args:
+            name (str): The name of the artifact.
+            fingerprint (Optional[str]): Only return the artifact if it was stored with this fingerprint.
+
+        Returns:
+            Optional[pd.DataFrame]: The stored DataFrame, or None if it is missing or out of date.
+        """
+        entry = self._read_manifest().get(name)
+        if entry is None or (fingerprint is not None and entry['fingerprint'] != fingerprint):
+            return None
+        file_path = self.store_dir / entry['file']
+        try:
+            if entry['format'] == 'feather':
+                df = feather.read_table(file_path, memory_map=True).to_pandas().set_index(_INDEX_COLUMN)
+                df.index.name = None
+                return df
+            return pd.read_pickle(file_path)
+        except Exception as e:
+            print(f"WARNING: Could not load artifact '{name}': {e}")
+            return None
+
+
+def schedule_fingerprint(config: dict) -> str:
+    """
+    Fingerprint of everything the normalized schedule and the merged frame are built from:
+    the submission and schedule exports and the column and input configuration.
+    """
+    paths = config['paths']
+    return fingerprint_inputs([paths['input']['survey_results']['file_path'],
+                               paths['input']['schedule']['file_path']],
+                              paths['input'], config['nettskjema_columns'], config['schedule_columns'])
+
+
+def load_or_build_frames(config: dict, store: Optional[ArtifactStore] = None,
+                         rebuild: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Return the normalized schedule and the merged submission+schedule frame.
+
+    Frames are taken from the artifact store when they were built from the same inputs,
+    otherwise they are built from the exports and stored.
+
+    Args:
+        config (dict): All configuration data, see `import_all_config`.
+        store (Optional[ArtifactStore]): The artifact store. Uses `artifacts['dir_path']` in paths.yaml if None.
+        rebuild (bool): Build the frames even if they are stored.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: The normalized schedule and the merged frame.
+    """
+    paths = config['paths']
+    if store is None:
+        store = ArtifactStore(paths.get('artifacts', {}).get('dir_path', 'outputs/artifacts'))
+    fingerprint = schedule_fingerprint(config)
+
+    if not rebuild:
+        df_schedule = store.load('schedule', fingerprint)
+        df_merged = store.load('merged_submission_schedule', fingerprint)
+        if df_schedule is not None and df_merged is not None:
+            return df_schedule, df_merged
+
+    df_submissions = parse_csv_to_pandas(paths['input']['survey_results']['file_path'],
+                                         paths['input']['survey_results']['delimiter'])
+    df_schedule = prepare_schedule(paths, config['schedule_columns'])
+    df_merged = merge_submission_schedule(df_submissions, df_schedule, config['nettskjema_columns'],
+                                          config['schedule_columns'])
+    store.save('schedule', fingerprint, df_schedule)
+    store.save('merged_submission_schedule', fingerprint, df_merged)
+    return df_schedule, df_merged
@@ -0,0 +1,78 @@
+"""
+Command line entry point for the OBiWoW scripts: `python -m obiwow <command> [options]`.
+
+Each command's module is only imported when that command runs, so `--help` and light commands
+such as `stats` do not pay for importing pandas, Mako or PyYAML.
+"""
+import argparse
+import importlib
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+# command: (module, function, help)
+COMMANDS = {
+    'build': ('generate_website', 'main',
+              'Generate the workshop website, calendar files, schedule JSON and room schedule'),
+    'rooms': ('generate_room_schedule', 'main', 'Write the room schedule (Markdown and CSV) from schedule.json'),
+    'mail': ('registration_mail', 'main', 'Allocate seats and write the confirmation mails'),
+    'evaluate': ('evaluation', 'main', 'Render the evaluation reports'),
+    'drafts': ('draft_email', 'main', 'Create mail drafts for the participants of each workshop'),
+    'stats': ('obiwow.registration_stats', 'main', 'Statistics on the registration dump of the nettskjema'),
+    'sync': ('obiwow.nettskjema', 'main', 'Fetch the new submissions of the nettskjema forms'),
+    'store': ('obiwow.store', 'main', 'Import the exports into the local SQLite store'),
+    'github': ('obiwow.github_scaffold', 'main', 'Create the workshop folders and READMEs of the GitHub repository'),
+}
+
+
+def import_command(command: str) -> tuple:
+    """
+    Import the module of a command and return its entry function with the time spent importing.
+
+    The scripts live at the root of the repository, which is added to the import path if needed.
+
+    Args:
+        command (str): The name of the command, a key of COMMANDS.
+
+    Returns:
+        tuple: The entry function and the import time in seconds.
+    """
+    module_name, function_name, _ = COMMANDS[command]
+    project_root = str(Path(__file__).resolve().parent.parent)
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    import_seconds = time.perf_counter() - start
+    return getattr(module, function_name), import_seconds
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='obiwow',
+        description='Organise the Oslo Bioinformatics Workshop Week. '
+                    'Run `obiwow <command> --help` for the options of a command.')
+    parser.add_argument('-t', '--import-times', action='store_true',
+                        help='Report the time spent importing the modules of the command')
+    subparsers = parser.add_subparsers(dest='command', metavar='<command>')
+    for command, (_, _, help_text) in COMMANDS.items():
+        subparsers.add_parser(command, help=help_text, add_help=False)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args, command_argv = parser.parse_known_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 1
+
+    entry, import_seconds = import_command(args.command)
+    if args.import_times:
+        print(f"obiwow {args.command}: imported '{COMMANDS[args.command][0]}' in {import_seconds * 1000:.1f} ms",
+              file=sys.stderr)
+    # Usage messages of the command show `obiwow <command>`
+    sys.argv[0] = f"obiwow {args.command}"
+    entry(command_argv)
+    return 0
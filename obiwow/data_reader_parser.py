@@ -8,6 +8,8 @@ from mako.template import Template
 import yaml
 import pandas as pd
 
+from obiwow.schedule_loader import write_schedule_index
+
 
 def add_duration_to_time(start_time_str: str, duration_str: str, workshop_title: str) -> str:
     """
@@ -474,11 +476,13 @@ def write_ical_files(df: pd.DataFrame, outdir_ics: str, schedule_columns: Dict[s
         print(f"Error in write_ical_files: {e}")
 
 
-def write_schedule_json(schedule_df: pd.DataFrame, schedule_columns: dict, output_file: str) -> None:
+def write_schedule_json(schedule_df: pd.DataFrame, schedule_columns: dict, output_file: str,
+                        write_index: bool = False) -> None:
     """
     Create a JSON file from the schedule DataFrame, correctly handling multi-day workshops.
     Multi-day workshops are grouped by ID, and their per-day data is aggregated into lists.
     Also prints a warning if a room has more than one workshop booked at the same timeslot (for any timeslot).
+    With `write_index`, also writes the binary sidecar read by `obiwow.schedule_loader.load_schedule`.
     """
     try:
         from collections import defaultdict
@@ -580,6 +584,9 @@ def write_schedule_json(schedule_df: pd.DataFrame, schedule_columns: dict, outpu
 
         with open(output_file, 'w') as json_file:
             json.dump(schedule_dict, json_file, indent=4)
+        if write_index:
+            # Binary sidecar for the scripts reading the schedule, see obiwow.schedule_loader
+            write_schedule_index(output_file)
     except Exception as e:
         print(f"Error in write_schedule_json: {e}")
 
@@ -640,3 +647,61 @@ def write_html_page(full_page_html_rendered: str, paths: dict) -> None:
     except Exception as e:
         print(f"Error in write_html_page: {e}")
         raise e
+
+
+def import_all_config(config_dir: str = 'config') -> dict:
+    """
+    Import all configuration files.
+
+    Args:
+        config_dir (str): The folder with the configuration files.
+
+    Returns:
+        dict: A dictionary containing all configuration data.
+    """
+    paths_config = parse_yaml(os.path.join(config_dir, 'paths.yaml'))
+    yearly_config = parse_yaml(os.path.join(config_dir, 'yearly_config.yaml'))
+    nettskjema_columns = parse_yaml(os.path.join(config_dir, 'nettskjema_columns.yaml'))
+    schedule_columns = parse_yaml(os.path.join(config_dir, 'schedule_columns.yaml'))
+    rooms_config = parse_yaml(os.path.join(config_dir, 'rooms.yaml'))
+
+    return {
+        'paths': paths_config,
+        'yearly': yearly_config,
+        'nettskjema_columns': nettskjema_columns,
+        'schedule_columns': schedule_columns,
+        'rooms': rooms_config
+    }
+
+
+def prepare_schedule(paths: dict, schedule_columns: dict) -> pd.DataFrame:
+    """
+    Read the schedule, expand multi-day workshops and add start/end times and networking event flags.
+
+    Args:
+        paths (dict): The paths configuration.
+        schedule_columns (dict): The column names for the schedule data.
+
+    Returns:
+        pd.DataFrame: The normalized schedule, with one row per workshop day.
+    """
+    df_schedule = parse_csv_to_pandas(paths['input']['schedule']['file_path'],
+                                      paths['input']['schedule']['delimiter'])
+
+    title_column = schedule_columns['title_column']
+    if df_schedule is not None and title_column in df_schedule.columns:
+        df_schedule = df_schedule[
+            df_schedule[title_column].fillna("").astype(str).str.strip().ne("Example")
+        ]
+
+        # Expand multi-day workshops to per-day entries (with titled suffixes, per requirements)
+        df_schedule = expand_multiday_workshops(df_schedule, schedule_columns)
+    # Remove rows with cancelled workshops
+    #df_schedule = df_schedule[df_schedule[schedule_columns['status_column']] != 'cancelled']
+
+    # Assign start/end time columns to the schedule DataFrame
+    df_schedule = add_start_end_time_to_schedule(df_schedule, schedule_columns)
+    standardise_time_of_day_column(df_schedule, schedule_columns)
+    df_schedule = add_start_end_time_to_schedule(df_schedule, schedule_columns)
+    df_schedule = annotate_networking_event(df_schedule, schedule_columns)
+    return df_schedule
@@ -0,0 +1,185 @@
+"""
+Aggregated evaluation responses shared by all the evaluation reports.
+
+`build_cube` reads the evaluation export once: one groupby over workshop x topic x response gives the counts,
+and the comments are collected per workshop and topic. The result is written as a small JSON file that each report
+loads instead of reading and filtering the whole export again. The counts of all workshops together are kept under
+the workshop ID `ALL_WORKSHOPS`.
+"""
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import pandas as pd
+
+from obiwow.data_reader_parser import parse_yaml
+from obiwow.render_cache import hash_content
+
+CUBE_VERSION = 1
+ALL_WORKSHOPS = 'all'
+
+
+@dataclass(frozen=True)
+class Topic:
+    """
+    A topic of the evaluation form: the question column, the column with comments on it (either may be empty)
+    and the kind of answers: 'categories', 'scale' (1 to 5) or 'yes_no'.
+    """
+    name: str
+    question: str = ""
+    comment: str = ""
+    kind: str = "categories"
+
+
+def evaluation_topics_path() -> str:
+    """
+    Return the path to the configuration of the topics of the evaluation form.
+    """
+    project_root = Path(__file__).resolve().parent.parent
+    return os.path.join(project_root, 'config', 'evaluation_topics.yaml')
+
+
+def load_topics(path: Optional[str] = None) -> Dict[str, Topic]:
+    """
+    Read the topics of the evaluation form, see `config/evaluation_topics.yaml`.
+    """
+    topics = parse_yaml(path or evaluation_topics_path())
+    return {name: Topic(name, values.get('question') or "", values.get('comment') or "",
+                        values.get('kind') or "categories")
+            for name, values in topics.items()}
+
+
+def response_label(value) -> str:
+    """
+    Return a response as text; numbers read as floats because of empty answers lose their '.0'.
+    """
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+class EvaluationCube:
+    """
+    Counts of the responses and comments per workshop and topic.
+    """
+
+    def __init__(self, counts: Dict[str, Dict[str, Dict[str, int]]], comments: Dict[str, Dict[str, List[str]]],
+                 n_responses: Dict[str, int], topics: Dict[str, Topic]):
+        self._counts = counts
+        self._comments = comments
+        self._n_responses = n_responses
+        self.topics = topics
+
+    def counts(self, workshop_id: str, topic: str) -> Dict[str, int]:
+        """
+        Return the number of each response to the question of a topic, most frequent first.
+        """
+        return self._counts.get(str(workshop_id), {}).get(topic, {})
+
+    def comments(self, workshop_id: str, topic: str) -> List[str]:
+        """
+        Return the comments on a topic, in the order of the export.
+        """
+        return self._comments.get(str(workshop_id), {}).get(topic, [])
+
+    def n_responses(self, workshop_id: str) -> int:
+        """
+        Return the number of responses for a workshop.
+        """
+        return self._n_responses.get(str(workshop_id), 0)
+
+    def fingerprint(self, workshop_id: str) -> str:
+        """
+        Return a hash of the counts, comments and number of responses of a workshop, which changes
+        when its responses change.
+        """
+        workshop_id = str(workshop_id)
+        topics = {name: [topic.question, topic.comment, topic.kind] for name, topic in self.topics.items()}
+        return hash_content(CUBE_VERSION, topics, self._n_responses.get(workshop_id, 0),
+                            self._counts.get(workshop_id, {}), self._comments.get(workshop_id, {}))
+
+    def workshop_ids(self) -> List[str]:
+        return [workshop_id for workshop_id in self._n_responses if workshop_id != ALL_WORKSHOPS]
+
+    def save(self, path: str) -> None:
+        data = {
+            'version': CUBE_VERSION,
+            'topics': {name: {'question': topic.question, 'comment': topic.comment, 'kind': topic.kind}
+                       for name, topic in self.topics.items()},
+            'n_responses': self._n_responses,
+            'counts': self._counts,
+            'comments': self._comments,
+        }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(data, file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def load_cube(path: str) -> EvaluationCube:
+    """
+    Read a cube written by `EvaluationCube.save`.
+    """
+    with open(path, 'r') as file:
+        data = json.load(file)
+    if data.get('version') != CUBE_VERSION:
+        raise ValueError(f"Unsupported evaluation cube version in '{path}': {data.get('version')}")
+    topics = {name: Topic(name, **values) for name, values in data['topics'].items()}
+    return EvaluationCube(data['counts'], data['comments'], data['n_responses'], topics)
+
+
+def build_cube(responses: pd.DataFrame, workshop_ids: Sequence[Optional[str]],
+               topics: Mapping[str, Topic]) -> EvaluationCube:
+    """
+    Aggregate the evaluation responses per workshop, topic and response.
+
+    Args:
+        responses (pd.DataFrame): The evaluation export, one row per response.
+        workshop_ids (Sequence[Optional[str]]): The workshop ID of each response, None if its title was not matched.
+        topics (Mapping[str, Topic]): The topics of the form, see `load_topics`.
+
+    Returns:
+        EvaluationCube: The counts and comments.
+    """
+    workshop_ids = pd.Series(list(workshop_ids), index=responses.index, dtype=object)
+    question_columns = {topic.question: name for name, topic in topics.items()
+                        if topic.question and topic.question in responses}
+    comment_columns = {topic.comment: name for name, topic in topics.items()
+                       if topic.comment and topic.comment in responses}
+
+    # One long table of (workshop, column, value) for all the questions and comments
+    long = (responses[list(question_columns) + list(comment_columns)]
+            .assign(_workshop_id=workshop_ids)
+            .melt(id_vars='_workshop_id', var_name='column', value_name='value')
+            .dropna(subset=['value']))
+    long['value'] = long['value'].map(response_label)
+    long = long[long['value'] != ""]
+    is_question = long['column'].isin(list(question_columns))
+
+    answers = long[is_question].assign(topic=lambda df: df['column'].map(question_columns))
+    # Responses whose workshop is unknown only count for all workshops
+    sizes = answers.groupby(['_workshop_id', 'topic', 'value'], sort=False, dropna=False).size()
+    all_sizes = sizes.groupby(level=['topic', 'value'], sort=False).sum()
+    counts: Dict[str, Dict[str, Dict[str, int]]] = {}
+    for (workshop_id, topic, value), count in sizes.sort_values(ascending=False, kind='stable').items():
+        if pd.isna(workshop_id):
+            continue
+        counts.setdefault(workshop_id, {}).setdefault(topic, {})[value] = int(count)
+    for (topic, value), count in all_sizes.sort_values(ascending=False, kind='stable').items():
+        counts.setdefault(ALL_WORKSHOPS, {}).setdefault(topic, {})[value] = int(count)
+
+    comments: Dict[str, Dict[str, List[str]]] = {}
+    comment_rows = long[~is_question]
+    for workshop_id, column, value in zip(comment_rows['_workshop_id'], comment_rows['column'],
+                                          comment_rows['value']):
+        topic = comment_columns[column]
+        if not pd.isna(workshop_id):
+            comments.setdefault(workshop_id, {}).setdefault(topic, []).append(value)
+        comments.setdefault(ALL_WORKSHOPS, {}).setdefault(topic, []).append(value)
+
+    n_responses = {str(workshop_id): int(count) for workshop_id, count in workshop_ids.value_counts().items()}
+    n_responses[ALL_WORKSHOPS] = len(responses)
+    return EvaluationCube(counts, comments, n_responses, dict(topics))
@@ -0,0 +1,158 @@
+"""
+Compare the evaluations of all workshops: statistics computed at once for every workshop with NumPy, from the
+counts of the evaluation cube (see obiwow/evaluation_cube.py) rather than from the responses.
+
+For questions on a scale from 1 to 5: the mean, the median and a bootstrap confidence interval of the mean.
+For yes/no questions: the share of 'Yes'. And the response rate against the registrations counted by
+`python -m obiwow stats`. The table is ranked by the mean of one question, and written as CSV and HTML.
+"""
+import html
+import os
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from obiwow.evaluation_cube import EvaluationCube
+
+SCALE = np.arange(1, 6)
+BOOTSTRAP_SAMPLES = 2000
+CONFIDENCE = 0.95
+
+
+def count_matrix(cube: EvaluationCube, workshop_ids: Sequence[str], topic: str,
+                 responses: Sequence[str]) -> np.ndarray:
+    """
+    Return the number of each response to a question, one row per workshop and one column per response.
+    """
+    return np.array([[cube.counts(workshop_id, topic).get(response, 0) for response in responses]
+                     for workshop_id in workshop_ids], dtype=np.int64).reshape(len(workshop_ids), len(responses))
+
+
+def scale_means(counts: np.ndarray) -> np.ndarray:
+    """
+    Return the mean response of each row of counts of the responses 1 to 5, NaN for rows without responses.
+    """
+    n = counts.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(n > 0, counts @ SCALE / n, np.nan)
+
+
+def scale_medians(counts: np.ndarray) -> np.ndarray:
+    """
+    Return the median response of each row of counts of the responses 1 to 5, NaN for rows without responses.
+    For an even number of responses, the median is the mean of the two middle responses.
+    """
+    n = counts.sum(axis=1)
+    cumulative = counts.cumsum(axis=1)
+    # Response at the (1-based) positions of the two middle responses, which are the same for an odd number
+    lower = (cumulative >= ((n + 1) // 2)[:, None]).argmax(axis=1)
+    upper = (cumulative >= (n // 2 + 1)[:, None]).argmax(axis=1)
+    return np.where(n > 0, (SCALE[lower] + SCALE[upper]) / 2, np.nan)
+
+
+def bootstrap_mean_ci(counts: np.ndarray, samples: int = BOOTSTRAP_SAMPLES, confidence: float = CONFIDENCE,
+                      seed: Optional[int] = 0) -> np.ndarray:
+    """
+    Compute a percentile bootstrap confidence interval of the mean response of each row of counts.
+
+    All workshops are resampled at once: each sample draws, for every workshop, as many responses as it has from
+    its own distribution of responses.
+
+    Args:
+        counts (np.ndarray): Counts of the responses 1 to 5, one row per workshop.
+        samples (int): Number of bootstrap samples.
+        confidence (float): Confidence level of the interval.
+        seed (Optional[int]): Seed of the random generator, so the intervals are the same on each run.
+
+    Returns:
+        np.ndarray: The lower and upper bound for each row, NaN for rows without responses.
+    """
+    n = counts.sum(axis=1)
+    intervals = np.full((len(counts), 2), np.nan)
+    answered = n > 0
+    if not answered.any():
+        return intervals
+    rng = np.random.default_rng(seed)
+    probabilities = counts[answered] / n[answered, None]
+    resampled = rng.multinomial(n[answered], probabilities, size=(samples, int(answered.sum())))
+    means = resampled @ SCALE / n[answered]
+    alpha = (1 - confidence) / 2
+    intervals[answered] = np.quantile(means, [alpha, 1 - alpha], axis=0).T
+    return intervals
+
+
+def yes_rates(counts: np.ndarray) -> np.ndarray:
+    """
+    Return the share of 'Yes' of each row of counts of ('No', 'Yes'), NaN for rows without responses.
+    """
+    n = counts.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(n > 0, counts[:, 1] / n, np.nan)
+
+
+def comparison_table(cube: EvaluationCube, titles: Mapping[str, str],
+                     registrations: Optional[Mapping[str, int]] = None, rank_by: str = 'overall',
+                     samples: int = BOOTSTRAP_SAMPLES, seed: Optional[int] = 0) -> pd.DataFrame:
+    """
+    Compute the comparison of the evaluations of the workshops.
+
+    Args:
+        cube (EvaluationCube): The counts of the responses, see `obiwow.evaluation_cube.build_cube`.
+        titles (Mapping[str, str]): The title of each workshop ID, in the order of the table before ranking.
+        registrations (Optional[Mapping[str, int]]): Registrations per workshop ID, for the response rates.
+        rank_by (str): The scale question the workshops are ranked by, highest mean first.
+        samples (int): Number of bootstrap samples for the confidence intervals.
+        seed (Optional[int]): Seed of the random generator.
+
+    Returns:
+        pd.DataFrame: One row per workshop with its rank, responses, response rate and statistics per question.
+    """
+    workshop_ids = list(titles)
+    n_responses = np.array([cube.n_responses(workshop_id) for workshop_id in workshop_ids])
+    registered = np.array([(registrations or {}).get(workshop_id, 0) for workshop_id in workshop_ids])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        response_rates = np.where(registered > 0, n_responses / registered, np.nan)
+    table: Dict[str, object] = {
+        'workshop_id': workshop_ids,
+        'title': [titles[workshop_id] for workshop_id in workshop_ids],
+        'responses': n_responses,
+        'registered': registered,
+        'response_rate': response_rates,
+    }
+    for name, topic in cube.topics.items():
+        if topic.kind == 'scale':
+            counts = count_matrix(cube, workshop_ids, name, [str(score) for score in SCALE])
+            intervals = bootstrap_mean_ci(counts, samples=samples, seed=seed)
+            table[f"{name}_mean"] = scale_means(counts)
+            table[f"{name}_median"] = scale_medians(counts)
+            table[f"{name}_ci_low"] = intervals[:, 0]
+            table[f"{name}_ci_high"] = intervals[:, 1]
+        elif topic.kind == 'yes_no':
+            table[f"{name}_yes_rate"] = yes_rates(count_matrix(cube, workshop_ids, name, ['No', 'Yes']))
+    df = pd.DataFrame(table)
+    if f"{rank_by}_mean" in df:
+        df = df.sort_values(f"{rank_by}_mean", ascending=False, kind='stable', na_position='last')
+        df.insert(0, 'rank', df[f"{rank_by}_mean"].rank(ascending=False, method='min').astype('Int64'))
+    return df.reset_index(drop=True)
+
+
+def write_comparison(df: pd.DataFrame, csv_path: str, html_path: str, title: str = "Evaluation comparison") -> None:
+    """
+    Write the comparison table as CSV and as an HTML page.
+    """
+    Path(csv_path).parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(csv_path, index=False, float_format='%.3f')
+    table = df.to_html(index=False, na_rep='-', float_format=lambda value: f"{value:.2f}", border=0,
+                       classes='comparison')
+    page = (f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>{html.escape(title)}</title>\n"
+            "<style>table.comparison {border-collapse: collapse} "
+            "table.comparison td, table.comparison th {padding: 4px 8px; border-bottom: 1px solid #ccc} "
+            "table.comparison td {text-align: right}</style>\n"
+            f"</head>\n<body>\n<h1>{html.escape(title)}</h1>\n{table}\n</body>\n</html>\n")
+    Path(html_path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{html_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as file:
+        file.write(page)
+    os.replace(tmp_path, html_path)
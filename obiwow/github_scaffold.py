@@ -0,0 +1,186 @@
+"""
+Create the folder and README of each workshop in the GitHub repository of the workshop week
+(replaces generate_github.ipynb).
+
+Folders are `<day of month>-<weekday>/<slug of the title>` under the repository, from the merged submission and
+schedule frames shared with generate_website.py (see `obiwow.artifact_store.load_or_build_frames`). A multi-day
+workshop has one folder, on its first day, with all its dates listed. The README is rendered from
+`template/github_readme_template.md`; files are written in parallel and only when their content changed, so running
+the command again does not touch the READMEs that are already up to date.
+"""
+import argparse
+import calendar
+import os
+import re
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+from mako.template import Template
+
+from obiwow.artifact_store import load_or_build_frames
+from obiwow.data_reader_parser import import_all_config, parse_schedule_date
+from obiwow.tsv_to_html import clean_value
+
+
+@dataclass(frozen=True)
+class WorkshopReadme:
+    """
+    The README of a workshop: its folder, relative to the repository, and its content.
+    """
+    folder: str
+    content: str
+
+
+def readme_template_path() -> str:
+    """
+    Return the path to the Mako template of the README of each workshop.
+    """
+    project_root = Path(__file__).resolve().parent.parent
+    return os.path.join(project_root, 'template', 'github_readme_template.md')
+
+
+def slugify(value: str) -> str:
+    """
+    Folder name of a workshop: lowercase ASCII, spaces and repeated dashes as one dash, without other characters.
+    Taken from https://github.com/django/django/blob/master/django/utils/text.py
+    """
+    value = unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore').decode('ascii')
+    value = re.sub(r'[^\w\s-]', '', value.lower())
+    return re.sub(r'[-\s]+', '-', value).strip('-_')
+
+
+def workshop_readmes(df_merged: pd.DataFrame, nettskjema_columns: dict, schedule_columns: dict,
+                     template_path: Optional[str] = None) -> List[WorkshopReadme]:
+    """
+    Render the README of each workshop.
+
+    Workshops are the rows of the merged frame with a submission, cancelled workshops excluded. The rows of a
+    multi-day workshop (one per day, with the same workshop ID) give one README with all the dates.
+
+    Args:
+        df_merged (pd.DataFrame): The merged submission and schedule frame, one row per workshop day.
+        nettskjema_columns (dict): The column names of the submissions.
+        schedule_columns (dict): The column names of the schedule.
+        template_path (Optional[str]): The README template, `template/github_readme_template.md` if None.
+
+    Returns:
+        List[WorkshopReadme]: The READMEs, in schedule order.
+    """
+    template = Template(filename=template_path or readme_template_path())
+    status = df_merged.get(schedule_columns['status_column'], pd.Series("", index=df_merged.index))
+    df = df_merged[status.astype(str).str.strip() != 'cancelled']
+
+    # Rows of the same workshop, by ID, or by title without the ' - Day N' suffix
+    days: Dict[str, List[pd.Series]] = {}
+    for _, row in df.iterrows():
+        title = clean_value(row.get(nettskjema_columns['title_column']))
+        if not title:
+            continue
+        schedule_title = re.sub(r'\s*-\s*Day [0-9]+$', '', clean_value(row.get(schedule_columns['title_column'])))
+        key = clean_value(row.get(schedule_columns['id_column'])) or schedule_title or title
+        days.setdefault(key, []).append(row)
+
+    readmes = []
+    for rows in days.values():
+        row = rows[0]
+        title = clean_value(row.get(nettskjema_columns['title_column']))
+        sessions = []
+        for day in rows:
+            date = parse_schedule_date(day.get(schedule_columns['date_column']))
+            if date is None:
+                print(f"WARNING: no valid date '{clean_value(day.get(schedule_columns['date_column']))}' "
+                      f"for '{title}'")
+                continue
+            start = clean_value(day.get(schedule_columns['start_time_column']))
+            end = clean_value(day.get(schedule_columns['end_time_column']))
+            time_range = f"{start}-{end}" if start and end else start or end
+            sessions.append((date, time_range))
+        if not sessions:
+            continue
+        sessions.sort(key=lambda session: session[0])
+        first_day = sessions[0][0]
+        instructors = [clean_value(row.get(schedule_columns['main_instructor_column'])),
+                       clean_value(row.get(schedule_columns['helper_instructor_column']))]
+        content = template.render(
+            title=title,
+            description=clean_value(row.get(nettskjema_columns['description_column'])),
+            dates=[f"{date.strftime('%A %d %B %Y')}, {time_range}" if time_range else date.strftime('%A %d %B %Y')
+                   for date, time_range in sessions],
+            instructors=", ".join(instructor for instructor in instructors if instructor))
+        folder = "/".join([f"{first_day.strftime('%d')}-{calendar.day_name[first_day.weekday()]}", slugify(title)])
+        readmes.append(WorkshopReadme(folder, content))
+    return readmes
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    if path.is_file() and path.read_text() == content:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(content)
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_readmes(readmes: List[WorkshopReadme], repo_dir: str, workers: int = 8) -> int:
+    """
+    Write the README of each workshop in the repository, only when it changed.
+
+    Args:
+        readmes (List[WorkshopReadme]): The READMEs, see `workshop_readmes`.
+        repo_dir (str): The folder of the GitHub repository.
+        workers (int): Number of threads writing the files.
+
+    Returns:
+        int: The number of READMEs written.
+    """
+    folders = [readme.folder for readme in readmes]
+    for folder in {folder for folder in folders if folders.count(folder) > 1}:
+        print(f"WARNING: several workshops share the folder '{folder}', only the last README is kept")
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return sum(pool.map(lambda readme: _write_if_changed(Path(repo_dir) / readme.folder / 'README.md',
+                                                             readme.content), readmes))
+
+
+def repo_path(config: dict, year: Optional[str] = None, repo: Optional[str] = None) -> str:
+    """
+    Return the folder of the GitHub repository: `repo`, or `github.dir_path` in paths.yaml with `{year}` replaced
+    by `year` or by `year` in yearly_config.yaml.
+    """
+    if repo:
+        return repo
+    year = year or str(config['yearly'].get('year', ''))
+    dir_path = config['paths'].get('github', {}).get('dir_path', '../OBiWoW-{year}')
+    if '{year}' in dir_path and not year.isdigit():
+        raise ValueError("The year of the workshop week is needed: set 'year' in yearly_config.yaml or use --year")
+    return dir_path.format(year=year)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog='obiwow github',
+        description='Create the folder and README of each workshop in the GitHub repository of the workshop week')
+    parser.add_argument('--repo', help="Folder of the repository (default: 'github.dir_path' in paths.yaml)")
+    parser.add_argument('--year', help="Year of the workshop week (default: 'year' in yearly_config.yaml)")
+    parser.add_argument('--config', default='config', help='Folder with the configuration files (default: config)')
+    parser.add_argument('-w', '--workers', type=int, default=8, help='Number of files written at the same time')
+    args = parser.parse_args(argv)
+
+    config = import_all_config(args.config)
+    try:
+        repo_dir = repo_path(config, args.year, args.repo)
+    except ValueError as e:
+        parser.error(str(e))
+    # Loads the frames stored by generate_website.py when the exports did not change
+    _, df_merged = load_or_build_frames(config)
+    readmes = workshop_readmes(df_merged, config['nettskjema_columns'], config['schedule_columns'])
+    written = write_readmes(readmes, repo_dir, args.workers)
+    print(f"GitHub: {len(readmes)} workshops in '{repo_dir}', {written} READMEs written")
+
+
+if __name__ == '__main__':
+    main()
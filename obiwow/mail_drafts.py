@@ -0,0 +1,225 @@
+"""
+Create or send the per-workshop mails of draft_email.py, with the participants as BCC recipients.
+
+Backends:
+    mbox / maildir: write all drafts to one mailbox in one pass, to be opened with any mail client
+    smtp: send through one SMTP connection reused for all mails, with an optional rate limit
+    apple: create drafts in Apple Mail with a single osascript invocation (macOS only)
+
+`deliver` returns the number of mails delivered; if it raises, `delivered` tells how many went out before the error.
+"""
+import mailbox
+import smtplib
+import subprocess
+import time
+from dataclasses import dataclass
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from typing import Iterable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Draft:
+    """
+    A mail to the participants of a workshop, who are BCC recipients.
+    """
+    subject: str
+    sender: str
+    body: str
+    bcc: Tuple[str, ...]
+
+
+def build_message(draft: Draft, bcc: Optional[Iterable[str]] = None) -> EmailMessage:
+    """
+    Build the mail of a draft, addressed to the sender with the participants in BCC.
+
+    Args:
+        draft (Draft): The draft.
+        bcc (Optional[Iterable[str]]): The BCC recipients. Those of the draft if None.
+
+    Returns:
+        EmailMessage: The mail.
+    """
+    message = EmailMessage()
+    message['From'] = draft.sender
+    message['To'] = draft.sender
+    message['Subject'] = draft.subject
+    message['Date'] = formatdate(localtime=True)
+    message['Message-ID'] = make_msgid(domain=draft.sender.split('@')[-1])
+    bcc = list(draft.bcc if bcc is None else bcc)
+    if bcc:
+        message['Bcc'] = ', '.join(bcc)
+    message.set_content(draft.body)
+    return message
+
+
+class MboxBackend:
+    """
+    Write the drafts to an mbox file, appending to it if it exists.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.delivered = 0
+
+    def deliver(self, drafts: Iterable[Draft]) -> int:
+        self.delivered = 0
+        box = mailbox.mbox(self.path)
+        box.lock()
+        try:
+            count = 0
+            for draft in drafts:
+                box.add(mailbox.mboxMessage(build_message(draft)))
+                count += 1
+            box.flush()
+            # The drafts are only in the file once it is flushed
+            self.delivered = count
+        finally:
+            box.unlock()
+            box.close()
+        return count
+
+
+class MaildirBackend:
+    """
+    Write the drafts to a Maildir folder, flagged as drafts.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.delivered = 0
+
+    def deliver(self, drafts: Iterable[Draft]) -> int:
+        self.delivered = 0
+        box = mailbox.Maildir(self.path, create=True)
+        for draft in drafts:
+            message = mailbox.MaildirMessage(build_message(draft))
+            message.set_subdir('cur')
+            message.set_flags('D')
+            box.add(message)
+            self.delivered += 1
+        return self.delivered
+
+
+class SmtpBackend:
+    """
+    Send the drafts through one SMTP connection, reconnecting if the server closes it.
+
+    Args:
+        host (str): The SMTP server.
+        port (int): The port of the SMTP server.
+        username (Optional[str]): User name to log in with, no login if None.
+        password (Optional[str]): Password to log in with.
+        starttls (bool): Switch to TLS after connecting.
+        max_per_second (Optional[float]): Maximum number of messages sent per second, no limit if None.
+        max_recipients (Optional[int]): Maximum number of BCC recipients per message; larger lists are sent
+            as several messages.
+        timeout (float): Timeout of the connection in seconds.
+    """
+
+    def __init__(self, host: str, port: int = 25, username: Optional[str] = None, password: Optional[str] = None,
+                 starttls: bool = False, max_per_second: Optional[float] = None, max_recipients: Optional[int] = None,
+                 timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.min_interval = 1 / max_per_second if max_per_second else 0
+        self.max_recipients = max_recipients
+        self.timeout = timeout
+        self._connection: Optional[smtplib.SMTP] = None
+        self._last_send = 0.0
+        self.connections = 0
+        self.delivered = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._connection is None:
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                connection.starttls()
+            if self.username:
+                connection.login(self.username, self.password or '')
+            self._connection = connection
+            self.connections += 1
+        return self._connection
+
+    def _send(self, message: EmailMessage, sender: str, recipients: List[str]) -> None:
+        wait = self._last_send + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            self._connect().send_message(message, from_addr=sender, to_addrs=recipients)
+        except smtplib.SMTPServerDisconnected:
+            # The server closed an idle connection: reconnect once
+            self._connection = None
+            self._connect().send_message(message, from_addr=sender, to_addrs=recipients)
+        self._last_send = time.monotonic()
+
+    def deliver(self, drafts: Iterable[Draft]) -> int:
+        self.delivered = 0
+        try:
+            for draft in drafts:
+                recipients = list(draft.bcc)
+                if not recipients:
+                    print(f"WARNING: No recipients for '{draft.subject}', mail not sent")
+                    continue
+                size = self.max_recipients or len(recipients)
+                for start in range(0, len(recipients), size):
+                    # BCC recipients are given to the server, not in the headers
+                    message = build_message(draft, bcc=[])
+                    self._send(message, draft.sender, recipients[start:start + size])
+                    self.delivered += 1
+        finally:
+            self.close()
+        return self.delivered
+
+    def close(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.quit()
+            except smtplib.SMTPException:
+                pass
+            self._connection = None
+
+
+def applescript_escape(s: str) -> str:
+    #AppleScript-formatting
+    s = s.replace("\\", "\\\\")
+    s = s.replace('"', '\\"')
+    return s
+
+
+class AppleMailBackend:
+    """
+    Create the drafts in Apple Mail, all in one AppleScript run by a single osascript process.
+    """
+
+    def __init__(self):
+        self.delivered = 0
+
+    def script(self, drafts: Iterable[Draft]) -> str:
+        """
+        Return the AppleScript creating all drafts.
+        """
+        blocks = []
+        for draft in drafts:
+            bcc_lines = [f'        make new bcc recipient at end of bcc recipients of newMessage '
+                         f'with properties {{address:"{applescript_escape(email)}"}}' for email in draft.bcc]
+            bcc_block = "\n".join(bcc_lines) if bcc_lines else "        -- no recipients"
+            blocks.append(f'''    set newMessage to make new outgoing message with properties {{subject:"{applescript_escape(draft.subject)}", content:"{applescript_escape(draft.body)}", sender:"{applescript_escape(draft.sender)}"}}
+    tell newMessage
+{bcc_block}
+        set visible to true
+    end tell
+    save newMessage''')
+        return 'tell application "Mail"\n' + "\n".join(blocks) + '\nend tell\n'
+
+    def deliver(self, drafts: Iterable[Draft]) -> int:
+        self.delivered = 0
+        drafts = list(drafts)
+        if drafts:
+            # The script is read from stdin: as an argument, a large batch could exceed the command line limit
+            subprocess.run(["osascript", "-"], input=self.script(drafts), text=True, check=True)
+        self.delivered = len(drafts)
+        return self.delivered
@@ -0,0 +1,176 @@
+"""
+Render the confirmation mails of registration_mail.py from a Mako template and write them as they are rendered.
+
+The parts of the mail that depend on a workshop (link, timeslot, day, calendar link) are computed once per
+workshop and reused for every participant. Mails are written one at a time, to `mail.tsv` or to one `.eml`
+file per participant, so memory does not grow with the number of participants.
+"""
+import os
+import re
+from datetime import datetime
+from email.message import EmailMessage
+from email.policy import SMTP
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+import pandas as pd
+from mako.template import Template
+
+from obiwow.allocation import ACCEPTED, WAITLIST
+from obiwow.schedule_loader import Workshop
+
+CONTACT_EMAIL = "oslo-bioinfo-workshops@ifi.uio.no"
+
+
+def mail_template_path() -> str:
+    """
+    Return the path to the Mako template of the confirmation mail.
+    """
+    project_root = Path(__file__).resolve().parent.parent
+    return os.path.join(project_root, 'template', 'confirmation_mail_template.html')
+
+
+def format_days(dates: Tuple[str, ...]) -> str:
+    """
+    Format the dates of a workshop for a mail, e.g. 'Monday 10 November' or 'Wednesday 12 November and
+    Thursday 13 November'. Dates that cannot be parsed are kept as they are.
+    """
+    days = []
+    for date in dates:
+        try:
+            days.append(datetime.strptime(date, '%d.%m.%y').strftime("%A %d %B"))
+        except ValueError:
+            days.append(date)
+    return " and ".join(days)
+
+
+def workshop_fragments(schedule: Mapping[str, Workshop], website_link: str,
+                       ics_folder: str) -> Dict[str, Dict[str, str]]:
+    """
+    Compute the values shown for each workshop in the mails.
+
+    Args:
+        schedule (Mapping[str, Workshop]): The schedule, see `obiwow.schedule_loader.load_schedule`.
+        website_link (str): The link to the workshop website; workshops are anchors on that page.
+        ics_folder (str): The link to the folder with the calendar files of the workshops.
+
+    Returns:
+        Dict[str, Dict[str, str]]: Per workshop ID, its title, url, timeslot, day and ics_url.
+    """
+    return {
+        workshop_id: {
+            'title': workshop.normalized_title,
+            'url': f"{website_link}#{workshop_id}",
+            'timeslot': workshop.timeslots[0] if workshop.timeslots else "",
+            'day': format_days(workshop.dates),
+            'ics_url': f"{ics_folder}/{workshop_id}.ics",
+        }
+        for workshop_id, workshop in schedule.items()
+    }
+
+
+class ConfirmationMailRenderer:
+    """
+    Render the confirmation mail of a participant, with the workshops they are accepted to
+    and the ones they are on the waiting list for.
+    """
+
+    def __init__(self, schedule: Mapping[str, Workshop], course_name: str, website_link: str, ics_folder: str,
+                 template_path: Optional[str] = None, contact_email: str = CONTACT_EMAIL):
+        self.fragments = workshop_fragments(schedule, website_link, ics_folder)
+        self.template = Template(filename=template_path or mail_template_path())
+        self.context = {'course_name': course_name, 'website_link': website_link, 'contact_email': contact_email}
+
+    def render(self, name: str, accepted: List[str], waiting: List[str]) -> str:
+        """
+        Render a mail as HTML on a single line, as needed for mail.tsv.
+
+        Args:
+            name (str): The name of the participant.
+            accepted (List[str]): IDs of the workshops the participant is accepted to.
+            waiting (List[str]): IDs of the workshops the participant is on the waiting list for.
+
+        Returns:
+            str: The HTML body of the mail.
+        """
+        html = self.template.render(name=name, accepted=[self.fragments[workshop_id] for workshop_id in accepted],
+                                    waiting=[self.fragments[workshop_id] for workshop_id in waiting],
+                                    **self.context)
+        return " ".join(line.strip() for line in html.splitlines() if line.strip())
+
+
+def iter_participants(allocation: pd.DataFrame) -> Iterator[Tuple[str, str, List[str], List[str]]]:
+    """
+    Group the allocation by participant, in order of their first registration.
+
+    Args:
+        allocation (pd.DataFrame): The result of `obiwow.allocation.allocate`, with `email` and `name` columns.
+
+    Yields:
+        Tuple[str, str, List[str], List[str]]: Email, name, accepted and waiting workshop IDs of each participant.
+    """
+    participants: Dict[str, Tuple[str, List[str], List[str]]] = {}
+    for email, name, workshop_id, status in zip(allocation['email'], allocation['name'],
+                                                allocation['workshop_id'], allocation['status']):
+        name, accepted, waiting = participants.setdefault(email, (name, [], []))
+        if status == ACCEPTED:
+            accepted.append(workshop_id)
+        elif status == WAITLIST:
+            waiting.append(workshop_id)
+    for email, (name, accepted, waiting) in participants.items():
+        yield email, name, accepted, waiting
+
+
+class TsvMailWriter:
+    """
+    Write mails to a tab separated file with the email, name and HTML body of each participant,
+    as used by the Google Sheet sending the mails.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+
+    def __enter__(self) -> 'TsvMailWriter':
+        self._file = open(self.path, 'w')
+        return self
+
+    def write(self, email: str, name: str, html: str, attachments: Optional[List[Tuple[str, str]]] = None) -> None:
+        self._file.write("\t".join([email, name, html]) + "\n")
+        self.count += 1
+
+    def __exit__(self, *exc) -> None:
+        self._file.close()
+
+
+class EmlMailWriter:
+    """
+    Write each mail to its own `.eml` file, to be opened or sent with any mail client.
+    Calendar files can be attached to the mails.
+    """
+
+    def __init__(self, folder: str, subject: str, sender: str = CONTACT_EMAIL):
+        self.folder = Path(folder)
+        self.subject = subject
+        self.sender = sender
+        self.count = 0
+
+    def __enter__(self) -> 'EmlMailWriter':
+        self.folder.mkdir(parents=True, exist_ok=True)
+        return self
+
+    def write(self, email: str, name: str, html: str, attachments: Optional[List[Tuple[str, str]]] = None) -> None:
+        message = EmailMessage(policy=SMTP)
+        message['From'] = self.sender
+        message['To'] = email
+        message['Subject'] = self.subject
+        message.set_content(html, subtype='html')
+        for file_name, content in attachments or []:
+            message.add_attachment(content, subtype='calendar', filename=file_name)
+        file_name = re.sub(r'[^\w.@-]', '_', email) + '.eml'
+        with open(self.folder / file_name, 'wb') as file:
+            file.write(message.as_bytes())
+        self.count += 1
+
+    def __exit__(self, *exc) -> None:
+        pass
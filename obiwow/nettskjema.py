@@ -0,0 +1,308 @@
+"""
+Client for the nettskjema API, with a local copy of the submissions of each form.
+
+Requests go through a small pool of kept-alive HTTP connections and run in threads, so several forms
+(proposals, registrations, evaluations) are fetched at the same time. Submissions are fetched page by page;
+failed requests are retried with exponential backoff. The highest submission ID fetched for each form is kept,
+so later syncs only fetch the new submissions. Only uses the standard library so that `python -m obiwow stats`
+starts quickly.
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import queue
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+API_URL = 'https://nettskjema.no/api/v2'
+TOKEN_VARIABLE = 'NETTSKJEMA_API_TOKEN'
+DEFAULT_FORMS = {'registrations': '375340'}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+HIGH_WATER_FILE = 'high_water.json'
+
+
+class NettskjemaError(Exception):
+    """
+    A request to the nettskjema API failed.
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class NettskjemaClient:
+    """
+    Asynchronous client for the nettskjema API.
+
+    Args:
+        token (str): The API token.
+        base_url (str): The URL of the API.
+        page_size (int): Number of submissions asked for per request.
+        max_connections (int): Maximum number of requests at the same time, each on its own connection.
+        retries (int): Number of times a failed request is retried.
+        backoff (float): Seconds to wait before the first retry, doubled at each retry.
+        timeout (float): Timeout of a request in seconds.
+    """
+
+    def __init__(self, token: str, base_url: str = API_URL, page_size: int = 1000, max_connections: int = 4,
+                 retries: int = 3, backoff: float = 0.5, timeout: float = 30):
+        url = urlsplit(base_url)
+        self.scheme = url.scheme
+        self.host = url.netloc
+        self.base_path = url.path.rstrip('/')
+        self.token = token
+        self.page_size = page_size
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._connections: queue.LifoQueue = queue.LifoQueue()
+        self.requests = 0
+        self.connections = 0
+
+    def _connection(self) -> http.client.HTTPConnection:
+        try:
+            return self._connections.get_nowait()
+        except queue.Empty:
+            self.connections += 1
+            if self.scheme == 'https':
+                return http.client.HTTPSConnection(self.host, timeout=self.timeout)
+            return http.client.HTTPConnection(self.host, timeout=self.timeout)
+
+    def _get(self, path: str, params: Dict[str, object]) -> Tuple[int, Dict[str, str], bytes]:
+        # Blocking request on a connection of the pool, which is given back if the server keeps it open
+        connection = self._connection()
+        url = f"{self.base_path}{path}" + (f"?{urlencode(params)}" if params else "")
+        try:
+            connection.request('GET', url, headers={'Authorization': f"Bearer {self.token}",
+                                                    'Accept': 'application/json'})
+            response = connection.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            raise
+        self.requests += 1
+        if response.will_close:
+            connection.close()
+        else:
+            self._connections.put(connection)
+        return response.status, dict(response.getheaders()), body
+
+    async def get_json(self, path: str, params: Optional[Dict[str, object]] = None):
+        """
+        Get a JSON document from the API, retrying on connection errors and on 429 and 5xx responses.
+
+        Args:
+            path (str): The path after the API URL, e.g. '/forms/375340/submissions'.
+            params (Optional[Dict[str, object]]): The query parameters.
+
+        Returns:
+            The decoded JSON document.
+
+        Raises:
+            NettskjemaError: If the request still fails after the retries, or the response is another error.
+        """
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * 2 ** attempt
+            try:
+                status, headers, body = await asyncio.to_thread(self._get, path, params or {})
+            except (OSError, http.client.HTTPException) as e:
+                error = NettskjemaError(f"Request to {path} failed: {e}")
+            else:
+                if status == 200:
+                    return json.loads(body)
+                error = NettskjemaError(f"Request to {path} returned {status}: {body[:200].decode(errors='replace')}",
+                                        status)
+                if status not in RETRY_STATUSES:
+                    raise error
+                retry_after = headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+            if attempt < self.retries:
+                await asyncio.sleep(delay)
+        raise error
+
+    async def submissions(self, form_id: str, after: int = 0) -> List[dict]:
+        """
+        Fetch the submissions of a form with an ID higher than `after`, page by page.
+
+        Pages start after the highest submission ID seen so far. Submissions already seen are skipped,
+        so a server returning all submissions at once costs only one more request.
+
+        Args:
+            form_id (str): The ID of the form.
+            after (int): The highest submission ID already fetched.
+
+        Returns:
+            List[dict]: The new submissions, by increasing submission ID.
+        """
+        new_submissions = []
+        last_id = after
+        while True:
+            page = await self.get_json(f"/forms/{form_id}/submissions",
+                                       {'fromSubmissionId': last_id + 1, 'limit': self.page_size})
+            page = sorted((submission for submission in page if submission['submissionId'] > last_id),
+                          key=lambda submission: submission['submissionId'])
+            if not page:
+                break
+            new_submissions.extend(page)
+            last_id = page[-1]['submissionId']
+            if len(page) < self.page_size:
+                break
+        return new_submissions
+
+    def close(self) -> None:
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+
+class SubmissionStore:
+    """
+    Local copy of the submissions of each form: one JSON line per submission in `<name>.jsonl`,
+    and the highest submission ID of each form in `high_water.json`.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.high_water_path = self.directory / HIGH_WATER_FILE
+        self.high_water: Dict[str, Dict[str, object]] = {}
+        if self.high_water_path.is_file():
+            with open(self.high_water_path, 'r') as file:
+                self.high_water = json.load(file)
+
+    def last_id(self, name: str, form_id: str) -> int:
+        """
+        Return the highest submission ID stored for a form, 0 if none or if the form ID changed.
+        """
+        entry = self.high_water.get(name, {})
+        return int(entry.get('last_submission_id', 0)) if str(entry.get('form_id')) == str(form_id) else 0
+
+    def add(self, name: str, form_id: str, submissions: List[dict]) -> None:
+        """
+        Append new submissions of a form and move its high-water mark.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        reset = self.last_id(name, form_id) == 0
+        with open(self.directory / f"{name}.jsonl", 'w' if reset else 'a') as file:
+            for submission in submissions:
+                file.write(json.dumps(submission) + "\n")
+        last_id = submissions[-1]['submissionId'] if submissions else self.last_id(name, form_id)
+        self.high_water[name] = {'form_id': str(form_id), 'last_submission_id': last_id,
+                                 'synced_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        tmp_path = self.high_water_path.with_name(f"{HIGH_WATER_FILE}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as file:
+            json.dump(self.high_water, file, indent=4)
+        os.replace(tmp_path, self.high_water_path)
+
+    def load(self, name: str) -> List[dict]:
+        """
+        Return all stored submissions of a form.
+        """
+        path = self.directory / f"{name}.jsonl"
+        if not path.is_file():
+            return []
+        with open(path, 'r') as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+
+async def sync_forms_async(client: NettskjemaClient, forms: Dict[str, str], store: SubmissionStore,
+                           full: bool = False) -> Dict[str, int]:
+    """
+    Fetch the new submissions of several forms at the same time and add them to the store.
+
+    Args:
+        client (NettskjemaClient): The client.
+        forms (Dict[str, str]): Form ID per form name, e.g. {'registrations': '375340'}.
+        store (SubmissionStore): The local copy of the submissions.
+        full (bool): Fetch all submissions again.
+
+    Returns:
+        Dict[str, int]: Number of new submissions per form name.
+    """
+    semaphore = asyncio.Semaphore(client.max_connections)
+
+    async def fetch(form_id: str, after: int) -> List[dict]:
+        async with semaphore:
+            return await client.submissions(form_id, after)
+
+    marks = {name: 0 if full else store.last_id(name, form_id) for name, form_id in forms.items()}
+    if full:
+        store.high_water = {}
+    results = await asyncio.gather(*(fetch(form_id, marks[name]) for name, form_id in forms.items()))
+    for (name, form_id), submissions in zip(forms.items(), results):
+        store.add(name, form_id, submissions)
+    return {name: len(submissions) for name, submissions in zip(forms, results)}
+
+
+def sync_forms(token: str, forms: Dict[str, str], store_dir: str, base_url: str = API_URL,
+               full: bool = False, **client_options) -> Dict[str, int]:
+    """
+    Fetch the new submissions of several forms into `store_dir`, see `sync_forms_async`.
+    """
+    client = NettskjemaClient(token, base_url, **client_options)
+    try:
+        return asyncio.run(sync_forms_async(client, forms, SubmissionStore(store_dir), full))
+    finally:
+        client.close()
+
+
+def api_token(token: Optional[str] = None) -> str:
+    """
+    Return the API token given, or the one in the NETTSKJEMA_API_TOKEN environment variable.
+
+    Raises:
+        NettskjemaError: If there is no token.
+    """
+    token = token or os.environ.get(TOKEN_VARIABLE)
+    if not token:
+        raise NettskjemaError(f"No nettskjema API token: set {TOKEN_VARIABLE} or use --token")
+    return token
+
+
+def parse_forms(values: Optional[List[str]]) -> Dict[str, str]:
+    """
+    Parse NAME=FORM_ID arguments, DEFAULT_FORMS if there are none.
+    """
+    if not values:
+        return dict(DEFAULT_FORMS)
+    forms = {}
+    for value in values:
+        name, _, form_id = value.partition('=')
+        if not name or not form_id:
+            raise argparse.ArgumentTypeError(f"Expected NAME=FORM_ID, got '{value}'")
+        forms[name] = form_id
+    return forms
+
+
+def add_client_arguments(parser: argparse.ArgumentParser, full: bool = True) -> None:
+    """
+    Add the options of the nettskjema client to a parser, with `--full` unless the parser has its own.
+    """
+    parser.add_argument('--form', action='append', metavar='NAME=FORM_ID',
+                        help=f"Form to fetch, can be repeated (default: "
+                             f"{' '.join(f'{k}={v}' for k, v in DEFAULT_FORMS.items())})")
+    parser.add_argument('--token', help=f"API token (default: the {TOKEN_VARIABLE} environment variable)")
+    parser.add_argument('--store', default='outputs/nettskjema',
+                        help='Folder with the local copy of the submissions (default: outputs/nettskjema)')
+    if full:
+        parser.add_argument('--full', action='store_true', help='Fetch all submissions again')
+    parser.add_argument('--base-url', default=API_URL, help=f"URL of the API (default: {API_URL})")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='obiwow sync', description='Fetch the new submissions of nettskjema forms')
+    add_client_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        counts = sync_forms(api_token(args.token), parse_forms(args.form), args.store, args.base_url, args.full)
+    except (NettskjemaError, argparse.ArgumentTypeError) as e:
+        print(f"Error in nettskjema sync: {e}")
+        return
+    for name, count in counts.items():
+        print(f"{name}:\t{count} new submissions")
@@ -0,0 +1,145 @@
+"""
+One calendar file per participant with all the sessions of the workshops they are accepted to.
+
+The events of each workshop are rendered once; a participant's calendar is the concatenation of the events of
+their workshops. Participants registered for the same workshops share the same file, named after the hash of
+its content, so each distinct calendar is rendered and written only once.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from obiwow.allocation import workshop_sessions
+from obiwow.render_cache import hash_content
+from obiwow.schedule_loader import Workshop
+
+# DTSTAMP is required in every event (RFC 5545); fixed, so the same workshops give the same file
+DTSTAMP = '20250101T000000Z'
+
+
+def invite_template_path() -> str:
+    """
+    Return the path to the calendar template of the workshops, whose header (time zone) is reused.
+    """
+    project_root = Path(__file__).resolve().parent.parent
+    return os.path.join(project_root, 'template', 'invite.ics')
+
+
+def calendar_header(template_path: Optional[str] = None) -> str:
+    """
+    Return the start of a calendar, up to the first event, with the Europe/Oslo time zone of `invite.ics`.
+    """
+    with open(template_path or invite_template_path(), 'r') as file:
+        return file.read().split('BEGIN:VEVENT')[0]
+
+
+def _escape(text: str) -> str:
+    return str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _fold(line: str) -> str:
+    # Lines longer than 75 characters continue on the next line after a space (RFC 5545)
+    parts = [line[:75]] + [line[i:i + 74] for i in range(75, len(line), 74)]
+    return '\n '.join(parts)
+
+
+def workshop_events(workshop: Workshop, website_link: str) -> str:
+    """
+    Render the events of a workshop, one per session.
+
+    Args:
+        workshop (Workshop): The workshop.
+        website_link (str): The link to the workshop website; workshops are anchors on that page.
+
+    Returns:
+        str: The VEVENT blocks. Empty if the sessions cannot be parsed.
+    """
+    events = []
+    for i, (start, end) in enumerate(workshop_sessions(workshop)):
+        room = workshop.rooms[i] if i < len(workshop.rooms) else workshop.rooms[0] if workshop.rooms else ""
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:obiwow-{workshop.id}-{start.strftime("%Y%m%d")}',
+            f'DTSTAMP:{DTSTAMP}',
+            f'DTSTART;TZID=Europe/Oslo:{start.strftime("%Y%m%dT%H%M%S")}',
+            f'DTEND;TZID=Europe/Oslo:{end.strftime("%Y%m%dT%H%M%S")}',
+            f'SUMMARY:{_escape(workshop.title)}',
+            f'DESCRIPTION:Description of the workshop: {website_link}#{workshop.id}',
+            f'LOCATION:{_escape(room)}',
+            'END:VEVENT',
+        ]
+        events.append('\n'.join(_fold(line) for line in lines) + '\n')
+    return ''.join(events)
+
+
+class ParticipantCalendars:
+    """
+    Render the calendar of a participant from the pre-rendered events of each workshop.
+    """
+
+    def __init__(self, schedule: Mapping[str, Workshop], website_link: str, template_path: Optional[str] = None):
+        self.header = calendar_header(template_path)
+        self.events = {workshop_id: workshop_events(workshop, website_link)
+                       for workshop_id, workshop in schedule.items()}
+        self.order = {workshop_id: i for i, workshop_id in enumerate(schedule)}
+
+    def key(self, workshop_ids: Iterable[str]) -> Tuple[str, ...]:
+        """
+        Return the workshops in schedule order, without duplicates. Participants with the same key get the same
+        calendar.
+        """
+        return tuple(sorted(set(workshop_ids), key=self.order.__getitem__))
+
+    def render(self, workshop_ids: Iterable[str]) -> str:
+        """
+        Render a calendar with the sessions of the workshops, in the order given.
+        """
+        return self.header + ''.join(self.events[workshop_id] for workshop_id in workshop_ids) + 'END:VCALENDAR\n'
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    if path.is_file() and path.read_text() == content:
+        return False
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(content)
+    os.replace(tmp_path, path)
+    return True
+
+
+def write_participant_calendars(participants: Iterable[Tuple[str, List[str]]], outdir: str,
+                                calendars: ParticipantCalendars, workers: int = 4) -> Dict[str, str]:
+    """
+    Write the calendar of each participant. Participants with the same workshops share one file;
+    files that did not change are not written again and calendars nobody has anymore are removed.
+
+    Args:
+        participants (Iterable[Tuple[str, List[str]]]): Email and accepted workshop IDs of each participant.
+        outdir (str): The output directory.
+        calendars (ParticipantCalendars): The calendar renderer.
+        workers (int): Number of threads writing the files.
+
+    Returns:
+        Dict[str, str]: The calendar file name of each participant with at least one workshop.
+    """
+    Path(outdir).mkdir(parents=True, exist_ok=True)
+    file_names: Dict[str, str] = {}
+    contents: Dict[Tuple[str, ...], Tuple[str, str]] = {}
+    for email, workshop_ids in participants:
+        if not workshop_ids:
+            continue
+        key = calendars.key(workshop_ids)
+        if key not in contents:
+            content = calendars.render(key)
+            contents[key] = (f"{hash_content(content)[:16]}.ics", content)
+        file_names[email] = contents[key][0]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        written = sum(pool.map(lambda item: _write_if_changed(Path(outdir) / item[0], item[1]), contents.values()))
+    # Calendars of earlier runs that nobody has anymore
+    current = {file_name for file_name, _ in contents.values()}
+    for path in Path(outdir).glob('*.ics'):
+        if path.name not in current:
+            path.unlink()
+    print(f"Calendars: {len(file_names)} participants, {len(contents)} distinct calendars, {written} written")
+    return file_names
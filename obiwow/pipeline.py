@@ -0,0 +1,127 @@
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    A named step of the pipeline.
+
+    The function is called with one keyword argument per input. With a single output, its return value is that
+    output; with several outputs, it returns a tuple in the same order.
+    """
+    name: str
+    func: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+
+
+def _run_stage(func: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+    return func(**kwargs)
+
+
+def resolve_stages(stages: List[Stage], targets: Optional[Iterable[str]] = None,
+                   available: Iterable[str] = ()) -> List[Stage]:
+    """
+    Select the stages needed to run the targets, in declaration order.
+
+    Stages whose outputs are all available already (e.g. loaded from a store) are not needed.
+
+    Args:
+        stages (List[Stage]): All stages of the pipeline.
+        targets (Optional[Iterable[str]]): Names of the stages to run. All stages if None.
+        available (Iterable[str]): Names of values that are given to the pipeline and need no stage.
+
+    Returns:
+        List[Stage]: The targets and all stages they depend on.
+
+    Raises:
+        ValueError: If a target is unknown, a value is produced by several stages, or an input has no producer.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    available = set(available)
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers:
+                raise ValueError(f"Value '{output}' is produced by more than one stage")
+            producers[output] = stage.name
+
+    if targets is None:
+        targets = list(by_name)
+    needed = set()
+    to_visit = list(targets)
+    while to_visit:
+        name = to_visit.pop()
+        if name not in by_name:
+            raise ValueError(f"Unknown stage '{name}'. Available stages: {', '.join(by_name)}")
+        if name in needed:
+            continue
+        if by_name[name].outputs and all(output in available for output in by_name[name].outputs):
+            continue
+        needed.add(name)
+        for value in by_name[name].inputs:
+            if value in available:
+                continue
+            if value not in producers:
+                raise ValueError(f"No stage produces '{value}', needed by stage '{name}'")
+            to_visit.append(producers[value])
+
+    return [stage for stage in stages if stage.name in needed]
+
+
+def run_pipeline(stages: List[Stage], values: Optional[Dict[str, Any]] = None,
+                 targets: Optional[Iterable[str]] = None, executor: str = 'thread',
+                 max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run the stages needed for the targets, running independent stages concurrently.
+
+    Each stage runs at most once per call; its outputs are kept and passed to every stage that needs them.
+
+    Args:
+        stages (List[Stage]): All stages of the pipeline.
+        values (Optional[Dict[str, Any]]): Values given to the pipeline, e.g. configuration.
+        targets (Optional[Iterable[str]]): Names of the stages to run, with their dependencies. All stages if None.
+        executor (str): 'thread', 'process' or 'serial'. With 'process', stage functions, inputs and outputs
+            must be picklable.
+        max_workers (Optional[int]): Maximum number of stages running at the same time.
+
+    Returns:
+        Dict[str, Any]: The given values and the outputs of all stages that ran.
+    """
+    values = dict(values or {})
+    pending = resolve_stages(stages, targets, values)
+
+    if executor == 'serial':
+        for stage in pending:
+            _store_outputs(stage, stage.func(**{name: values[name] for name in stage.inputs}), values)
+        return values
+
+    if executor == 'thread':
+        pool: Executor = ThreadPoolExecutor(max_workers=max_workers)
+    elif executor == 'process':
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+    else:
+        raise ValueError(f"Unknown executor '{executor}', expected 'thread', 'process' or 'serial'")
+
+    with pool:
+        running = {}
+        while pending or running:
+            for stage in [stage for stage in pending if all(name in values for name in stage.inputs)]:
+                pending.remove(stage)
+                kwargs = {name: values[name] for name in stage.inputs}
+                running[pool.submit(_run_stage, stage.func, kwargs)] = stage
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                _store_outputs(stage, future.result(), values)
+    return values
+
+
+def _store_outputs(stage: Stage, result: Any, values: Dict[str, Any]) -> None:
+    if len(stage.outputs) == 1:
+        values[stage.outputs[0]] = result
+    elif stage.outputs:
+        for name, value in zip(stage.outputs, result):
+            values[name] = value
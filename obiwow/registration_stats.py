@@ -0,0 +1,299 @@
+"""
+Statistics on the registration dump of the nettskjema (replaces the awk pipeline in obiwow.sh).
+Only uses the standard library so that `python -m obiwow stats` starts quickly.
+
+The counts are kept in a state file with the byte offset up to which the dump was read. When the dump only grew
+since (same start, same bytes before the offset), only the appended rows are read; otherwise it is counted again.
+Submissions from the nettskjema API (see obiwow/nettskjema.py) are counted the same way, skipping submissions
+up to the last submission ID counted.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+# 0-based positions of the columns in the registration dump
+WORKSHOP_FIELD = 2
+EMAIL_FIELD = 3
+
+STATE_VERSION = 1
+# Bytes hashed at the start of the dump and before the offset to check that the dump only grew
+CHECK_BYTES = 4096
+
+
+def count_registrations(path: str, delimiter: str = ';') -> Tuple[Counter, Counter]:
+    """
+    Count registrations per workshop and per email address in a registration dump.
+
+    Args:
+        path (str): The path to the registration dump (export of the registration nettskjema).
+        delimiter (str): The delimiter used in the dump.
+
+    Returns:
+        Tuple[Counter, Counter]: Registrations per workshop and registrations per email address.
+    """
+    per_workshop = Counter()
+    per_email = Counter()
+    with open(path, newline='', encoding='utf-8') as file:
+        reader = csv.reader(file, delimiter=delimiter)
+        next(reader, None)  # header
+        for row in reader:
+            if len(row) <= max(WORKSHOP_FIELD, EMAIL_FIELD):
+                continue
+            per_workshop[row[WORKSHOP_FIELD]] += 1
+            per_email[row[EMAIL_FIELD]] += 1
+    return per_workshop, per_email
+
+
+@dataclass
+class RegistrationCounts:
+    """
+    Registrations per workshop and per email address counted so far from a source file.
+
+    Attributes:
+        source (str): The file counted.
+        offset (int): Byte offset up to which the file was counted.
+        head (str): Hash of the start of the file.
+        tail (str): Hash of the bytes before the offset.
+        last_submission_id (int): Highest submission ID counted, for submissions from the API.
+        per_workshop (Counter): Registrations per workshop.
+        per_email (Counter): Registrations per email address.
+    """
+    source: str = ""
+    offset: int = 0
+    head: str = ""
+    tail: str = ""
+    last_submission_id: int = 0
+    per_workshop: Counter = field(default_factory=Counter)
+    per_email: Counter = field(default_factory=Counter)
+
+    def reset(self, source: str) -> None:
+        self.__init__(source=source)
+
+    def to_dict(self) -> dict:
+        return {'version': STATE_VERSION, 'source': self.source, 'offset': self.offset, 'head': self.head,
+                'tail': self.tail, 'last_submission_id': self.last_submission_id,
+                'per_workshop': dict(self.per_workshop), 'per_email': dict(self.per_email)}
+
+    @classmethod
+    def load(cls, path: str) -> 'RegistrationCounts':
+        """
+        Read the counts saved by `save`. Missing or outdated state files give empty counts.
+        """
+        try:
+            with open(path, 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cls()
+        if data.get('version') != STATE_VERSION:
+            return cls()
+        return cls(data['source'], data['offset'], data['head'], data['tail'], data['last_submission_id'],
+                   Counter(data['per_workshop']), Counter(data['per_email']))
+
+    def save(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(self.to_dict(), file)
+        os.replace(tmp_path, path)
+
+
+def _hash_range(file, start: int, end: int) -> str:
+    file.seek(start)
+    return hashlib.sha256(file.read(end - start)).hexdigest()
+
+
+def read_new_lines(path: str, counts: RegistrationCounts) -> Tuple[List[str], bool]:
+    """
+    Return the complete lines added to a file since it was last counted, and move the offset past them.
+    If the file is not the one counted or did not only grow, the counts are reset and all lines are returned.
+
+    Args:
+        path (str): The file.
+        counts (RegistrationCounts): The counts, updated in place.
+
+    Returns:
+        Tuple[List[str], bool]: The new lines, without line endings, and whether they start at the start of the file.
+    """
+    source = str(Path(path).resolve())
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        grown = (counts.source == source and counts.offset <= size
+                 and counts.head == _hash_range(file, 0, min(CHECK_BYTES, counts.offset))
+                 and counts.tail == _hash_range(file, max(0, counts.offset - CHECK_BYTES), counts.offset))
+        if not grown:
+            counts.reset(source)
+        from_start = counts.offset == 0
+        file.seek(counts.offset)
+        data = file.read()
+        # A row still being written is read next time
+        end = data.rfind(b'\n') + 1
+        counts.offset += end
+        counts.head = _hash_range(file, 0, min(CHECK_BYTES, counts.offset))
+        counts.tail = _hash_range(file, max(0, counts.offset - CHECK_BYTES), counts.offset)
+    return data[:end].decode('utf-8').splitlines(), from_start
+
+
+def update_counts(path: str, counts: RegistrationCounts, delimiter: str = ';') -> int:
+    """
+    Add the rows appended to a registration dump to the counts, see `read_new_lines`.
+
+    Args:
+        path (str): The registration dump.
+        counts (RegistrationCounts): The counts, updated in place.
+        delimiter (str): The delimiter used in the dump.
+
+    Returns:
+        int: The number of registrations added.
+    """
+    lines, from_start = read_new_lines(path, counts)
+    if from_start:
+        lines = lines[1:]  # header
+    added = 0
+    for row in csv.reader(lines, delimiter=delimiter):
+        if len(row) <= max(WORKSHOP_FIELD, EMAIL_FIELD):
+            continue
+        counts.per_workshop[row[WORKSHOP_FIELD]] += 1
+        counts.per_email[row[EMAIL_FIELD]] += 1
+        added += 1
+    return added
+
+
+def update_counts_from_submissions(path: str, counts: RegistrationCounts,
+                                   workshop_title: Callable[[dict], Optional[str]]) -> int:
+    """
+    Add the submissions appended to a JSON lines file of `obiwow.nettskjema.SubmissionStore` to the counts.
+    Submissions up to the last submission ID counted are skipped.
+
+    Args:
+        path (str): The JSON lines file.
+        counts (RegistrationCounts): The counts, updated in place.
+        workshop_title (Callable[[dict], Optional[str]]): Returns the workshop title of a submission.
+
+    Returns:
+        int: The number of submissions added.
+    """
+    added = 0
+    for line in read_new_lines(path, counts)[0]:
+        if not line.strip():
+            continue
+        submission = json.loads(line)
+        if submission['submissionId'] <= counts.last_submission_id:
+            continue
+        counts.last_submission_id = submission['submissionId']
+        counts.per_email[submission['respondentEmail']] += 1
+        title = workshop_title(submission)
+        if title is not None:
+            counts.per_workshop[title] += 1
+        added += 1
+    return added
+
+
+def fill_rates(per_workshop: Counter, schedule_path: str) -> List[Tuple[str, int, Optional[int]]]:
+    """
+    Return the registrations of each workshop of the schedule with its max capacity. Workshop titles of the dump
+    are matched to the schedule with `obiwow.title_matcher.TitleMatcher`.
+
+    Args:
+        per_workshop (Counter): Registrations per workshop title of the dump.
+        schedule_path (str): The schedule JSON written by generate_website.py.
+
+    Returns:
+        List[Tuple[str, int, Optional[int]]]: Title, registrations and max capacity of each workshop,
+        by decreasing fill rate.
+    """
+    from obiwow.schedule_loader import load_schedule
+    from obiwow.title_matcher import TitleMatcher
+
+    with load_schedule(schedule_path, use_index=True) as schedule:
+        title_matcher = TitleMatcher.from_schedule(schedule)
+        registered = Counter()
+        for title, count in per_workshop.items():
+            title_match = title_matcher.match(title.replace('_', ' '))
+            if title_match is not None:
+                registered[title_match.workshop_id] += count
+        rates = []
+        for workshop_id, workshop in schedule.items():
+            try:
+                max_capacity = int(float(workshop.max_attendance))
+            except (TypeError, ValueError):
+                max_capacity = None
+            rates.append((workshop.title, registered[workshop_id], max_capacity))
+    return sorted(rates, key=lambda rate: -(rate[1] / rate[2] if rate[2] else 0))
+
+
+def format_fill_rates(rates: Iterable[Tuple[str, int, Optional[int]]]) -> List[str]:
+    """
+    Format the fill rates as lines of text.
+    """
+    lines = ["fill rate per workshop (registrations / max capacity):"]
+    for title, count, max_capacity in rates:
+        rate = f"{count / max_capacity:5.0%}" if max_capacity else "    -"
+        lines.append(f"{rate}\t{count}/{max_capacity if max_capacity is not None else '-'}\t{title}")
+    return lines
+
+
+def format_summary(per_workshop: Counter, per_email: Counter, top: int = 10) -> List[str]:
+    """
+    Format the registration statistics as lines of text.
+
+    Args:
+        per_workshop (Counter): Registrations per workshop.
+        per_email (Counter): Registrations per email address.
+        top (int): Number of email addresses to list with the most registrations.
+
+    Returns:
+        List[str]: The lines of the summary.
+    """
+    lines = ["how many people signed up", str(len(per_email)), ""]
+    lines.append("how many times did someone sign up")
+    lines.extend(f"{count:7d} {email}" for email, count in per_email.most_common(top))
+    lines.extend(["", "how many signed up per workshop:"])
+    lines.extend(f"{workshop}\t{count}" for workshop, count in per_workshop.most_common())
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='obiwow stats',
+                                     description='Statistics on the registration dump of the nettskjema')
+    parser.add_argument('infile', nargs='?', help='Registration dump, e.g. data-####-20##-##-##-####-utf.txt')
+    parser.add_argument('--api', action='store_true',
+                        help='Get the registrations from the nettskjema API instead (registrations.py), with the '
+                             'options below; the counts are kept in --state as for a dump')
+    parser.add_argument('-d', '--delimiter', default=';', help="Delimiter used in the dump (default: ';')")
+    parser.add_argument('--top', type=int, default=10,
+                        help='Number of email addresses to list with the most registrations (default: 10)')
+    parser.add_argument('--state', default='outputs/registration_stats.json',
+                        help='File with the counts so far, only rows added since are read '
+                             '(default: outputs/registration_stats.json)')
+    parser.add_argument('--full', action='store_true',
+                        help='Count the whole dump again, or fetch all submissions again with --api')
+    parser.add_argument('--schedule', default='outputs/schedule.json',
+                        help='Schedule JSON with the max capacity of the workshops, for the fill rates '
+                             '(default: outputs/schedule.json, skipped if missing)')
+    from obiwow.nettskjema import add_client_arguments
+    add_client_arguments(parser, full=False)
+    args = parser.parse_args(argv)
+
+    if args.api:
+        import registrations
+        client_args = [f"--form={form}" for form in args.form or []]
+        client_args += ['--store', args.store, '--base-url', args.base_url, '--state', args.state]
+        client_args += (['--token', args.token] if args.token else []) + (['--full'] if args.full else [])
+        registrations.main(client_args)
+        return
+    if args.infile is None:
+        parser.error("a registration dump is needed unless --api is given")
+
+    counts = RegistrationCounts() if args.full else RegistrationCounts.load(args.state)
+    update_counts(args.infile, counts, args.delimiter)
+    counts.save(args.state)
+    print("\n".join(format_summary(counts.per_workshop, counts.per_email, args.top)))
+    if Path(args.schedule).is_file():
+        print()
+        print("\n".join(format_fill_rates(fill_rates(counts.per_workshop, args.schedule))))
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+
+def hash_content(*parts: Any) -> str:
+    """
+    Compute a stable SHA-256 hash of arbitrary JSON-serialisable values.
+
+    Args:
+        *parts (Any): Values to include in the hash. Dictionaries are hashed with sorted keys,
+            values that are not JSON-serialisable are hashed through their string representation.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    Compute the SHA-256 hash of a file's content.
+
+    Args:
+        path (str): The path to the file.
+
+    Returns:
+        str: The hexadecimal digest, or an empty string if the file cannot be read.
+    """
+    try:
+        with open(path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except OSError as e:
+        print(f"Error in file_fingerprint: {e}")
+        return ""
+
+
+class RenderCache:
+    """
+    Persistent cache for rendered output, stored as one file per entry in a directory.
+
+    Entries are named after their key, which is expected to be a content hash (see `hash_content`).
+    Reading an entry refreshes its modification time, so eviction removes the least recently used
+    entries first once the cache holds more than `max_entries` files or `max_bytes` bytes.
+    The directory is scanned once, on the first write; the entries and their total size are then
+    kept up to date in memory, so a write does not list the whole cache again.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 1000, max_bytes: int = 50 * 1024 * 1024,
+                 suffix: str = '.html'):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Entry file names to sizes, least recently used first; None until the first write
+        self._entries: Optional[OrderedDict] = None
+        self._total_bytes = 0
+
+    def path_for(self, key: str) -> Path:
+        """
+        Return the path of the file holding the entry for `key`.
+        """
+        return self.cache_dir / f"{key}{self.suffix}"
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """
+        Return the cached bytes for `key`, or None if there is no entry.
+        """
+        entry_path = self.path_for(key)
+        try:
+            content = entry_path.read_bytes()
+            os.utime(entry_path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self._entries is not None and entry_path.name in self._entries:
+            self._entries.move_to_end(entry_path.name)
+        return content
+
+    def put_bytes(self, key: str, content: bytes) -> None:
+        """
+        Store `content` under `key` and evict old entries if the cache is over its limits.
+        The file is written to a temporary name first so readers never see a partial entry.
+        """
+        entry_path = self.path_for(key)
+        tmp_path = entry_path.with_name(f"{entry_path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            print(f"Error in RenderCache.put_bytes: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        entries = self._index()
+        self._total_bytes += len(content) - entries.pop(entry_path.name, 0)
+        entries[entry_path.name] = len(content)
+        self._trim()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Return the cached text for `key`, or None if there is no entry.
+        """
+        content = self.get_bytes(key)
+        return content.decode('utf-8') if content is not None else None
+
+    def put(self, key: str, text: str) -> None:
+        """
+        Store `text` under `key`.
+        """
+        self.put_bytes(key, text.encode('utf-8'))
+
+    def _index(self) -> OrderedDict:
+        if self._entries is None:
+            entries = []
+            for entry_path in self.cache_dir.glob(f"*{self.suffix}"):
+                try:
+                    stat = entry_path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, entry_path.name, stat.st_size))
+            entries.sort()
+            self._entries = OrderedDict((name, size) for _, name, size in entries)
+            self._total_bytes = sum(self._entries.values())
+        return self._entries
+
+    def _trim(self) -> None:
+        entries = self._index()
+        while entries and (len(entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            name, size = entries.popitem(last=False)
+            (self.cache_dir / name).unlink(missing_ok=True)
+            self._total_bytes -= size
+
+    def evict(self) -> None:
+        """
+        Scan the cache directory again, e.g. after other processes wrote to it, and remove the least
+        recently used entries until the cache is within its size limits.
+        """
+        self._entries = None
+        self._trim()
@@ -0,0 +1,313 @@
+"""
+Render the evaluation reports in this process, from the counts of obiwow/evaluation_cube.py, without Quarto.
+
+Charts are drawn with the object-oriented matplotlib API on the Agg backend: one page figure (and one chart figure
+for HTML) is cleared and reused for every topic of every workshop, instead of a new pyplot figure per chart.
+Each report is a multi-page PDF written with `PdfPages`, or a single HTML page with the charts inlined as SVG.
+
+Charts go through a disk cache (`ChartRenderer`, on top of `RenderCache`) keyed by the topic, the kind of chart and
+the counts, so the charts of workshops whose counts did not change are read back as PNG or SVG files instead of
+being drawn again.
+"""
+import html
+import io
+import os
+import sys
+import textwrap
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional
+
+import matplotlib
+import matplotlib.image
+import matplotlib.style
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+
+from obiwow.evaluation_cube import EvaluationCube, Topic
+from obiwow.render_cache import RenderCache, hash_content
+from obiwow.report_runner import ReportResult
+
+FORMATS = ('pdf', 'html')
+A4 = (8.27, 11.69)
+CHART_SIZE = (6.4, 4.8)
+CHART_DPI = 200
+STYLE = 'ggplot'
+# Bump when the charts are drawn differently, so cached charts are drawn again
+CHART_VERSION = 1
+# Comments on a page: characters per line and lines
+WRAP_WIDTH = 95
+LINE_HEIGHT = 0.016
+
+
+@dataclass(frozen=True)
+class EvaluationReport:
+    """
+    A report of the responses of one workshop (or all workshops) and where it goes.
+    """
+    name: str
+    workshop_id: str
+    title: str
+    subtitle: str
+    output_path: str
+
+
+def topic_heading(topic: Topic) -> str:
+    """
+    Return the heading of a topic: its question, or the comment question when it has only comments.
+    """
+    return (topic.question or topic.comment or topic.name).strip()
+
+
+def plot_counts(ax: Axes, kind: str, counts: Mapping[str, int]) -> None:
+    """
+    Draw the number of each response to a question on an axes.
+
+    Args:
+        ax (Axes): The axes to draw on.
+        kind (str): The kind of answers: 'categories' as horizontal bars, 'scale' as bars 1 to 5, or 'yes_no'.
+        counts (Mapping[str, int]): The number of each response, see `EvaluationCube.counts`.
+    """
+    # case: background
+    if kind == 'categories':
+        x_values = list(counts.keys())
+        y_values = list(counts.values())
+        ax.barh(x_values, y_values)
+        # Ticks as integers
+        ax.set_xticks(np.arange(0, max(y_values) + 1, 1))
+        ax.set_xlabel('Count')
+        ax.set_ylabel('Responses')
+        return
+    # case: scale from 1-5, or Yes/No
+    responses = ['1', '2', '3', '4', '5'] if kind == 'scale' else ['No', 'Yes']
+    y_values = [counts.get(response, 0) for response in responses]
+    ax.bar(responses, y_values)
+    # Scale step size for ticks
+    step = 1 if max(y_values) <= 10 else 5
+    # Ticks as integers
+    ax.set_yticks(np.arange(0, max(y_values) + 1, step))
+    ax.set_xlabel('Response')
+    ax.set_ylabel('Count')
+
+
+def wrap_comments(comments: List[str], width: int = WRAP_WIDTH) -> List[str]:
+    """
+    Return the comments as bulleted lines of at most `width` characters.
+    """
+    lines = []
+    for comment in comments:
+        wrapped = textwrap.wrap(" ".join(comment.split()), width - 2) or [""]
+        lines.append(f"• {wrapped[0]}")
+        lines.extend(f"  {line}" for line in wrapped[1:])
+    return lines
+
+
+def chart_key(topic: Topic, counts: Mapping[str, int], image_format: str) -> str:
+    """
+    Return the cache key of a chart: the topic, the kind of chart, the counts in their order and the format.
+    """
+    return hash_content(CHART_VERSION, STYLE, CHART_SIZE, CHART_DPI, topic.name, topic.kind, image_format,
+                        list(counts.items()))
+
+
+class ChartRenderer:
+    """
+    Draw the charts of the questions as PNG or SVG on one reused figure, through a disk cache of the charts
+    with least recently used eviction.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 2000,
+                 max_bytes: int = 100 * 1024 * 1024):
+        self.figure = Figure(figsize=CHART_SIZE)
+        FigureCanvasAgg(self.figure)
+        self.drawn = 0
+        self.caches: Dict[str, RenderCache] = {}
+        if cache_dir:
+            self.caches = {image_format: RenderCache(cache_dir, max_entries, max_bytes, suffix=f".{image_format}")
+                           for image_format in ('png', 'svg')}
+
+    def draw(self, kind: str, counts: Mapping[str, int], image_format: str) -> bytes:
+        """
+        Draw a chart and return the image.
+        """
+        self.drawn += 1
+        with matplotlib.style.context(STYLE):
+            self.figure.clear()
+            plot_counts(self.figure.add_subplot(), kind, counts)
+            self.figure.tight_layout()
+        buffer = io.BytesIO()
+        # No creation date or random IDs in the files, so the same counts give the same image
+        metadata = {'Date': None} if image_format == 'svg' else {'Software': None}
+        with matplotlib.rc_context({'svg.hashsalt': 'obiwow'}):
+            self.figure.savefig(buffer, format=image_format, dpi=CHART_DPI, metadata=metadata)
+        return buffer.getvalue()
+
+    def chart(self, topic: Topic, counts: Mapping[str, int], image_format: str = 'png') -> bytes:
+        """
+        Return the chart of the counts of the answers to a topic, from the cache if it was drawn before.
+
+        Args:
+            topic (Topic): The topic, whose kind sets the kind of chart.
+            counts (Mapping[str, int]): The number of each response, see `EvaluationCube.counts`.
+            image_format (str): 'png' or 'svg'.
+
+        Returns:
+            bytes: The image.
+        """
+        cache = self.caches.get(image_format)
+        if cache is None:
+            return self.draw(topic.kind, counts, image_format)
+        key = chart_key(topic, counts, image_format)
+        image = cache.get_bytes(key)
+        if image is None:
+            image = self.draw(topic.kind, counts, image_format)
+            cache.put_bytes(key, image)
+        return image
+
+
+class ReportEngine:
+    """
+    Render evaluation reports from an `EvaluationCube`, reusing the same figures for all the charts.
+    """
+
+    def __init__(self, cube: EvaluationCube, charts: Optional[ChartRenderer] = None):
+        self.cube = cube
+        self.page = Figure(figsize=A4)
+        FigureCanvasAgg(self.page)
+        self.charts = charts or ChartRenderer()
+
+    def _title_page(self, pdf: PdfPages, report: EvaluationReport) -> None:
+        self.page.clear()
+        self.page.text(0.5, 0.62, report.title, ha='center', fontsize=18, wrap=True)
+        self.page.text(0.5, 0.57, report.subtitle, ha='center', fontsize=14, wrap=True)
+        self.page.text(0.5, 0.5, f"Number of responses: {self.cube.n_responses(report.workshop_id)}",
+                       ha='center', fontsize=12)
+        pdf.savefig(self.page)
+
+    def _topic_pages(self, pdf: PdfPages, report: EvaluationReport, topic: Topic) -> None:
+        counts = self.cube.counts(report.workshop_id, topic.name)
+        comments = self.cube.comments(report.workshop_id, topic.name)
+        if not counts and not comments:
+            return
+        heading = topic_heading(topic)
+        self.page.clear()
+        self.page.text(0.08, 0.94, heading, fontsize=14, weight='bold', wrap=True)
+        top = 0.9
+        if counts:
+            # The chart, as an image the width of the text
+            image = matplotlib.image.imread(io.BytesIO(self.charts.chart(topic, counts, 'png')), format='png')
+            ax = self.page.add_axes((0.08, 0.46, 0.84, 0.43))
+            ax.imshow(image, interpolation='antialiased')
+            ax.set_axis_off()
+            top = 0.44
+        lines = wrap_comments(comments)
+        if lines:
+            self.page.text(0.08, top, "Comments to the above question:", fontsize=10, weight='bold')
+            top -= 1.5 * LINE_HEIGHT
+        for line in lines:
+            if top < 0.05:
+                # Comments continue on a new page
+                pdf.savefig(self.page)
+                self.page.clear()
+                self.page.text(0.08, 0.94, f"{heading} (continued)", fontsize=14, weight='bold', wrap=True)
+                top = 0.9
+            self.page.text(0.08, top, line, fontsize=9, family='monospace')
+            top -= LINE_HEIGHT
+        pdf.savefig(self.page)
+
+    def write_pdf(self, report: EvaluationReport, path: str) -> None:
+        """
+        Write a report as a PDF: a title page, then a page per topic with its chart and comments.
+        """
+        with PdfPages(path) as pdf:
+            self._title_page(pdf, report)
+            for topic in self.cube.topics.values():
+                self._topic_pages(pdf, report, topic)
+
+    def chart_svg(self, topic: Topic, counts: Mapping[str, int]) -> str:
+        """
+        Return the chart of the counts of a question as SVG.
+        """
+        svg = self.charts.chart(topic, counts, 'svg').decode('utf-8')
+        # Inline the <svg> element only, without the XML prolog
+        return svg[svg.index('<svg'):]
+
+    def write_html(self, report: EvaluationReport, path: str) -> None:
+        """
+        Write a report as a single HTML page with the charts inlined.
+        """
+        parts = [f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+                 f"<title>{html.escape(report.title)}</title>\n</head>\n<body>\n"
+                 f"<h1>{html.escape(report.title)}</h1>\n<h2>{html.escape(report.subtitle)}</h2>\n"
+                 f"<p>Number of responses: {self.cube.n_responses(report.workshop_id)}</p>\n"]
+        for topic in self.cube.topics.values():
+            counts = self.cube.counts(report.workshop_id, topic.name)
+            comments = self.cube.comments(report.workshop_id, topic.name)
+            parts.append(f"<h1>{html.escape(topic_heading(topic))}</h1>\n")
+            if counts:
+                parts.append(self.chart_svg(topic, counts) + "\n")
+            if comments:
+                parts.append("<strong>Comments to the above question:</strong>\n<ul>\n")
+                parts.extend(f"<li>{html.escape(comment)}</li>\n" for comment in comments)
+                parts.append("</ul>\n")
+        parts.append("</body>\n</html>\n")
+        with open(path, 'w') as file:
+            file.write("".join(parts))
+
+    def render(self, report: EvaluationReport, fmt: str = 'pdf') -> ReportResult:
+        """
+        Render a report to its output path; the file is only replaced once it is complete.
+
+        Args:
+            report (EvaluationReport): The report.
+            fmt (str): 'pdf' or 'html'.
+
+        Returns:
+            ReportResult: The outcome.
+        """
+        start = time.perf_counter()
+        Path(report.output_path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{report.output_path}.{os.getpid()}.tmp"
+        try:
+            with matplotlib.style.context(STYLE):
+                if fmt == 'html':
+                    self.write_html(report, tmp_path)
+                else:
+                    self.write_pdf(report, tmp_path)
+            os.replace(tmp_path, report.output_path)
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return ReportResult(report.name, report.output_path, False, time.perf_counter() - start, str(e))
+        return ReportResult(report.name, report.output_path, True, time.perf_counter() - start)
+
+
+def render_native_reports(cube: EvaluationCube, reports: List[EvaluationReport], fmt: str = 'pdf',
+                          chart_cache_dir: Optional[str] = None) -> List[ReportResult]:
+    """
+    Render reports one after the other in this process, sharing the figures.
+
+    Args:
+        cube (EvaluationCube): The counts and comments, see `obiwow.evaluation_cube.build_cube`.
+        reports (List[EvaluationReport]): The reports.
+        fmt (str): 'pdf' or 'html'.
+        chart_cache_dir (Optional[str]): The directory of the chart cache, charts are always drawn if None.
+
+    Returns:
+        List[ReportResult]: The outcome of each report, in the order of `reports`.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown report format '{fmt}', expected one of {', '.join(FORMATS)}")
+    engine = ReportEngine(cube, ChartRenderer(chart_cache_dir))
+    results = []
+    for report in reports:
+        result = engine.render(report, fmt)
+        status = "done" if result.ok else "FAILED"
+        print(f"Workshop: {result.name} ({status} in {result.seconds:.1f} s)")
+        sys.stdout.flush()
+        results.append(result)
+    return results
@@ -0,0 +1,112 @@
+"""
+Render only the evaluation reports whose responses changed since the last run of evaluation.py.
+
+The fingerprint of a report combines the responses of its workshop in the evaluation cube with the files it is
+rendered from (the report templates and code) and its title. A manifest (`evaluation_reports.json`) records the
+fingerprint of each report written; a report is skipped when its fingerprint is unchanged and its file still exists.
+The report of all workshops is rendered again whenever any other report is.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from obiwow.evaluation_cube import EvaluationCube
+from obiwow.render_cache import file_fingerprint, hash_content
+from obiwow.report_engine import EvaluationReport
+from obiwow.report_runner import ReportResult
+
+# Bump when the way the reports are rendered changes, so all reports are rendered again
+MANIFEST_VERSION = 1
+
+
+def template_fingerprint(file_paths: Iterable[str], *config) -> str:
+    """
+    Compute a fingerprint of the files the reports are rendered from and of the rendering options.
+
+    Args:
+        file_paths (Iterable[str]): The templates and code of the reports; their content is hashed.
+        *config: Rendering options, such as the engine and format.
+
+    Returns:
+        str: The fingerprint as a hexadecimal digest.
+    """
+    return hash_content(MANIFEST_VERSION, [file_fingerprint(path) for path in file_paths], config)
+
+
+def report_fingerprint(cube: EvaluationCube, report: EvaluationReport, template: str) -> str:
+    """
+    Compute the fingerprint of a report: the responses of its workshop, its title and the templates.
+    """
+    return hash_content(cube.fingerprint(report.workshop_id), report.title, report.subtitle, template)
+
+
+class ReportManifest:
+    """
+    The fingerprint of each report written, by output path, saved as JSON.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        try:
+            with open(self.path, 'r') as file:
+                self.fingerprints: Dict[str, str] = json.load(file)
+        except (OSError, ValueError):
+            self.fingerprints = {}
+
+    def is_current(self, output_path: str, fingerprint: str) -> bool:
+        """
+        Return whether the report at `output_path` exists and was rendered with this fingerprint.
+        """
+        return self.fingerprints.get(output_path) == fingerprint and os.path.isfile(output_path)
+
+    def record(self, output_path: str, fingerprint: str) -> None:
+        self.fingerprints[output_path] = fingerprint
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as file:
+            json.dump(self.fingerprints, file, indent=4)
+        os.replace(tmp_path, self.path)
+
+
+def plan_reports(reports: Sequence[EvaluationReport], fingerprints: Sequence[str], manifest: ReportManifest,
+                 combined: str, force: bool = False) -> Tuple[List[int], List[int]]:
+    """
+    Split the reports into the ones to render and the ones that are unchanged.
+
+    Args:
+        reports (Sequence[EvaluationReport]): The reports.
+        fingerprints (Sequence[str]): The fingerprint of each report, see `report_fingerprint`.
+        manifest (ReportManifest): The fingerprints of the reports written by the last run.
+        combined (str): The workshop ID of the report of all workshops, rendered again if any other report is.
+        force (bool): Render all reports.
+
+    Returns:
+        Tuple[List[int], List[int]]: The indexes of the reports to render and of the reports skipped.
+    """
+    changed = [force or not manifest.is_current(report.output_path, fingerprint)
+               for report, fingerprint in zip(reports, fingerprints)]
+    any_workshop_changed = any(is_changed for report, is_changed in zip(reports, changed)
+                               if report.workshop_id != combined)
+    to_render, skipped = [], []
+    for i, (report, is_changed) in enumerate(zip(reports, changed)):
+        if is_changed or (report.workshop_id == combined and any_workshop_changed):
+            to_render.append(i)
+        else:
+            skipped.append(i)
+    return to_render, skipped
+
+
+def format_summary(results: Sequence[ReportResult], skipped: Sequence[EvaluationReport]) -> str:
+    """
+    Return the summary of a run: the reports rendered with their time, and the reports skipped.
+    """
+    lines = [f"Rendered {len(results)} report(s) in {sum(result.seconds for result in results):.1f} s:"]
+    for result in results:
+        status = "done" if result.ok else "FAILED"
+        lines.append(f"  {result.name}: {status} in {result.seconds:.1f} s")
+    lines.append(f"Skipped {len(skipped)} unchanged report(s):")
+    lines.extend(f"  {report.name}" for report in skipped)
+    return "\n".join(lines)
@@ -0,0 +1,178 @@
+"""
+Render the Quarto evaluation reports of evaluation.py in parallel.
+
+All reports are the same parameterized document, `OBiWoW_workshop_evaluation_report.qmd`, rendered with the
+parameters of each workshop (`--execute-params`) and its title (`--metadata-file`). Both are written as YAML files,
+so titles are never pasted into Quarto or Python source.
+
+The reports are split in batches, one per worker thread. Each batch is rendered one report after the other in its
+own temporary directory, with a copy of the document and of the included content file, so renders do not overwrite
+each other's files. Within a batch Quarto keeps the Jupyter kernel alive between renders (`--execute-daemon`), so the
+imports and the loading of the counts happen once per batch. A failed report is recorded and the others continue.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import yaml
+
+REPORT_NAME = "OBiWoW_workshop_evaluation_report"
+
+
+def project_root() -> Path:
+    return Path(__file__).resolve().parent.parent
+
+
+def report_qmd_path() -> Path:
+    """
+    Return the path to the parameterized Quarto document of the reports.
+    """
+    return project_root() / f"{REPORT_NAME}.qmd"
+
+
+def content_qmd_path() -> Path:
+    """
+    Return the path to the Quarto file with the content of the reports, included by the document.
+    """
+    return project_root() / f"{REPORT_NAME}_content.qmd"
+
+
+@dataclass(frozen=True)
+class ReportJob:
+    """
+    A report to render: the parameters of the document, its metadata such as the title, and where its PDF goes.
+    """
+    name: str
+    params: Dict[str, Any]
+    output_path: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class ReportResult:
+    """
+    The outcome of a report: the PDF written, or the error.
+    """
+    name: str
+    output_path: str
+    ok: bool
+    seconds: float
+    error: str = ""
+
+
+def write_yaml(path: Path, values: Dict[str, Any]) -> None:
+    with open(path, 'w') as file:
+        yaml.safe_dump(values, file, allow_unicode=True, sort_keys=False)
+
+
+def render_report(job: ReportJob, workdir: str, quarto: str = 'quarto', timeout: Optional[float] = None,
+                  daemon: int = 0, env: Optional[Dict[str, str]] = None) -> ReportResult:
+    """
+    Render a report with Quarto in a directory holding the document and move its PDF to the output path.
+
+    Args:
+        job (ReportJob): The report.
+        workdir (str): The directory with the copies of the document and the content file.
+        quarto (str): The Quarto executable.
+        timeout (Optional[float]): Seconds after which the render is stopped, no limit if None.
+        daemon (int): Seconds the Jupyter kernel is kept alive for the next render in `workdir`, 0 for none.
+        env (Optional[Dict[str, str]]): The environment of the Quarto process.
+
+    Returns:
+        ReportResult: The outcome.
+    """
+    start = time.perf_counter()
+    write_yaml(Path(workdir) / 'params.yml', job.params)
+    write_yaml(Path(workdir) / 'metadata.yml', job.metadata)
+    command = [quarto, 'render', f"{REPORT_NAME}.qmd", '--execute-params', 'params.yml',
+               '--metadata-file', 'metadata.yml']
+    if daemon:
+        command += ['--execute-daemon', str(daemon)]
+    try:
+        result = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return ReportResult(job.name, job.output_path, False, time.perf_counter() - start, str(e))
+    pdf_path = Path(workdir) / f"{REPORT_NAME}.pdf"
+    if result.returncode != 0 or not pdf_path.is_file():
+        error = (result.stderr or result.stdout).strip().splitlines()
+        return ReportResult(job.name, job.output_path, False, time.perf_counter() - start,
+                            "\n".join(error[-5:]) or f"quarto exited with {result.returncode}, no pdf generated")
+    Path(job.output_path).parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(str(pdf_path), job.output_path)
+    return ReportResult(job.name, job.output_path, True, time.perf_counter() - start)
+
+
+def render_batch(jobs: List[ReportJob], quarto: str = 'quarto', timeout: Optional[float] = None, daemon: int = 60,
+                 support_files: Iterable[Path] = (),
+                 on_result: Optional[Callable[[ReportResult], None]] = None) -> List[ReportResult]:
+    """
+    Render reports one after the other in one temporary directory, reusing the Jupyter kernel.
+
+    Args:
+        jobs (List[ReportJob]): The reports.
+        quarto (str): The Quarto executable.
+        timeout (Optional[float]): Seconds after which a render is stopped, no limit if None.
+        daemon (int): Seconds the Jupyter kernel is kept alive between renders, 0 to start one per report.
+        support_files (Iterable[Path]): Files copied to the directory, the document and the content file by default.
+        on_result (Optional[Callable[[ReportResult], None]]): Called with the outcome of each report.
+
+    Returns:
+        List[ReportResult]: The outcome of each report, in the order of `jobs`.
+    """
+    support_files = list(support_files) or [report_qmd_path(), content_qmd_path()]
+    # The content file imports obiwow
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(project_root()),
+                                                                     os.environ.get('PYTHONPATH')])))
+    results = []
+    with tempfile.TemporaryDirectory(prefix='obiwow_report_') as workdir:
+        for path in support_files:
+            shutil.copy(path, workdir)
+        for job in jobs:
+            result = render_report(job, workdir, quarto, timeout, daemon, env)
+            if on_result is not None:
+                on_result(result)
+            results.append(result)
+    return results
+
+
+def render_reports(jobs: List[ReportJob], workers: int = 4, quarto: str = 'quarto',
+                   timeout: Optional[float] = None, daemon: int = 60) -> List[ReportResult]:
+    """
+    Render reports in `workers` batches at the same time, each batch with its own Quarto kernel.
+
+    Args:
+        jobs (List[ReportJob]): The reports.
+        workers (int): Maximum number of reports rendered at the same time.
+        quarto (str): The Quarto executable.
+        timeout (Optional[float]): Seconds after which a render is stopped, no limit if None.
+        daemon (int): Seconds the Jupyter kernel of a batch is kept alive between renders, 0 for none.
+
+    Returns:
+        List[ReportResult]: The outcome of each report, in the order of `jobs`.
+    """
+    workers = max(1, min(workers, len(jobs)))
+    lock = threading.Lock()
+
+    def report(result: ReportResult) -> None:
+        status = "done" if result.ok else "FAILED"
+        with lock:
+            print(f"Workshop: {result.name} ({status} in {result.seconds:.1f} s)")
+            sys.stdout.flush()
+
+    # Every worker-th report goes to the same batch
+    batches = [jobs[i::workers] for i in range(workers)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        batch_results = list(executor.map(
+            lambda batch: render_batch(batch, quarto, timeout, daemon, on_result=report), batches))
+    results: List[Optional[ReportResult]] = [None] * len(jobs)
+    for i, batch in enumerate(batch_results):
+        results[i::workers] = batch
+    return results
@@ -0,0 +1,314 @@
+"""
+Read-only access to the schedule written by generate_website.py (`schedule.json`).
+
+Next to the JSON file, `write_schedule_index` writes a binary sidecar (`schedule.idx`); generate_website.py builds
+it with `write_schedule_json(..., write_index=True)`. When it exists, `load_schedule(..., use_index=True)` memory-maps
+it, so scripts such as registration_mail.py, evaluation.py and generate_room_schedule.py load the schedule without
+parsing the JSON. All of them look up workshops by ID, normalized title or slug the same way.
+
+Sidecar layout (little endian):
+    header:  magic b'OBWS', format version (uint16), number of workshops (uint32),
+             size (uint64) and modification time in ns (int64) of the JSON file it was built from
+    records: one per workshop, an (offset, length) pair (uint32) per field in FIELDS
+    strings: the UTF-8 encoded field values; lists and max_attendance are JSON encoded
+"""
+import json
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+INDEX_MAGIC = b'OBWS'
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.idx'
+
+FIELDS = ('id', 'title', 'normalized_title', 'slug', 'main_instructor', 'helper', 'max_attendance',
+          'dates', 'rooms', 'timeslots')
+_JSON_FIELDS = ('max_attendance', 'dates', 'rooms', 'timeslots')
+
+_HEADER = struct.Struct('<4sHIQq')
+_RECORD = struct.Struct('<' + 'II' * len(FIELDS))
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalize a workshop title for lookups: remove apostrophes, colons and slashes.
+
+    Args:
+        title (str): The workshop title.
+
+    Returns:
+        str: The normalized title.
+    """
+    return str(title).replace("'", "").replace(":", "").replace("/", "")
+
+
+def slugify(title: str) -> str:
+    """
+    Title without spaces and special characters, used as folder name for a workshop.
+
+    Args:
+        title (str): The workshop title.
+
+    Returns:
+        str: The slug, e.g. 'Nextflow_nf-core_pipelines' for 'Nextflow & nf-core: pipelines'.
+    """
+    slug = str(title).replace(" ", "_").replace(":", "").replace("/", "")
+    return slug.replace("&", "").replace("__", "_").replace("'", "")
+
+
+@dataclass(frozen=True)
+class Workshop:
+    """
+    A workshop of the schedule. Multi-day workshops have one date (and possibly room and timeslot) per day.
+    """
+    id: str
+    title: str
+    dates: Tuple[str, ...] = ()
+    rooms: Tuple[str, ...] = ()
+    timeslots: Tuple[str, ...] = ()
+    main_instructor: str = ""
+    helper: str = ""
+    max_attendance: Union[int, str, None] = None
+
+    @property
+    def normalized_title(self) -> str:
+        return normalize_title(self.title)
+
+    @property
+    def slug(self) -> str:
+        return slugify(self.title)
+
+    @classmethod
+    def from_dict(cls, workshop_id: str, data: Dict[str, Any]) -> 'Workshop':
+        """
+        Create a workshop from its entry in schedule.json. Older files with a single `date` and `timeslot`
+        are read as one-day workshops.
+        """
+        def as_tuple(plural: str, singular: str) -> Tuple[str, ...]:
+            if plural in data:
+                return tuple(data[plural] or ())
+            return (data[singular],) if data.get(singular) else ()
+
+        return cls(id=str(workshop_id),
+                   title=data.get('title', ""),
+                   dates=as_tuple('dates', 'date'),
+                   rooms=as_tuple('rooms', 'room'),
+                   timeslots=as_tuple('timeslots', 'timeslot'),
+                   main_instructor=data.get('main_instructor') or "",
+                   helper=data.get('helper') or "",
+                   max_attendance=data.get('max_attendance'))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return the entry of the workshop as written to schedule.json.
+        """
+        return {
+            "dates": list(self.dates),
+            "rooms": list(self.rooms),
+            "main_instructor": self.main_instructor,
+            "helper": self.helper,
+            "title": self.title,
+            "max_attendance": self.max_attendance,
+            "timeslots": list(self.timeslots)
+        }
+
+
+class ScheduleView(Mapping[str, Workshop]):
+    """
+    Read-only view of the schedule: a mapping from workshop ID to Workshop, in the order of schedule.json,
+    with lookups by normalized title and slug.
+    """
+
+    def __init__(self, workshops: List[Workshop]):
+        self._workshops = {workshop.id: workshop for workshop in workshops}
+        self._build_lookups([(workshop.id, workshop.normalized_title, workshop.slug) for workshop in workshops])
+
+    def _build_lookups(self, keys: List[Tuple[str, str, str]]) -> None:
+        self._ids = [workshop_id for workshop_id, _, _ in keys]
+        self._by_title: Dict[str, str] = {}
+        self._by_slug: Dict[str, str] = {}
+        for workshop_id, title, slug in keys:
+            # The first workshop wins when titles collide, as in the schedule order
+            self._by_title.setdefault(title, workshop_id)
+            self._by_slug.setdefault(slug, workshop_id)
+
+    def __getitem__(self, workshop_id: str) -> Workshop:
+        return self._workshops[str(workshop_id)]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def by_title(self, title: str) -> Optional[Workshop]:
+        """
+        Return the workshop with this title, compared after `normalize_title`, or None.
+        """
+        workshop_id = self._by_title.get(normalize_title(title))
+        return None if workshop_id is None else self[workshop_id]
+
+    def by_slug(self, slug: str) -> Optional[Workshop]:
+        """
+        Return the workshop with this slug (see `slugify`), or None.
+        """
+        workshop_id = self._by_slug.get(slug)
+        return None if workshop_id is None else self[workshop_id]
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the schedule as written to schedule.json.
+        """
+        return {workshop_id: self[workshop_id].to_dict() for workshop_id in self}
+
+    def close(self) -> None:
+        """
+        Release the memory-mapped sidecar, if any. Workshops not read yet can no longer be read.
+        """
+
+    def __enter__(self) -> 'ScheduleView':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class _MappedScheduleView(ScheduleView):
+    """
+    Schedule view backed by a memory-mapped sidecar. Only the lookup keys are decoded on loading;
+    workshops are decoded when they are first accessed.
+    """
+
+    def __init__(self, buffer: mmap.mmap, count: int):
+        self._buffer = buffer
+        self._records = [_RECORD.unpack_from(buffer, _HEADER.size + i * _RECORD.size) for i in range(count)]
+        self._workshops = {}
+        keys = [(self._field(record, 'id'), self._field(record, 'normalized_title'), self._field(record, 'slug'))
+                for record in self._records]
+        self._positions = {workshop_id: i for i, (workshop_id, _, _) in enumerate(keys)}
+        self._build_lookups(keys)
+
+    def _field(self, record: tuple, name: str) -> str:
+        i = FIELDS.index(name)
+        offset, length = record[2 * i], record[2 * i + 1]
+        return self._buffer[offset:offset + length].decode('utf-8')
+
+    def __getitem__(self, workshop_id: str) -> Workshop:
+        workshop_id = str(workshop_id)
+        if workshop_id not in self._workshops:
+            record = self._records[self._positions[workshop_id]]
+            values = {name: self._field(record, name) for name in FIELDS}
+            for name in _JSON_FIELDS:
+                values[name] = json.loads(values[name])
+            self._workshops[workshop_id] = Workshop(
+                id=values['id'], title=values['title'], dates=tuple(values['dates']), rooms=tuple(values['rooms']),
+                timeslots=tuple(values['timeslots']), main_instructor=values['main_instructor'],
+                helper=values['helper'], max_attendance=values['max_attendance'])
+        return self._workshops[workshop_id]
+
+    def close(self) -> None:
+        self._buffer.close()
+
+
+def index_path_for(json_path: Union[str, Path]) -> Path:
+    """
+    Return the path of the sidecar of a schedule JSON file, e.g. `outputs/schedule.idx`.
+    """
+    return Path(json_path).with_suffix(INDEX_SUFFIX)
+
+
+def write_schedule_index(json_path: Union[str, Path], schedule: Optional[ScheduleView] = None) -> Path:
+    """
+    Write the binary sidecar of a schedule JSON file.
+
+    Args:
+        json_path (Union[str, Path]): The schedule JSON file.
+        schedule (Optional[ScheduleView]): The schedule in the file. Read from the file if None.
+
+    Returns:
+        Path: The path of the sidecar.
+    """
+    json_path = Path(json_path)
+    if schedule is None:
+        schedule = _read_json(json_path)
+
+    strings = bytearray()
+    records = []
+    for workshop in schedule.values():
+        pairs = []
+        for name in FIELDS:
+            value = getattr(workshop, name)
+            text = json.dumps(list(value) if isinstance(value, tuple) else value) if name in _JSON_FIELDS else value
+            encoded = text.encode('utf-8')
+            pairs += [len(strings), len(encoded)]
+            strings += encoded
+        records.append(pairs)
+
+    start = _HEADER.size + _RECORD.size * len(records)
+    stat = json_path.stat()
+    index_path = index_path_for(json_path)
+    tmp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as file:
+        file.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(records), stat.st_size, stat.st_mtime_ns))
+        for pairs in records:
+            # Offsets are stored from the start of the file
+            file.write(_RECORD.pack(*[value + start if i % 2 == 0 else value for i, value in enumerate(pairs)]))
+        file.write(strings)
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+def _read_json(json_path: Path) -> ScheduleView:
+    with open(json_path, 'r') as file:
+        schedule_data = json.load(file)
+    return ScheduleView([Workshop.from_dict(key, value) for key, value in schedule_data.items()])
+
+
+def _open_index(json_path: Path) -> Optional[ScheduleView]:
+    index_path = index_path_for(json_path)
+    try:
+        stat = json_path.stat()
+        with open(index_path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(buffer) >= _HEADER.size:
+        magic, version, count, json_size, json_mtime_ns = _HEADER.unpack_from(buffer, 0)
+        if (magic, version, json_size, json_mtime_ns) == (INDEX_MAGIC, INDEX_VERSION, stat.st_size,
+                                                          stat.st_mtime_ns):
+            return _MappedScheduleView(buffer, count)
+    buffer.close()
+    return None
+
+
+def load_schedule(json_path: Union[str, Path], use_index: bool = False) -> ScheduleView:
+    """
+    Load the schedule written by generate_website.py.
+
+    With `use_index`, the sidecar is used when it was built from the current JSON file. Otherwise the JSON file
+    is read, and a sidecar built from an older JSON file is written again; no sidecar is created where there
+    was none.
+
+    Args:
+        json_path (Union[str, Path]): The schedule JSON file.
+        use_index (bool): Use (and refresh) the binary sidecar, if there is one.
+
+    Returns:
+        ScheduleView: The schedule, indexed by ID, normalized title and slug.
+    """
+    json_path = Path(json_path)
+    if use_index:
+        schedule = _open_index(json_path)
+        if schedule is not None:
+            return schedule
+
+    schedule = _read_json(json_path)
+    if use_index and index_path_for(json_path).exists():
+        try:
+            write_schedule_index(json_path, schedule)
+        except OSError as e:
+            print(f"WARNING: Could not write the schedule index for '{json_path}': {e}")
+    return schedule
@@ -0,0 +1,148 @@
+"""
+Seats-left badges shown next to each workshop on the website, from the registration counts kept by
+`python -m obiwow stats` (see obiwow/registration_stats.py).
+
+Badges are `<span class="seats-left" data-workshop="<ID>">` elements in the workshop sections and the agenda.
+When only the counts changed, `update_badges` rewrites the text of those spans in the generated page,
+without rendering the page or the calendar files again.
+"""
+import html
+import os
+import re
+from typing import Dict, Mapping, Optional
+
+import pandas as pd
+
+from obiwow.allocation import OverbookingPolicy
+from obiwow.registration_stats import RegistrationCounts
+from obiwow.schedule_loader import Workshop
+from obiwow.title_matcher import TitleMatcher
+from obiwow.tsv_to_html import clean_value
+
+_BADGE_PATTERN = re.compile(r'(<span class="seats-left" data-workshop="([^"]*)">)(.*?)(</span>)', re.DOTALL)
+
+
+def schedule_workshops(df_schedule: pd.DataFrame, schedule_columns: dict) -> Dict[str, Workshop]:
+    """
+    Return the workshops of the schedule frame with their title and max capacity, networking events excluded.
+    Multi-day workshops have one row per day with the same ID and are returned once.
+    """
+    workshops = {}
+    networking = df_schedule.get(schedule_columns['networking_event_column'],
+                                 pd.Series(False, index=df_schedule.index))
+    for workshop_id, title, max_attendance, is_networking in zip(
+            df_schedule[schedule_columns['id_column']], df_schedule[schedule_columns['title_column']],
+            df_schedule.get(schedule_columns['max_attendance'], pd.Series(None, index=df_schedule.index)),
+            networking):
+        workshop_id = clean_value(workshop_id)
+        if not workshop_id or workshop_id in workshops or bool(is_networking):
+            continue
+        title = re.sub(r'\s*-\s*Day [0-9]+$', '', clean_value(title))
+        workshops[workshop_id] = Workshop(id=workshop_id, title=title,
+                                          max_attendance=None if pd.isna(max_attendance) else max_attendance)
+    return workshops
+
+
+def registrations_by_workshop(counts_path: str, workshops: Mapping[str, Workshop]) -> Dict[str, int]:
+    """
+    Return the number of registrations per workshop ID from the counts saved by `python -m obiwow stats`.
+    The workshop titles of the registration form are matched to the schedule with `TitleMatcher`.
+
+    Returns:
+        Dict[str, int]: Registrations per workshop ID, empty if there are no counts.
+    """
+    if not os.path.isfile(counts_path):
+        return {}
+    counts = RegistrationCounts.load(counts_path)
+    title_matcher = TitleMatcher({workshop_id: workshop.title for workshop_id, workshop in workshops.items()})
+    registered: Dict[str, int] = {}
+    for form_title, count in counts.per_workshop.items():
+        title_match = title_matcher.match(form_title.replace('_', ' '))
+        if title_match is not None:
+            registered[title_match.workshop_id] = registered.get(title_match.workshop_id, 0) + count
+    return registered
+
+
+def badge_text(registered: int, seats: Optional[int]) -> str:
+    """
+    Return the text of a badge: the number of seats left, or that new registrations go on the waiting list.
+    Empty if the workshop has no limit.
+    """
+    if seats is None:
+        return ""
+    left = seats - registered
+    if left <= 0:
+        return "Full, registrations go on the waiting list"
+    return f"{left} seat left" if left == 1 else f"{left} seats left"
+
+
+def badge_span(workshop_id: str, text: str) -> str:
+    """
+    Return the HTML of a badge, empty if there is no text.
+    """
+    if not text:
+        return ""
+    return f'<span class="seats-left" data-workshop="{html.escape(workshop_id)}">{html.escape(text)}</span>'
+
+
+def seat_badges(df_schedule: pd.DataFrame, schedule_columns: dict, counts_path: str,
+                policy: Optional[OverbookingPolicy] = None) -> Dict[str, str]:
+    """
+    Compute the badge of each workshop with registration counts.
+
+    Args:
+        df_schedule (pd.DataFrame): The schedule, see `obiwow.data_reader_parser.prepare_schedule`.
+        schedule_columns (dict): The column names of the schedule.
+        counts_path (str): The counts saved by `python -m obiwow stats`.
+        policy (Optional[OverbookingPolicy]): Number of seats per workshop. Max capacity if None.
+
+    Returns:
+        Dict[str, str]: The badge HTML per workshop ID. Empty if there are no counts, so the page is unchanged.
+    """
+    workshops = schedule_workshops(df_schedule, schedule_columns)
+    registered = registrations_by_workshop(counts_path, workshops)
+    if not registered:
+        return {}
+    policy = policy or OverbookingPolicy()
+    badges = {}
+    for workshop_id, workshop in workshops.items():
+        span = badge_span(workshop_id, badge_text(registered.get(workshop_id, 0), policy.seats(workshop)))
+        if span:
+            badges[workshop_id] = span
+    return badges
+
+
+def update_badges(html_path: str, badges: Mapping[str, str]) -> Optional[int]:
+    """
+    Replace the badges of a generated page with new ones, rewriting the file only if a badge changed.
+
+    Args:
+        html_path (str): The generated page.
+        badges (Mapping[str, str]): The badge HTML per workshop ID, see `seat_badges`.
+
+    Returns:
+        Optional[int]: The number of badges changed, or None if the page does not have a badge for exactly
+        the workshops in `badges` and has to be generated again.
+    """
+    if not os.path.isfile(html_path):
+        return None
+    with open(html_path, 'r') as file:
+        page = file.read()
+    if {match.group(2) for match in _BADGE_PATTERN.finditer(page)} != {html.escape(key) for key in badges}:
+        return None
+    texts = {html.escape(workshop_id): _BADGE_PATTERN.match(span).group(3) for workshop_id, span in badges.items()}
+    changed = set()
+
+    def replace(match: re.Match) -> str:
+        text = texts[match.group(2)]
+        if text != match.group(3):
+            changed.add(match.group(2))
+        return match.group(1) + text + match.group(4)
+
+    new_page = _BADGE_PATTERN.sub(replace, page)
+    if changed:
+        tmp_path = f"{html_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as file:
+            file.write(new_page)
+        os.replace(tmp_path, html_path)
+    return len(changed)
@@ -0,0 +1,326 @@
+"""
+Local SQLite store of the exports used by the scripts: workshop proposals (submissions), the schedule,
+registrations and evaluation responses.
+
+Each export is imported with a bulk upsert in one transaction, so importing a newer export only adds or updates
+rows. Tables are indexed by workshop ID, email and date; counts, per-workshop lists and joins with the schedule are
+queries on those indexes instead of passes over the CSV files.
+"""
+import argparse
+import csv
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from obiwow.render_cache import hash_content
+from obiwow.schedule_loader import Workshop
+from obiwow.title_matcher import TitleMatcher
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    submission_id TEXT PRIMARY KEY,
+    title TEXT,
+    instructor TEXT,
+    email TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS submissions_email ON submissions (email);
+
+CREATE TABLE IF NOT EXISTS schedule (
+    workshop_id TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    date TEXT,
+    title TEXT,
+    room TEXT,
+    timeslot TEXT,
+    max_attendance INTEGER,
+    PRIMARY KEY (workshop_id, day)
+);
+CREATE INDEX IF NOT EXISTS schedule_date ON schedule (date);
+
+CREATE TABLE IF NOT EXISTS registrations (
+    registration_id TEXT PRIMARY KEY,
+    position INTEGER,
+    workshop_id TEXT,
+    form_title TEXT,
+    email TEXT,
+    name TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS registrations_workshop ON registrations (workshop_id, position);
+CREATE INDEX IF NOT EXISTS registrations_email ON registrations (email);
+
+CREATE TABLE IF NOT EXISTS evaluation_responses (
+    response_id TEXT PRIMARY KEY,
+    workshop_id TEXT,
+    form_title TEXT,
+    submitted_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS evaluation_responses_workshop ON evaluation_responses (workshop_id);
+CREATE INDEX IF NOT EXISTS evaluation_responses_date ON evaluation_responses (submitted_at);
+"""
+
+# Columns of the registration nettskjema export (registration_results.tsv, and the ';' export of draft_email.py)
+REGISTRATION_COLUMNS = {'id': 'NR', 'title': 'workshop', 'name': 'var2', 'email': 'var3'}
+EVALUATION_TITLE_COLUMN = "Which workshop are you writing your answers for?"
+
+
+def _iso_date(date: str, date_format: str = '%d.%m.%y') -> str:
+    # ISO dates sort in date order; dates that cannot be parsed are kept as they are
+    try:
+        return datetime.strptime(date, date_format).strftime('%Y-%m-%d')
+    except ValueError:
+        return date
+
+
+def _as_int(value) -> Optional[int]:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class Store:
+    """
+    The SQLite store. Use as a context manager, or call `close`.
+
+    Args:
+        path (str): The database file, created with its tables if it does not exist.
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError(f"Unsupported store version in '{path}': {version}")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+            self.connection.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+
+    def __enter__(self) -> 'Store':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _upsert(self, table: str, key: Tuple[str, ...], rows: List[Dict[str, object]], clear: bool = False) -> int:
+        # All rows in one transaction; with `clear`, the rows already in the table are replaced
+        with self.connection:
+            if clear:
+                self.connection.execute(f"DELETE FROM {table}")
+            if rows:
+                columns = list(rows[0])
+                updates = ', '.join(f"{column} = excluded.{column}" for column in columns if column not in key)
+                sql = (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                       f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET {updates}")
+                self.connection.executemany(sql, ([row[column] for column in columns] for row in rows))
+        return len(rows)
+
+    def import_submissions(self, path: str, nettskjema_columns: Mapping[str, str], delimiter: str = ';') -> int:
+        """
+        Import the export of the call for proposals (`inputs/submission.csv`).
+
+        Args:
+            path (str): The export.
+            nettskjema_columns (Mapping[str, str]): The column names, see `config/nettskjema_columns.yaml`.
+            delimiter (str): The delimiter of the export.
+
+        Returns:
+            int: The number of submissions imported.
+        """
+        with open(path, newline='', encoding='utf-8') as file:
+            rows = [{
+                'submission_id': str(row[nettskjema_columns['id_column']]),
+                'title': row.get(nettskjema_columns['title_column']),
+                'instructor': row.get(nettskjema_columns['instructor_column']),
+                'email': row.get(nettskjema_columns['email_column']),
+                'data': json.dumps(row, ensure_ascii=False),
+            } for row in csv.DictReader(file, delimiter=delimiter)]
+        return self._upsert('submissions', ('submission_id',), rows)
+
+    def import_schedule(self, schedule: Mapping[str, Workshop]) -> int:
+        """
+        Import the schedule, one row per day of each workshop, replacing the workshops already stored.
+
+        Args:
+            schedule (Mapping[str, Workshop]): The schedule, see `obiwow.schedule_loader.load_schedule`.
+
+        Returns:
+            int: The number of rows imported.
+        """
+        rows = []
+        for workshop in schedule.values():
+            for day, date in enumerate(workshop.dates or ('',)):
+                rows.append({
+                    'workshop_id': workshop.id,
+                    'day': day,
+                    'date': _iso_date(date),
+                    'title': workshop.title,
+                    'room': workshop.rooms[day] if day < len(workshop.rooms) else
+                    workshop.rooms[0] if workshop.rooms else None,
+                    'timeslot': workshop.timeslots[day] if day < len(workshop.timeslots) else
+                    workshop.timeslots[0] if workshop.timeslots else None,
+                    'max_attendance': _as_int(workshop.max_attendance),
+                })
+        return self._upsert('schedule', ('workshop_id', 'day'), rows, clear=True)
+
+    def import_registrations(self, path: str, title_matcher: Optional[TitleMatcher] = None, delimiter: str = '\t',
+                             columns: Mapping[str, str] = REGISTRATION_COLUMNS) -> int:
+        """
+        Import an export of the registration nettskjema (`registration_results.tsv`, or the `;` separated export
+        read by `draft_email.py`).
+
+        Args:
+            path (str): The export.
+            title_matcher (Optional[TitleMatcher]): Matches the workshop titles of the form to workshop IDs.
+                Registrations are stored without workshop ID if None or if the title cannot be matched.
+            delimiter (str): The delimiter of the export.
+            columns (Mapping[str, str]): The names of the 'id', 'title', 'name' and 'email' columns.
+                Rows are identified by their email and title if there is no ID column.
+
+        Returns:
+            int: The number of registrations imported.
+        """
+        rows = []
+        with open(path, newline='', encoding='utf-8') as file:
+            for position, row in enumerate(csv.DictReader(file, delimiter=delimiter)):
+                form_title = row.get(columns['title'], '')
+                email = row.get(columns['email'], '')
+                title_match = title_matcher.match(form_title.replace('_', ' ')) if title_matcher else None
+                rows.append({
+                    'registration_id': row.get(columns['id']) or hash_content(email.lower(), form_title)[:16],
+                    'position': position,
+                    'workshop_id': title_match.workshop_id if title_match else None,
+                    'form_title': form_title,
+                    'email': email,
+                    'name': row.get(columns['name'], ''),
+                    'source': Path(path).name,
+                })
+        return self._upsert('registrations', ('registration_id',), rows)
+
+    def import_evaluations(self, path: str, title_matcher: Optional[TitleMatcher] = None,
+                           title_column: str = EVALUATION_TITLE_COLUMN) -> int:
+        """
+        Import the CSV export of the evaluation Google Form. Responses are identified by the hash of their answers;
+        the first column is the time of the response.
+
+        Args:
+            path (str): The export.
+            title_matcher (Optional[TitleMatcher]): Matches the workshop titles of the form to workshop IDs.
+            title_column (str): The column with the workshop title.
+
+        Returns:
+            int: The number of responses imported.
+        """
+        rows = []
+        with open(path, newline='', encoding='utf-8') as file:
+            reader = csv.DictReader(file)
+            time_column = reader.fieldnames[0] if reader.fieldnames else None
+            for row in reader:
+                form_title = row.get(title_column, '')
+                title_match = title_matcher.match(form_title) if title_matcher else None
+                rows.append({
+                    'response_id': hash_content(row)[:16],
+                    'workshop_id': title_match.workshop_id if title_match else None,
+                    'form_title': form_title,
+                    'submitted_at': row.get(time_column) if time_column else None,
+                    'data': json.dumps(row, ensure_ascii=False),
+                })
+        return self._upsert('evaluation_responses', ('response_id',), rows)
+
+    def registration_counts(self) -> Dict[str, int]:
+        """
+        Return the number of participants registered per workshop ID.
+        """
+        return dict(self.connection.execute(
+            "SELECT workshop_id, COUNT(DISTINCT lower(email)) FROM registrations "
+            "WHERE workshop_id IS NOT NULL GROUP BY workshop_id"))
+
+    def registered_emails(self, workshop_id: str) -> List[str]:
+        """
+        Return the emails registered for a workshop, in registration order.
+        """
+        return [email for email, in self.connection.execute(
+            "SELECT email FROM registrations WHERE workshop_id = ? ORDER BY position", (str(workshop_id),))]
+
+    def registrations_of(self, email: str) -> List[str]:
+        """
+        Return the IDs of the workshops an email is registered for, in registration order.
+        """
+        return [workshop_id for workshop_id, in self.connection.execute(
+            "SELECT workshop_id FROM registrations WHERE email = ? ORDER BY position", (email,))]
+
+    def workshops_on(self, date: str) -> List[str]:
+        """
+        Return the IDs of the workshops on a date ('dd.mm.yy' as in the schedule, or 'YYYY-MM-DD').
+        """
+        return [workshop_id for workshop_id, in self.connection.execute(
+            "SELECT workshop_id FROM schedule WHERE date = ? ORDER BY timeslot", (_iso_date(date),))]
+
+    def fill_rates(self) -> List[Tuple[str, str, int, Optional[int]]]:
+        """
+        Return the ID, title, number of registered participants and max attendance of each workshop,
+        by decreasing number of participants.
+        """
+        return self.connection.execute(
+            "SELECT s.workshop_id, s.title, COUNT(DISTINCT lower(r.email)) AS registered, s.max_attendance "
+            "FROM schedule s LEFT JOIN registrations r ON r.workshop_id = s.workshop_id "
+            "WHERE s.day = 0 GROUP BY s.workshop_id ORDER BY registered DESC, s.workshop_id").fetchall()
+
+    def table_counts(self) -> Dict[str, int]:
+        """
+        Return the number of rows of each table.
+        """
+        return {table: self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('submissions', 'schedule', 'registrations', 'evaluation_responses')}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='obiwow store',
+                                     description='Import exports into the local SQLite store and list the fill rates')
+    parser.add_argument('--db', default='outputs/obiwow.sqlite',
+                        help='The SQLite store (default: outputs/obiwow.sqlite)')
+    parser.add_argument('--schedule', default='outputs/schedule.json',
+                        help='Schedule JSON written by generate_website.py (default: outputs/schedule.json)')
+    parser.add_argument('--submissions', help="Export of the call for proposals, ';' separated")
+    parser.add_argument('--registrations', action='append', default=[],
+                        help='Export of the registration nettskjema, tab separated (.tsv) or ; separated')
+    parser.add_argument('--evaluations', help='CSV export of the evaluation form')
+    parser.add_argument('--config', default='config', help='Folder with the configuration files (default: config)')
+    args = parser.parse_args(argv)
+
+    from obiwow.schedule_loader import load_schedule
+
+    with Store(args.db) as store:
+        title_matcher = None
+        if Path(args.schedule).is_file():
+            with load_schedule(args.schedule, use_index=True) as schedule:
+                store.import_schedule(schedule)
+                title_matcher = TitleMatcher.from_schedule(schedule)
+        else:
+            print(f"WARNING: No schedule at '{args.schedule}', workshop IDs are not matched")
+        if args.submissions:
+            from obiwow.data_reader_parser import parse_yaml
+            nettskjema_columns = parse_yaml(str(Path(args.config) / 'nettskjema_columns.yaml'))
+            store.import_submissions(args.submissions, nettskjema_columns)
+        for path in args.registrations:
+            store.import_registrations(path, title_matcher, delimiter='\t' if path.endswith('.tsv') else ';')
+        if args.evaluations:
+            store.import_evaluations(args.evaluations, title_matcher)
+
+        for table, count in store.table_counts().items():
+            print(f"{table}:\t{count}")
+        for workshop_id, title, registered, max_attendance in store.fill_rates():
+            print(f"{workshop_id}\t{registered}/{max_attendance if max_attendance is not None else '-'}\t{title}")
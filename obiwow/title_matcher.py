@@ -0,0 +1,173 @@
+"""
+Reconcile workshop titles typed into forms (nettskjema registrations, Google Form evaluations) with the schedule.
+
+Form titles are often truncated, have underscores instead of spaces or lack punctuation, so exact comparison fails.
+TitleMatcher first compares titles after `normalize_title`, then scores the schedule titles sharing character
+trigrams with the form title (found with an inverted index) and keeps the best one above a threshold.
+Matches that were not exact are kept for an audit table, so the guesses can be checked by hand.
+"""
+import csv
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional
+
+from obiwow.schedule_loader import ScheduleView, normalize_title
+
+# Minimal score (Dice coefficient of the trigram sets) to accept a guessed match
+DEFAULT_THRESHOLD = 0.5
+
+AUDIT_COLUMNS = ['form_title', 'workshop_id', 'schedule_title', 'score', 'runner_up_id', 'runner_up_score']
+
+
+def _simplify(title: str) -> str:
+    title = str(title).replace("_", " ").lower()
+    title = re.sub(r"[^\w\s]", "", title)
+    return " ".join(title.split())
+
+
+def title_trigrams(title: str) -> FrozenSet[str]:
+    """
+    Return the character trigrams of a title, after lowercasing and removing punctuation and underscores.
+
+    Args:
+        title (str): The title.
+
+    Returns:
+        FrozenSet[str]: The trigrams, including the ones at the start and end of each word.
+    """
+    trigrams = set()
+    for word in _simplify(title).split():
+        padded = f"  {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(trigrams)
+
+
+@dataclass(frozen=True)
+class TitleMatch:
+    """
+    The workshop a form title was matched to. `exact` is False when the match was guessed from trigrams.
+    """
+    form_title: str
+    workshop_id: str
+    schedule_title: str
+    score: float
+    exact: bool
+    runner_up_id: Optional[str] = None
+    runner_up_score: float = 0.0
+
+
+class TitleMatcher:
+    """
+    Index of the schedule titles for matching form titles to workshop IDs.
+
+    Results are memoized per form title, so matching thousands of rows only scores each distinct title once.
+    """
+
+    def __init__(self, titles: Mapping[str, str], threshold: float = DEFAULT_THRESHOLD,
+                 aliases: Optional[Mapping[str, str]] = None):
+        """
+        Args:
+            titles (Mapping[str, str]): Workshop titles by workshop ID.
+            threshold (float): Minimal score to accept a guessed match.
+            aliases (Optional[Mapping[str, str]]): Form titles of renamed workshops, mapped to their schedule title.
+        """
+        self.titles = {str(workshop_id): title for workshop_id, title in titles.items()}
+        self.threshold = threshold
+        self._exact: Dict[str, str] = {}
+        self._simplified: Dict[str, str] = {}
+        self._trigrams: Dict[str, FrozenSet[str]] = {}
+        self._postings: Dict[str, List[str]] = defaultdict(list)
+        for workshop_id, title in self.titles.items():
+            self._exact.setdefault(normalize_title(title), workshop_id)
+            self._simplified.setdefault(_simplify(title), workshop_id)
+            self._trigrams[workshop_id] = title_trigrams(title)
+            for trigram in self._trigrams[workshop_id]:
+                self._postings[trigram].append(workshop_id)
+        self.aliases = {normalize_title(form_title): normalize_title(title)
+                        for form_title, title in (aliases or {}).items()}
+        self._memo: Dict[str, Optional[TitleMatch]] = {}
+
+    @classmethod
+    def from_schedule(cls, schedule: ScheduleView, **kwargs) -> 'TitleMatcher':
+        """
+        Build the matcher from the schedule, see `obiwow.schedule_loader.load_schedule`.
+        """
+        return cls({workshop_id: workshop.title for workshop_id, workshop in schedule.items()}, **kwargs)
+
+    def match(self, form_title: str) -> Optional[TitleMatch]:
+        """
+        Match a form title to a workshop.
+
+        Args:
+            form_title (str): The title as given in the form.
+
+        Returns:
+            Optional[TitleMatch]: The match, or None if no workshop scores above the threshold.
+        """
+        form_title = str(form_title)
+        if form_title not in self._memo:
+            self._memo[form_title] = self._match(form_title)
+        return self._memo[form_title]
+
+    def _match(self, form_title: str) -> Optional[TitleMatch]:
+        normalized = normalize_title(form_title)
+        normalized = self.aliases.get(normalized, normalized)
+        workshop_id = self._exact.get(normalized) or self._exact.get(normalize_title(normalized.replace("_", " ")))
+        if workshop_id is not None:
+            return TitleMatch(form_title, workshop_id, self.titles[workshop_id], 1.0, exact=True)
+
+        workshop_id = self._simplified.get(_simplify(normalized))
+        if workshop_id is not None:
+            return TitleMatch(form_title, workshop_id, self.titles[workshop_id], 1.0, exact=False)
+
+        trigrams = title_trigrams(normalized)
+        if not trigrams:
+            return None
+        shared = Counter(workshop_id for trigram in trigrams for workshop_id in self._postings.get(trigram, ()))
+        scores = sorted(((2 * count / (len(trigrams) + len(self._trigrams[workshop_id])), workshop_id)
+                         for workshop_id, count in shared.items()), key=lambda item: (-item[0], item[1]))
+        if not scores or scores[0][0] < self.threshold:
+            return None
+        score, workshop_id = scores[0]
+        runner_up_score, runner_up_id = scores[1] if len(scores) > 1 else (0.0, None)
+        return TitleMatch(form_title, workshop_id, self.titles[workshop_id], round(score, 3), exact=False,
+                          runner_up_id=runner_up_id, runner_up_score=round(runner_up_score, 3))
+
+    def match_ids(self, form_titles: Iterable[str]) -> List[Optional[str]]:
+        """
+        Return the workshop ID of each form title, None for titles that could not be matched.
+        """
+        matches = [self.match(form_title) for form_title in form_titles]
+        return [match.workshop_id if match else None for match in matches]
+
+    def audit_rows(self) -> List[Dict[str, object]]:
+        """
+        Return one row per distinct form title that was not matched exactly, unmatched titles included.
+        """
+        rows = []
+        for form_title, match in self._memo.items():
+            if match is None:
+                rows.append(dict(zip(AUDIT_COLUMNS, [form_title, '', '', 0.0, '', 0.0])))
+            elif not match.exact:
+                rows.append(dict(zip(AUDIT_COLUMNS, [form_title, match.workshop_id, match.schedule_title, match.score,
+                                                     match.runner_up_id or '', match.runner_up_score])))
+        return rows
+
+    def write_audit(self, path: str, delimiter: str = '\t') -> int:
+        """
+        Write the titles that were guessed or not matched, see `audit_rows`.
+
+        Args:
+            path (str): The output file.
+            delimiter (str): The delimiter of the output file.
+
+        Returns:
+            int: The number of rows written.
+        """
+        rows = self.audit_rows()
+        with open(path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=AUDIT_COLUMNS, delimiter=delimiter)
+            writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
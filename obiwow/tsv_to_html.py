@@ -1,6 +1,7 @@
 import csv
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional
@@ -8,6 +9,8 @@ from typing import Optional
 import pandas as pd
 from mako.template import Template
 
+from obiwow.render_cache import RenderCache, file_fingerprint, hash_content
+
 
 def room_info(data, dict_room: dict, schedule_columns: dict) -> tuple:
     """
@@ -34,6 +37,10 @@ def room_info(data, dict_room: dict, schedule_columns: dict) -> tuple:
     return room_name, room_url
 
 
+# Use a single regex pattern to match numbers, bullet points, or dashes
+LIST_ITEM_PATTERN = re.compile(r'(\d+- |\d+\. |•|- |\*)')
+
+
 def make_list(raw_string: str) -> tuple[list, bool]:
     """
     Split string into list of strings based on bullet points, dashes, or numbers.
@@ -47,11 +54,9 @@ def make_list(raw_string: str) -> tuple[list, bool]:
     """
     split_string = []
     bool_header = False
-    # Use a single regex pattern to match numbers, bullet points, or dashes
-    pattern = r'(\d+- |\d+\. |•|- |\*)'
-    if re.search(pattern, raw_string):
-        split_string = re.split(pattern, raw_string)
-        split_string = [elm.strip() for elm in split_string if not re.match(pattern, elm)]
+    if LIST_ITEM_PATTERN.search(raw_string):
+        split_string = LIST_ITEM_PATTERN.split(raw_string)
+        split_string = [elm.strip() for elm in split_string if not LIST_ITEM_PATTERN.match(elm)]
         # Check for header
         if ":" in split_string[0] and not (raw_string[0].isdigit() or raw_string[0] in ['•', '-', '*']):
             split_string = [split_string[0].rsplit(': ', 1)[0]] + split_string[1:]
@@ -74,7 +79,13 @@ def get_clean_value(row: pd.Series, column_name: str, default: str = "") -> str:
     Returns:
         str: The cleaned string value.
     """
-    value = row.get(column_name, default)
+    return clean_value(row.get(column_name, default), default)
+
+
+def clean_value(value, default: str = "") -> str:
+    """
+    Return a cleaned string for a single value, see `get_clean_value`.
+    """
     if pd.isna(value) or value is None:
         return default
     if isinstance(value, float) and value.is_integer():
@@ -84,6 +95,31 @@ def get_clean_value(row: pd.Series, column_name: str, default: str = "") -> str:
     return str(value).strip()
 
 
+def clean_column(df: pd.DataFrame, column_name: str, default=None) -> pd.Series:
+    """
+    Clean a whole column at once with the same rules as `get_clean_value`.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to read from.
+        column_name (str): The column to clean.
+        default: Fallback for missing or NaN values, either a scalar or a Series aligned with `df`.
+
+    Returns:
+        pd.Series: The cleaned values as Python strings (object dtype).
+    """
+    if default is None:
+        default = ""
+    if isinstance(default, pd.Series):
+        defaults = default.astype(object)
+    else:
+        defaults = pd.Series([default] * len(df), index=df.index, dtype=object)
+    if column_name not in df.columns:
+        return defaults
+    cleaned = pd.Series([clean_value(value, None) for value in df[column_name].tolist()],
+                        index=df.index, dtype=object)
+    return cleaned.where(cleaned.notna(), defaults)
+
+
 def parse_workshop_date(date_str: str) -> Optional[datetime]:
     """
     Parse a workshop date string using multiple possible formats.
@@ -136,10 +172,23 @@ def parse_workshop_date(date_str: str) -> Optional[datetime]:
     return None
 
 
-def generate_workshop_body(submission_schedule_df: pd.DataFrame, nettskjema_columns: dict, schedule_columns,
-                           yearly: dict, rooms: dict) -> list:
+def workshop_body_template_path() -> str:
     """
-    Generates the HTML body for each workshop using the Mako template.
+    Return the path to the Mako template used for each workshop section.
+    """
+    project_root = Path(__file__).resolve().parent.parent
+    return os.path.join(project_root, 'template', 'workshop_body_template.html')
+
+
+def build_workshop_contexts(submission_schedule_df: pd.DataFrame, nettskjema_columns: dict, schedule_columns,
+                            yearly: dict, rooms: dict, seats_badges: Optional[dict] = None) -> list:
+    """
+    Build the template variables for each workshop section, in schedule order.
+
+    All variables are computed column-wise for all workshops at once: cleaned strings, formatted dates,
+    time ranges, learning outcome and pre-requisite lists, room URLs and registration links.
+    Networking events and duplicate workshops are skipped, and multi-day workshops get their full date span.
+    The returned dictionaries only hold plain Python values, so they can be sent to worker processes.
 
     Args:
         submission_schedule_df (pd.DataFrame): DataFrame containing the workshop schedule.
@@ -147,136 +196,218 @@ def generate_workshop_body(submission_schedule_df: pd.DataFrame, nettskjema_colu
         schedule_columns (dict): Dictionary mapping column names for the schedule data.
         yearly (dict): Dictionary containing yearly configuration values.
         rooms (dict): Dictionary containing room information.
+        seats_badges (Optional[dict]): Seats-left badge HTML per workshop ID, see `obiwow.seat_badges`.
 
     Returns:
-        list: A list of HTML sections for each workshop.
+        list: A list of dictionaries with the template variables of each workshop.
     """
-
-    list_html_section = []
-
-    project_root = Path(__file__).resolve().parent.parent
-    template_path = os.path.join(project_root, 'template', 'workshop_body_template.html')
-    workshop_body_template = Template(filename=template_path)
-
-    seen_workshops = set()
-
-    for index, row in submission_schedule_df.iterrows():
-
-        networking_event = row[schedule_columns['networking_event_column']]
-        # Pass if networking event
-        if networking_event:
-            continue
-
-        # Check for duplicate workshop (by title + description)
-        this_title = get_clean_value(row, nettskjema_columns['title_column'], default="")
-        this_desc = get_clean_value(row, nettskjema_columns['description_column'], default="")
-        key = (this_title.strip().lower(), this_desc.strip().lower())
-        if key in seen_workshops:
-            continue
-        seen_workshops.add(key)
-
-        # Preparing data for workshop body
-        is_multiday = False  # Initialize flag for every row
-        workshop_number = get_clean_value(row, schedule_columns['id_column'], default=str(index + 1))
-        schedule_title = get_clean_value(row, schedule_columns['title_column'],
-                                         default=f"Workshop {workshop_number}")
-        workshop_title = get_clean_value(row, nettskjema_columns['title_column'],
-                                         default=schedule_title or f"Workshop {workshop_number}")
-        workshop_date_str = get_clean_value(row, schedule_columns['date_column'])
-        parsed_date = parse_workshop_date(workshop_date_str)
-        if parsed_date:
-            workshop_date = parsed_date.strftime("%A %d %B %Y")
-        else:
-            workshop_date = workshop_date_str
-        start_time = get_clean_value(row, schedule_columns['start_time_column'])
-        end_time = get_clean_value(row, schedule_columns['end_time_column'])
-        if start_time and end_time:
-            workshop_time = f"{start_time}-{end_time}"
-        else:
-            workshop_time = start_time or end_time or ""
-        # For multi-day range, do NOT add block times to the date string
-        if is_multiday:
-            workshop_time = ""  # do not append any block time
-        elif workshop_time == '9:00-16:00':
-            workshop_time = '9:00-12:00 13:00-16:00'
-        workshop_ics_path = yearly['ics_folder'] + str(workshop_number) + '.ics'
-        room_name, room_url = room_info(row, rooms, schedule_columns)
-        workshop_description = get_clean_value(row, nettskjema_columns['description_column'])
-
-        # --- Multi-day workshop date span fix ---
-        is_multiday = (
-            " - Day 1" in schedule_title and not row.get('multi_day_final', True)
-        )
-        if is_multiday:
+    if submission_schedule_df.empty:
+        return []
+
+    df = submission_schedule_df
+
+    # Pass if networking event
+    keep = ~df[schedule_columns['networking_event_column']].map(bool).astype(bool)
+
+    # Check for duplicate workshop (by title + description)
+    nettskjema_title = clean_column(df, nettskjema_columns['title_column'])
+    description = clean_column(df, nettskjema_columns['description_column'])
+    dedup_key = pd.DataFrame({'title': nettskjema_title.str.lower(), 'description': description.str.lower()})
+    keep &= ~dedup_key[keep].duplicated().reindex(df.index, fill_value=True)
+    if not keep.any():
+        return []
+
+    workshops = df[keep]
+    description = description[keep]
+
+    # Preparing data for workshop body
+    workshop_number = clean_column(workshops, schedule_columns['id_column'],
+                                   default=pd.Series([str(index + 1) for index in workshops.index],
+                                                     index=workshops.index))
+    schedule_title = clean_column(workshops, schedule_columns['title_column'],
+                                  default="Workshop " + workshop_number)
+    workshop_title = clean_column(workshops, nettskjema_columns['title_column'],
+                                  default=schedule_title.where(schedule_title != "", "Workshop " + workshop_number))
+
+    # Dates are parsed once per distinct value
+    workshop_date_str = clean_column(workshops, schedule_columns['date_column'])
+    formatted_dates = {}
+    for date_str in workshop_date_str.unique():
+        parsed_date = parse_workshop_date(date_str)
+        formatted_dates[date_str] = parsed_date.strftime("%A %d %B %Y") if parsed_date else date_str
+    workshop_date = workshop_date_str.map(formatted_dates)
+
+    start_time = clean_column(workshops, schedule_columns['start_time_column'])
+    end_time = clean_column(workshops, schedule_columns['end_time_column'])
+    workshop_time = (start_time + "-" + end_time).where((start_time != "") & (end_time != ""),
+                                                        start_time.where(start_time != "", end_time))
+    workshop_time = workshop_time.replace('9:00-16:00', '9:00-12:00 13:00-16:00')
+    workshop_ics_path = yearly['ics_folder'] + workshop_number + '.ics'
+
+    room_column = schedule_columns.get('room_column')
+    if room_column in workshops:
+        room_name = workshops[room_column].map(lambda value: str(value).strip()).astype(object)
+    else:
+        room_name = pd.Series('nan', index=workshops.index, dtype=object)
+    # A room listed in rooms.yaml without details has no URL
+    room_url = pd.Series([(rooms.get(name) or {}).get('url') for name in room_name], index=workshops.index,
+                         dtype=object)
+    room_name = room_name.where(room_name != 'nan', "No room information available")
+
+    # --- Multi-day workshop date span fix ---
+    final_day = workshops.get('multi_day_final', pd.Series(True, index=workshops.index))
+    is_multiday = schedule_title.str.contains(" - Day 1", regex=False) & ~final_day.fillna(True).astype(bool)
+    if is_multiday.any():
+        all_titles = df[schedule_columns['title_column']]
+        last_days = df[df['multi_day_final'] == True]
+        for index in workshops.index[is_multiday]:
             # Grab the base title
-            base_title = schedule_title.rsplit(" - Day", 1)[0].strip()
-            # Filter all rows in submission_schedule_df for matching base title
-            candidates = submission_schedule_df[
-                submission_schedule_df[schedule_columns['title_column']].str.startswith(base_title)
-            ]
-            # Find the last day (multi_day_final True)
-            last_day_row = candidates[candidates['multi_day_final'] == True]
+            base_title = schedule_title[index].rsplit(" - Day", 1)[0].strip()
+            # Find the last day (multi_day_final True) among the rows starting with the base title
+            last_day_row = last_days[all_titles[last_days.index].str.startswith(base_title).fillna(False)]
             if not last_day_row.empty:
-                # Use the first day info from current row
-                first_date = parsed_date.strftime("%A %d %B %Y") if parsed_date else workshop_date_str
-                first_time = start_time
-                # Use the last day info
                 last_row = last_day_row.iloc[0]
                 last_date_raw = get_clean_value(last_row, schedule_columns['date_column'])
                 last_date_obj = parse_workshop_date(last_date_raw)
                 last_date = last_date_obj.strftime("%A %d %B %Y") if last_date_obj else last_date_raw
                 last_end_time = get_clean_value(last_row, schedule_columns['end_time_column'])
-                workshop_date = f"{first_date} {first_time} - {last_date} {last_end_time}"
+                workshop_date[index] = f"{workshop_date[index]} {start_time[index]} - {last_date} {last_end_time}"
+    # --- End multi-day fix ---
+
+    learning_outcomes = [make_list(value) if value else ([], False)
+                         for value in clean_column(workshops, nettskjema_columns['outcome_column'])]
+    pre_requisites = [make_list(value) if value else ([], False)
+                      for value in clean_column(workshops, nettskjema_columns['pre_requisite_column'])]
+
+    register_title = workshop_title.where(workshop_title != "",
+                                          schedule_title.where(schedule_title != "", "workshop_" + workshop_number))
+    register_title_slug = register_title.str.replace(" ", "_")
+    register_link = yearly['pre_register_link'] + register_title_slug + yearly['post_register_link']
+
+    columns = {
+        'workshop_number': workshop_number,
+        'workshop_title': workshop_title,
+        'workshop_date': workshop_date,
+        'workshop_time': workshop_time,
+        'workshop_ics_path': workshop_ics_path,
+        'room_map_url': room_url,
+        'room_name': room_name,
+        'workshop_description': description,
+        'workshop_target_audience': clean_column(workshops, nettskjema_columns['target_column']),
+        'workshop_material': clean_column(workshops, nettskjema_columns['material_column']),
+        'workshop_main_instructor': clean_column(workshops, schedule_columns['main_instructor_column']),
+        'workshop_helper_instructor': clean_column(workshops, schedule_columns['helper_instructor_column']),
+        'register_link': register_link,
+    }
+    column_values = {name: values.tolist() for name, values in columns.items()}
+
+    workshop_contexts = []
+    for position in range(len(workshops)):
+        context = {name: values[position] for name, values in column_values.items()}
+        context['workshop_learning_outcomes'], context['workshop_learning_outcomes_header'] = \
+            learning_outcomes[position]
+        context['workshop_pre_requisites'], context['workshop_pre_requisites_header'] = pre_requisites[position]
+        context['registration_is_open'] = yearly['registration_open']
+        context['seats_badge'] = (seats_badges or {}).get(context['workshop_number'], "")
+        workshop_contexts.append(context)
+    return workshop_contexts
+
+
+_worker_template = None
+
+
+def _init_render_worker(template_path: str) -> None:
+    """
+    Compile the workshop template once per worker process.
+    """
+    global _worker_template
+    _worker_template = Template(filename=template_path)
+
+
+def _render_in_worker(template_vars: dict) -> str:
+    return _worker_template.render(**template_vars)
+
+
+def render_workshop_bodies(workshop_contexts: list, cache: Optional[RenderCache] = None, yearly_used: dict = None,
+                           workers: int = 1) -> list:
+    """
+    Render workshop sections from their template variables, keeping the order of `workshop_contexts`.
+
+    Args:
+        workshop_contexts (list): Template variables for each workshop, see `build_workshop_contexts`.
+        cache (Optional[RenderCache]): Cache of rendered sections. No caching if None.
+        yearly_used (dict): Yearly configuration values that are part of the cache key.
+        workers (int): Number of worker processes. Renders in the current process if 1 or less.
+
+    Returns:
+        list: A list of HTML sections for each workshop.
+    """
+    template_path = workshop_body_template_path()
+    list_html_section = [None] * len(workshop_contexts)
+
+    # Take what we can from the cache, only the remaining sections need rendering
+    cache_keys = {}
+    to_render = []
+    if cache is not None:
+        template_fingerprint = file_fingerprint(template_path)
+        for position, template_vars in enumerate(workshop_contexts):
+            cache_key = hash_content(template_fingerprint, template_vars, yearly_used or {})
+            cached = cache.get(cache_key)
+            if cached is None:
+                cache_keys[position] = cache_key
+                to_render.append(position)
             else:
-                # Fallback to single-day logic
-                workshop_date = workshop_date if workshop_date else workshop_date_str
-        # --- End multi-day fix ---
-
-        outcome_value = get_clean_value(row, nettskjema_columns['outcome_column'])
-        if outcome_value:
-            list_learning_outcome, bool_header_outcome = make_list(outcome_value)
-        else:
-            list_learning_outcome, bool_header_outcome = [], False
-        workshop_target_audience = get_clean_value(row, nettskjema_columns['target_column'])
-        pre_req_value = get_clean_value(row, nettskjema_columns['pre_requisite_column'])
-        if pre_req_value:
-            list_pre_requisite, bool_header_pre_req = make_list(pre_req_value)
-        else:
-            list_pre_requisite, bool_header_pre_req = [], False
-        workshop_material = get_clean_value(row, nettskjema_columns['material_column'])
-        workshop_main_instructor = get_clean_value(row, schedule_columns['main_instructor_column'])
-        workshop_helper_instructor = get_clean_value(row, schedule_columns['helper_instructor_column'])
-        registration_is_open = yearly['registration_open']
-        register_title_slug = (workshop_title or schedule_title or f"workshop_{workshop_number}").replace(" ", "_")
-        register_link = yearly['pre_register_link'] + register_title_slug + yearly['post_register_link']
-
-        # Using Mako template to render the workshop body
-        workshop_body_rendered = workshop_body_template.render(
-            workshop_number=workshop_number,
-            workshop_title=workshop_title,
-            workshop_date=workshop_date,
-            workshop_time=workshop_time,
-            workshop_ics_path=workshop_ics_path,
-            room_map_url=room_url,
-            room_name=room_name,
-            workshop_description=workshop_description,
-            workshop_learning_outcomes=list_learning_outcome,
-            workshop_learning_outcomes_header=bool_header_outcome,
-            workshop_target_audience=workshop_target_audience,
-            workshop_pre_requisites=list_pre_requisite,
-            workshop_pre_requisites_header=bool_header_pre_req,
-            workshop_material=workshop_material,
-            workshop_main_instructor=workshop_main_instructor,
-            workshop_helper_instructor=workshop_helper_instructor,
-            registration_is_open=registration_is_open,
-            register_link=register_link,
-        )
-        list_html_section.append(workshop_body_rendered)
+                list_html_section[position] = cached
+    else:
+        to_render = list(range(len(workshop_contexts)))
+
+    contexts_to_render = [workshop_contexts[position] for position in to_render]
+    if workers > 1 and len(contexts_to_render) > 1:
+        chunksize = max(1, len(contexts_to_render) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker,
+                                 initargs=(template_path,)) as executor:
+            rendered = list(executor.map(_render_in_worker, contexts_to_render, chunksize=chunksize))
+    else:
+        workshop_body_template = Template(filename=template_path)
+        rendered = [workshop_body_template.render(**template_vars) for template_vars in contexts_to_render]
+
+    for position, workshop_body_rendered in zip(to_render, rendered):
+        list_html_section[position] = workshop_body_rendered
+        if cache is not None:
+            cache.put(cache_keys[position], workshop_body_rendered)
 
     return list_html_section
 
 
-def generate_schedule_table(schedule_df: pd.DataFrame, schedule_columns: dict, yearly: dict) -> str:
+def generate_workshop_body(submission_schedule_df: pd.DataFrame, nettskjema_columns: dict, schedule_columns,
+                           yearly: dict, rooms: dict, cache: Optional[RenderCache] = None,
+                           workers: int = 1, seats_badges: Optional[dict] = None) -> list:
+    """
+    Generates the HTML body for each workshop using the Mako template.
+
+    Args:
+        submission_schedule_df (pd.DataFrame): DataFrame containing the workshop schedule.
+        nettskjema_columns (dict): Dictionary mapping column names for the nettskjema data.
+        schedule_columns (dict): Dictionary mapping column names for the schedule data.
+        yearly (dict): Dictionary containing yearly configuration values.
+        rooms (dict): Dictionary containing room information.
+        cache (Optional[RenderCache]): Cache of rendered sections, keyed by a hash of the template source,
+            the template variables and the yearly values used. No caching if None.
+        workers (int): Number of worker processes used for rendering. Renders in the current process if 1.
+        seats_badges (Optional[dict]): Seats-left badge HTML per workshop ID, see `obiwow.seat_badges`.
+
+    Returns:
+        list: A list of HTML sections for each workshop.
+    """
+    workshop_contexts = build_workshop_contexts(submission_schedule_df, nettskjema_columns, schedule_columns,
+                                                yearly, rooms, seats_badges)
+    yearly_used = {key: yearly.get(key) for key in ('ics_folder', 'registration_open',
+                                                     'pre_register_link', 'post_register_link')}
+    return render_workshop_bodies(workshop_contexts, cache=cache, yearly_used=yearly_used, workers=workers)
+
+
+def generate_schedule_table(schedule_df: pd.DataFrame, schedule_columns: dict, yearly: dict,
+                            seats_badges: Optional[dict] = None) -> str:
     schedule_df = schedule_df.copy()
 
     parsed_dates = schedule_df[schedule_columns['date_column']].apply(parse_workshop_date)
@@ -305,6 +436,7 @@ def generate_schedule_table(schedule_df: pd.DataFrame, schedule_columns: dict, y
         df_schedule=sorted_schedule_df,
         schedule_columns=schedule_columns,
         network_url=yearly['networking_event_url'],
+        seats_badges=seats_badges or {},
     )
     return schedule_table_rendered
 
@@ -0,0 +1,285 @@
+"""
+Persistent seat allocation, updated incrementally after the first run of registration_mail.py.
+
+AllocationState keeps the accepted participants and, per workshop, a waiting list as a heap ordered by
+registration time. A cancellation or a capacity change only promotes (or moves back) the participants concerned,
+and returns the delta: who is newly accepted, who lost their seat and which workshops' lists of registered
+participants changed.
+"""
+import heapq
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+import pandas as pd
+
+from obiwow.allocation import ACCEPTED, CLASH, WAITLIST, OverbookingPolicy, clash_matrix
+from obiwow.schedule_loader import Workshop
+
+STATE_VERSION = 1
+WAITING = 'waiting'
+CANCELLED = 'cancelled'
+
+
+def _email_key(email: str) -> str:
+    return str(email).strip().lower()
+
+
+@dataclass(frozen=True)
+class Registration:
+    """
+    A registration of a participant for a workshop. `position` is its rank in submission order.
+    """
+    position: int
+    email: str
+    name: str
+    workshop_id: str
+    form_title: str = ""
+
+
+@dataclass
+class AllocationDelta:
+    """
+    The changes made by an update of the allocation.
+
+    Attributes:
+        accepted (List[Registration]): Registrations promoted from the waiting list.
+        waitlisted (List[Registration]): Accepted registrations moved back to the waiting list.
+        cancelled (List[Registration]): Registrations removed.
+        changed_workshops (Set[str]): IDs of the workshops whose list of accepted participants changed.
+    """
+    accepted: List[Registration] = field(default_factory=list)
+    waitlisted: List[Registration] = field(default_factory=list)
+    cancelled: List[Registration] = field(default_factory=list)
+    changed_workshops: Set[str] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.accepted or self.waitlisted or self.cancelled)
+
+
+class AllocationState:
+    """
+    Accepted participants and waiting lists of all workshops.
+
+    Waiting lists are heaps of registration positions; cancelled registrations are left in the heap
+    and skipped when they reach the top. Registrations that clash with a workshop the participant is accepted to
+    stay on the waiting list, and are promoted if that seat is given up.
+    """
+
+    def __init__(self, registrations: Iterable[Registration], seats: Mapping[str, Optional[int]],
+                 clashes: Iterable[Tuple[str, str]] = (), accepted: Iterable[int] = (),
+                 cancelled: Iterable[int] = ()):
+        """
+        Args:
+            registrations (Iterable[Registration]): All registrations.
+            seats (Mapping[str, Optional[int]]): Number of seats per workshop ID, None for no limit.
+            clashes (Iterable[Tuple[str, str]]): Pairs of workshop IDs with overlapping sessions.
+            accepted (Iterable[int]): Positions of the accepted registrations.
+            cancelled (Iterable[int]): Positions of the cancelled registrations.
+        """
+        self.registrations: Dict[int, Registration] = {registration.position: registration
+                                                       for registration in registrations}
+        self.seats: Dict[str, Optional[int]] = dict(seats)
+        self.clashes: Set[Tuple[str, str]] = set()
+        for first, second in clashes:
+            self.clashes.update({(first, second), (second, first)})
+        self.status: Dict[int, str] = {position: WAITING for position in self.registrations}
+        self._by_email: Dict[str, List[int]] = {}
+        for position, registration in self.registrations.items():
+            self._by_email.setdefault(_email_key(registration.email), []).append(position)
+        self.accepted: Dict[str, Set[int]] = {workshop_id: set() for workshop_id in self.seats}
+        self._accepted_by_email: Dict[str, Set[str]] = {}
+        self._waitlists: Dict[str, List[int]] = {workshop_id: [] for workshop_id in self.seats}
+        for position in accepted:
+            self._accept(self.registrations[position])
+        for position in cancelled:
+            self.status[position] = CANCELLED
+        for position, registration in self.registrations.items():
+            if self.status[position] == WAITING:
+                self._waitlists.setdefault(registration.workshop_id, []).append(position)
+        for waitlist in self._waitlists.values():
+            heapq.heapify(waitlist)
+
+    @classmethod
+    def from_allocation(cls, allocation: pd.DataFrame, schedule: Mapping[str, Workshop],
+                        policy: Optional[OverbookingPolicy] = None, email_column: str = 'email',
+                        name_column: str = 'name', workshop_column: str = 'workshop_id',
+                        form_title_column: str = 'form_title') -> 'AllocationState':
+        """
+        Create the state from the result of `obiwow.allocation.allocate`. Clashing registrations are put on the
+        waiting list; duplicate and unknown ones are left out.
+        """
+        policy = policy or OverbookingPolicy()
+        registrations = []
+        accepted = []
+        for position, row in enumerate(allocation.itertuples(index=False)):
+            row = row._asdict()
+            if row['status'] not in (ACCEPTED, WAITLIST, CLASH):
+                continue
+            registrations.append(Registration(position, row[email_column], row.get(name_column, ""),
+                                              str(row[workshop_column]), row.get(form_title_column, "")))
+            if row['status'] == ACCEPTED:
+                accepted.append(position)
+        workshops = list(schedule.values())
+        matrix = clash_matrix(workshops)
+        clashes = [(first.id, second.id) for i, first in enumerate(workshops) for j, second in enumerate(workshops)
+                   if i < j and matrix[i, j]]
+        return cls(registrations, {workshop.id: policy.seats(workshop) for workshop in workshops}, clashes,
+                   accepted)
+
+    def _accept(self, registration: Registration) -> None:
+        self.status[registration.position] = ACCEPTED
+        self.accepted.setdefault(registration.workshop_id, set()).add(registration.position)
+        self._accepted_by_email.setdefault(_email_key(registration.email), set()).add(registration.workshop_id)
+
+    def _release(self, registration: Registration) -> None:
+        self.accepted[registration.workshop_id].discard(registration.position)
+        self._accepted_by_email[_email_key(registration.email)].discard(registration.workshop_id)
+
+    def _clashes(self, registration: Registration) -> bool:
+        return any((registration.workshop_id, workshop_id) in self.clashes
+                   for workshop_id in self._accepted_by_email.get(_email_key(registration.email), ()))
+
+    def _free_seats(self, workshop_id: str) -> float:
+        seats = self.seats.get(workshop_id)
+        return float('inf') if seats is None else seats - len(self.accepted.get(workshop_id, ()))
+
+    def _promote(self, workshop_id: str, delta: AllocationDelta) -> None:
+        waitlist = self._waitlists.setdefault(workshop_id, [])
+        skipped = []
+        while waitlist and self._free_seats(workshop_id) > 0:
+            position = heapq.heappop(waitlist)
+            registration = self.registrations[position]
+            if self.status[position] != WAITING:
+                continue
+            if self._clashes(registration):
+                skipped.append(position)
+                continue
+            self._accept(registration)
+            delta.accepted.append(registration)
+            delta.changed_workshops.add(workshop_id)
+        for position in skipped:
+            heapq.heappush(waitlist, position)
+
+    def _promote_clashing(self, registration: Registration, delta: AllocationDelta) -> None:
+        # Registrations of this participant that clashed with a seat they no longer have may now get a seat
+        for position in self._by_email[_email_key(registration.email)]:
+            other = self.registrations[position]
+            if self.status[position] == WAITING and (other.workshop_id, registration.workshop_id) in self.clashes:
+                self._promote(other.workshop_id, delta)
+
+    def find(self, email: str, workshop_id: str) -> Optional[Registration]:
+        """
+        Return the registration of a participant for a workshop that is not cancelled, or None.
+        """
+        for position in self._by_email.get(_email_key(email), ()):
+            if self.registrations[position].workshop_id == str(workshop_id) and self.status[position] != CANCELLED:
+                return self.registrations[position]
+        return None
+
+    def cancel(self, email: str, workshop_id: str) -> AllocationDelta:
+        """
+        Cancel a registration and promote participants from the waiting list into the freed seat,
+        including the participant's registrations that clashed with the cancelled workshop.
+
+        Args:
+            email (str): The email of the participant.
+            workshop_id (str): The ID of the workshop.
+
+        Returns:
+            AllocationDelta: The changes. Empty if there was no such registration.
+        """
+        delta = AllocationDelta()
+        registration = self.find(email, workshop_id)
+        if registration is None:
+            return delta
+        was_accepted = self.status[registration.position] == ACCEPTED
+        self.status[registration.position] = CANCELLED
+        delta.cancelled.append(registration)
+        if was_accepted:
+            self._release(registration)
+            delta.changed_workshops.add(registration.workshop_id)
+            self._promote(registration.workshop_id, delta)
+            self._promote_clashing(registration, delta)
+        return delta
+
+    def set_capacity(self, workshop_id: str, seats: Optional[int]) -> AllocationDelta:
+        """
+        Change the number of seats of a workshop. More seats promote participants from the waiting list;
+        fewer seats move the last accepted participants back to the top of the waiting list, and promote their
+        registrations that clashed with this workshop.
+
+        Args:
+            workshop_id (str): The ID of the workshop.
+            seats (Optional[int]): The new number of seats, None for no limit.
+
+        Returns:
+            AllocationDelta: The changes.
+        """
+        workshop_id = str(workshop_id)
+        delta = AllocationDelta()
+        self.seats[workshop_id] = seats
+        if self._free_seats(workshop_id) < 0:
+            excess = int(-self._free_seats(workshop_id))
+            for position in sorted(self.accepted[workshop_id])[-excess:]:
+                registration = self.registrations[position]
+                self._release(registration)
+                self.status[position] = WAITING
+                heapq.heappush(self._waitlists.setdefault(workshop_id, []), position)
+                delta.waitlisted.append(registration)
+            delta.changed_workshops.add(workshop_id)
+            for registration in list(delta.waitlisted):
+                self._promote_clashing(registration, delta)
+        else:
+            self._promote(workshop_id, delta)
+        return delta
+
+    def registered(self, workshop_id: str) -> List[Registration]:
+        """
+        Return the accepted registrations of a workshop, in submission order.
+        """
+        return [self.registrations[position] for position in sorted(self.accepted.get(str(workshop_id), ()))]
+
+    def form_title(self, workshop_id: str) -> str:
+        """
+        Return the title of a workshop in the registration form, "" if nobody registered for it.
+        """
+        return next((registration.form_title for registration in self.registrations.values()
+                     if registration.workshop_id == str(workshop_id)), "")
+
+    def waitlist(self, workshop_id: str) -> List[Registration]:
+        """
+        Return the waiting list of a workshop, in submission order.
+        """
+        return [self.registrations[position] for position in sorted(self._waitlists.get(str(workshop_id), []))
+                if self.status[position] == WAITING]
+
+    def save(self, path: str) -> None:
+        """
+        Write the state to a JSON file.
+        """
+        data = {
+            'version': STATE_VERSION,
+            'seats': self.seats,
+            'clashes': sorted([first, second] for first, second in self.clashes if first < second),
+            'registrations': [asdict(registration) for registration in self.registrations.values()],
+            'accepted': sorted(position for positions in self.accepted.values() for position in positions),
+            'cancelled': sorted(position for position, status in self.status.items() if status == CANCELLED),
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(data, file, indent=4)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'AllocationState':
+        """
+        Read a state written by `save`.
+        """
+        with open(path, 'r') as file:
+            data = json.load(file)
+        if data.get('version') != STATE_VERSION:
+            raise ValueError(f"Unsupported allocation state version in '{path}': {data.get('version')}")
+        return cls([Registration(**registration) for registration in data['registrations']], data['seats'],
+                   [tuple(pair) for pair in data['clashes']], data['accepted'], data['cancelled'])
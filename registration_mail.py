@@ -1,11 +1,77 @@
+import argparse
 import csv
 from pprint import pprint
-import json
-from datetime import datetime
 from pathlib import Path
+from typing import List, Optional
 
+import pandas as pd
 
-if  __name__ == '__main__':
+from obiwow.allocation import ACCEPTED, CLASH, OverbookingPolicy, allocate
+from obiwow.mail_render import ConfirmationMailRenderer, EmlMailWriter, TsvMailWriter, iter_participants
+from obiwow.participant_calendar import ParticipantCalendars, write_participant_calendars
+from obiwow.schedule_loader import load_schedule
+from obiwow.title_matcher import TitleMatcher
+from obiwow.waitlist import AllocationState
+
+
+def write_registered(workshop_email_folder: str, folder_name: str, emails: List[str]) -> None:
+    """
+    Write the list of registered participants of a workshop to `<workshop_email_folder>/<folder_name>/registered.txt`.
+    """
+    filepath = Path(workshop_email_folder + "/" + folder_name + "/registered.txt")
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    with filepath.open("w") as fh:
+        fh.write("\n".join(emails))
+
+
+def update_allocation(state_path: str, delta_path: str, workshop_email_folder: str, schedule,
+                      cancellations: List[List[str]], capacities: List[List[str]]) -> None:
+    """
+    Apply cancellations and capacity changes to the allocation saved by the last run, write the changes
+    to `delta_path` and rewrite only the `registered.txt` lists that changed.
+    """
+    state = AllocationState.load(state_path)
+    changes = []
+    changed_workshops = set()
+    for email, workshop_id in cancellations:
+        delta = state.cancel(email, workshop_id)
+        if not delta:
+            print(f"WARNING: No registration of {email} for workshop {workshop_id}")
+        changes.append(delta)
+    for workshop_id, seats in capacities:
+        changes.append(state.set_capacity(workshop_id, None if seats.lower() == 'none' else int(seats)))
+
+    with open(delta_path, 'w') as file:
+        for delta in changes:
+            changed_workshops |= delta.changed_workshops
+            for change, registrations in (('cancelled', delta.cancelled), ('accepted', delta.accepted),
+                                          ('waitlisted', delta.waitlisted)):
+                for registration in registrations:
+                    title = schedule[registration.workshop_id].title if registration.workshop_id in schedule else ""
+                    print(f"{change}: {registration.email} ({registration.name}) for '{title}'")
+                    file.write("\t".join([change, registration.email, registration.name,
+                                          registration.workshop_id, title]) + "\n")
+
+    for workshop_id in sorted(changed_workshops):
+        # Written also when nobody is left, so the list does not keep participants who cancelled
+        write_registered(workshop_email_folder, state.form_title(workshop_id),
+                         [registration.email for registration in state.registered(workshop_id)])
+    state.save(state_path)
+    print(f"{len(changed_workshops)} lists of registered participants changed")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Allocate seats and write the confirmation mails to mail.tsv')
+    # 1.25 in 2022, 1.7 in 2023
+    parser.add_argument('--overbooking-factor', type=float, default=1.7,
+                        help='Seats offered per workshop, as a factor of its max attendance (default: 1.7)')
+    parser.add_argument('--cancel', nargs=2, action='append', default=[], metavar=('EMAIL', 'WORKSHOP_ID'),
+                        help='Cancel a registration in the saved allocation and promote from the waiting list')
+    parser.add_argument('--capacity', nargs=2, action='append', default=[], metavar=('WORKSHOP_ID', 'SEATS'),
+                        help='Change the number of seats of a workshop in the saved allocation')
+    parser.add_argument('--eml-folder',
+                        help='Write one .eml file per participant to this folder instead of mail.tsv')
+    args = parser.parse_args(argv)
     
     year = 2023
     course_name = f"Oslo Bioinformatics Workshop Week {year}"
@@ -14,21 +80,18 @@ if  __name__ == '__main__':
     # path to folder with folders for each workshop
     workshop_email_folder = "/Users/alexajo/alexajo@uio.no - Google Drive/Min disk/Student_Committee_SBI/OBiWoW2023/registrations/workshop_email/" 
 
-
-    mail_template_greeting = "<p>Dear "
-    mail_template_welcome = f"</p><p>Thank you for registering for the {course_name}!<br>"
-    mail_template_confirmation = "We are confirming your registration to the following workshop:"
-    mail_template_wating_list = "Due to the limited number of seats, you are on the waiting list for the following workshop:"
-
-    mail_template_end = f'</p><p>Please take notes on any requirements of the workshop you subscribed to in the <a href="{website_link}">Wokshop website</a>.\
-        <br>Further information and updates to relevant workshops will be communicated by mail.</p>\
-        <p>Thank you again for your registration. If you have any questions or wish to modify your registration, please contact us at <a href="mailto: oslo-bioinfo-workshops@ifi.uio.no">oslo-bioinfo-workshops@ifi.uio.no</a>.</p>\
-        <p>Regards,\
-        <br>Student Committee of the Centre for Bioinformatics at UiO.</p>'
-    
     # file with dump from nettskjema for registration
     path_registration = "registration_results.tsv"
     outpath = "mail.tsv"
+    # titles that were guessed, to be checked by hand
+    outpath_title_mapping = "title_mapping.tsv"
+    # allocation with the waiting lists, updated by --cancel and --capacity
+    outpath_state = "allocation_state.json"
+    # changes made by --cancel and --capacity
+    outpath_delta = "allocation_delta.tsv"
+    # one calendar per participant with all their workshops, and the calendar file of each participant
+    outpath_calendars = "participant_ics"
+    outpath_calendar_index = "participant_ics/participants.tsv"
     
     # file generated by tsv_to_html.py
     infile_dict = "schedule.json"
@@ -37,25 +100,22 @@ if  __name__ == '__main__':
     ics_folder = f"{website_link}/ics_files"
     
     # Percentage allowed overbooking
-    # 1.25 in 2022
-    # 1.7 in 2023
-    perc_attendance = 1.7
+    policy = OverbookingPolicy(factor=args.overbooking_factor)
     
-    with open(infile_dict, 'r') as file:
-        dict_schedule = json.load(file)
-        
-    dict_schedule_final = {}
-    dict_count_attendance = {}
-    
-    for key in dict_schedule:
-        new_key = dict_schedule[key]['title']\
-            .replace("'", "")\
-            .replace(":", "") \
-            .replace("/", "")
-        dict_schedule_final[new_key] = dict_schedule[key]
-        dict_schedule_final[new_key]['key'] = key
-        dict_count_attendance[new_key] = 0
-    # pprint(dict_schedule_final)
+    # workshops by ID, with lookup by title without ', : and /
+    schedule = load_schedule(infile_dict, use_index=True)
+
+    if args.cancel or args.capacity:
+        update_allocation(outpath_state, outpath_delta, workshop_email_folder, schedule, args.cancel, args.capacity)
+        schedule.close()
+        return
+
+    # workshops renamed after the registration form was made: title in the form -> title in the schedule
+    title_aliases = {
+        'Executable metadata crosswalks through Omnipy': 'Using Omnipy for data wrangling and metadata mapping',
+    }
+    # form titles truncated by nettskjema or without punctuation are matched on trigrams
+    title_matcher = TitleMatcher.from_schedule(schedule, aliases=title_aliases)
     
     id_column = "NR"
     title_column = "workshop"
@@ -63,16 +123,11 @@ if  __name__ == '__main__':
     email_column = "var3"
     affilation_column = "Your affiliation (e.g. Department of Informatics, UiO)"
     
-    dict_person_info = {}
-    key_workshop = "workshop"
-    key_mail = "mail"
-    key_title = "title"
-    key_name = "name"
-    key_attendance = "max_attendance"
-
     # to generate text files with email addresses of those registered
     workshop_email_dict = {}
     
+    # registrations in submission order, with the ID of the workshop matched to the title
+    registrations = []
     with open(path_registration, newline='') as csvfile:
         data = csv.DictReader(csvfile, delimiter = '\t')
         for row in data:
@@ -80,83 +135,66 @@ if  __name__ == '__main__':
             
             current_title = current_title_no_spaces.replace("_", " ")
             
-            # custom replacements
-            current_title = current_title.replace('Reproducible research with Nextflow ', 'Reproducible research with Nextflow & building pipelines with nf-core')
-            current_title = current_title.replace('Executable metadata crosswalks through Omnipy', 'Using Omnipy for data wrangling and metadata mapping')
-            
-            # print(current_title)
-            # print(dict_schedule_final[current_title])
+            title_match = title_matcher.match(current_title)
+            if title_match is None:
+                print(f"WARNING: No workshop found for '{current_title}', registration of {row[email_column]} skipped")
+                continue
+            registrations.append({'email': row[email_column], 'name': row[name_column],
+                                  'form_title': current_title_no_spaces, 'workshop_id': title_match.workshop_id})
 
-            # dict that holds workshop titles as keys
-            # and list of emails of participants as values
-            if current_title_no_spaces not in workshop_email_dict:
-                workshop_email_dict[current_title_no_spaces] = []
-            
-            lower_name = row[name_column].lower()
-            mail = row[email_column]
-            
-            html_body = mail_template_greeting 
-            html_body += row[name_column] 
-            html_body += mail_template_welcome 
-            html_body += mail_template_confirmation 
-            html_body += '<ul><li>workshop 1 <a href="https://www.mn.uio.no/sbi/english/events/oslo-bioinformatics-week-2022/ics_files/02.ics">Add to calendar</a></li></ul>' 
-            html_body += mail_template_end
-                    
-            if mail not in dict_person_info:
-                dict_person_info[mail] = {}
-                dict_person_info[mail][key_workshop] = {}
-                dict_person_info[mail][key_workshop]['accepted'] = []
-                dict_person_info[mail][key_workshop]['waiting'] = []
-                dict_person_info[mail][key_name] = row[name_column]
-                
-            dict_count_attendance[current_title] += 1       
-            overlimit = dict_count_attendance[current_title] >= int(dict_schedule_final[current_title][key_attendance] *perc_attendance)
-            
-            if overlimit:  
-                dict_person_info[mail][key_workshop]['waiting'].append(current_title)
-            else:
-                dict_person_info[mail][key_workshop]['accepted'].append(current_title)
-                workshop_email_dict[current_title_no_spaces].append(mail)
-            
-            
-    # pprint(dict_person_info)
-            
-    dict_result = {}
+    # accept while there are seats left, skipping workshops at the same time as one the person is accepted to
+    allocation = allocate(pd.DataFrame(registrations, columns=['email', 'name', 'form_title', 'workshop_id']),
+                          schedule, policy)
 
-    with open(outpath, 'w') as file:
+    for mail, current_title_no_spaces, workshop_id, status, clash_with in zip(
+            allocation['email'], allocation['form_title'], allocation['workshop_id'], allocation['status'],
+            allocation['clash_with']):
+        # dict that holds workshop titles as keys
+        # and list of emails of participants as values
+        if current_title_no_spaces not in workshop_email_dict:
+            workshop_email_dict[current_title_no_spaces] = []
+
+        if status == ACCEPTED:
+            workshop_email_dict[current_title_no_spaces].append(mail)
+        elif status == CLASH:
+            print(f"WARNING: {mail} is accepted to '{schedule[clash_with].title}' at the same time, "
+                  f"registration to '{schedule[workshop_id].title}' skipped")
+
+    participants = list(iter_participants(allocation))
+
+    # calendar with the sessions of all the workshops each participant is accepted to
+    calendar_files = write_participant_calendars(
+        [(mail, accepted) for mail, _, accepted, _ in participants], outpath_calendars,
+        ParticipantCalendars(schedule, website_link))
+    with open(outpath_calendar_index, 'w') as file:
+        for mail, calendar_file in calendar_files.items():
+            file.write(f"{mail}\t{calendar_file}\n")
+
+    # one mail per participant, written as soon as it is rendered
+    renderer = ConfirmationMailRenderer(schedule, course_name, website_link, ics_folder)
+    if args.eml_folder:
+        writer = EmlMailWriter(args.eml_folder, f"Registration to the {course_name}")
+    else:
+        writer = TsvMailWriter(outpath)
+    with writer:
+        for mail, name, accepted, waiting in participants:
+            attachments = []
+            if mail in calendar_files:
+                calendar = Path(outpath_calendars, calendar_files[mail]).read_text()
+                attachments.append(("OBiWoW_workshops.ics", calendar))
+            writer.write(mail, name, renderer.render(name, accepted, waiting), attachments)
+    print(f"Wrote {writer.count} mails to '{args.eml_folder or outpath}'")
+
+    n_guessed = title_matcher.write_audit(outpath_title_mapping)
+    if n_guessed:
+        print(f"{n_guessed} workshop titles were guessed or not found, check '{outpath_title_mapping}'")
 
-        for mail in dict_person_info:
-            
-            html_body = mail_template_greeting 
-            html_body += dict_person_info[mail][key_name]
-            html_body += mail_template_welcome 
-            if dict_person_info[mail][key_workshop]['accepted']:
-                html_body += mail_template_confirmation 
-                html_body += '<ul>'
-                for workshop in dict_person_info[mail][key_workshop]['accepted']:
-                    html_body += '<li><strong>' 
-                    html_body += '<a href="' + website_link + "#" + dict_schedule_final[workshop]['key'] + '" >' + workshop + '</a> </strong>'
-                    html_body += ' at ' + dict_schedule_final[workshop]['timeslot'] + " on " + datetime.strptime(dict_schedule_final[workshop]['date'], '%d.%m.%y').strftime("%A %d %B") +' (<a href="' + ics_folder + "/" + dict_schedule_final[workshop]['key'] + '.ics">Add to calendar</a>)'
-                    html_body += '</li>'
-                html_body += '</ul>'
-            if dict_person_info[mail][key_workshop]['waiting']:
-                html_body += mail_template_wating_list 
-                html_body += '<ul>'
-                for workshop in dict_person_info[mail][key_workshop]['waiting']:
-                    html_body += '<li><strong>' 
-                    html_body += '<a href="' + website_link + dict_schedule_final[workshop]['key'] + '" >' + workshop + '</a> </strong>'
-                    html_body += ' at ' + dict_schedule_final[workshop]['timeslot'] + " on " + datetime.strptime(dict_schedule_final[workshop]['date'], '%d.%m.%y').strftime("%A %d %B")
-                    html_body += '</li>'
-                html_body += '</ul>'
-            html_body += mail_template_end
-            
-            
-            file.write("\t".join([mail, dict_person_info[mail][key_name], html_body]) + "\n")
-            
     for workshop in workshop_email_dict:
-        out_folder = workshop_email_folder + "/" + workshop
-        out_file = out_folder + "/registered.txt"
-        filepath = Path(out_file)
-        filepath.parent.mkdir(parents=True, exist_ok=True)
-        with filepath.open("w") as fh:
-            fh.write("\n".join(workshop_email_dict[workshop]))
+        write_registered(workshop_email_folder, workshop, workshop_email_dict[workshop])
+
+    AllocationState.from_allocation(allocation, schedule, policy).save(outpath_state)
+    schedule.close()
+
+
+if __name__ == '__main__':
+    main()
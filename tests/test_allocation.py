@@ -0,0 +1,78 @@
+import pandas as pd
+
+from obiwow.allocation import OverbookingPolicy, allocate, allocation_summary, clash_matrix, parse_timeslot
+from obiwow.schedule_loader import Workshop
+
+SCHEDULE = {
+    '1': Workshop(id='1', title="Intro to Python", dates=('10.11.25',), timeslots=('9:00-12:00',), max_attendance=2),
+    '2': Workshop(id='2', title="R for biologists", dates=('10.11.25',), timeslots=('11:00-14:00',),
+                  max_attendance=2),
+    '3': Workshop(id='3', title="Nextflow", dates=('10.11.25', '11.11.25'), timeslots=('13:00-16:00',),
+                  max_attendance=1),
+    '4': Workshop(id='4', title="Networking event", dates=('11.11.25',), timeslots=('',), max_attendance=None),
+}
+
+
+def registrations(*rows):
+    return pd.DataFrame(rows, columns=['email', 'workshop_id'])
+
+
+class TestSessions:
+
+    # Timeslots are parsed to start and end times of the day
+    def test_parse_timeslot(self):
+        start, end = parse_timeslot('10.11.25', '9:00-12:30')
+        assert (start.day, start.hour, end.hour, end.minute) == (10, 9, 12, 30)
+        assert parse_timeslot('10.11.25', 'full day') is None
+
+    # Multi-day workshops clash on any of their days
+    def test_clash_matrix(self):
+        matrix = clash_matrix(list(SCHEDULE.values()))
+        assert matrix[0, 1] and matrix[1, 2]
+        assert not matrix[0, 2]
+        assert not matrix[3].any()
+
+
+class TestAllocate:
+
+    # Registrations are accepted in submission order until the seats are taken
+    def test_waitlist(self):
+        result = allocate(registrations(('a@x', '1'), ('b@x', '1'), ('c@x', '1'), ('d@x', '1')), SCHEDULE)
+        assert result['status'].tolist() == ['accepted', 'accepted', 'waitlist', 'waitlist']
+        assert result['waitlist_position'].tolist() == [0, 0, 1, 2]
+
+    # The overbooking factor adds seats, rounded down
+    def test_overbooking(self):
+        rows = [(f'{i}@x', '1') for i in range(5)]
+        result = allocate(registrations(*rows), SCHEDULE, OverbookingPolicy(factor=1.7))
+        assert result['status'].tolist() == ['accepted'] * 3 + ['waitlist'] * 2
+        result = allocate(registrations(*rows), SCHEDULE, OverbookingPolicy(workshop_factors={'1': 2}))
+        assert result['status'].tolist() == ['accepted'] * 4 + ['waitlist']
+
+    # A workshop at the same time as an accepted one is skipped and frees its seat
+    def test_clash(self):
+        result = allocate(registrations(('a@x', '1'), ('A@x ', '2'), ('b@x', '2'), ('c@x', '2')), SCHEDULE)
+        assert result['status'].tolist() == ['accepted', 'clash', 'accepted', 'accepted']
+        assert result['clash_with'].tolist() == [None, '1', None, None]
+
+    # Only accepted workshops cause clashes
+    def test_waitlist_does_not_clash(self):
+        result = allocate(registrations(('a@x', '3'), ('b@x', '3'), ('b@x', '2')), SCHEDULE)
+        assert result['status'].tolist() == ['accepted', 'waitlist', 'accepted']
+
+    # Repeated registrations and unknown workshops are flagged
+    def test_duplicate_and_unknown(self):
+        result = allocate(registrations(('a@x', '1'), ('a@x', '1'), ('a@x', None), ('a@x', '99')), SCHEDULE)
+        assert result['status'].tolist() == ['accepted', 'duplicate', 'unknown', 'unknown']
+
+    # Workshops without max attendance have no limit
+    def test_unlimited(self):
+        result = allocate(registrations(*[(f'{i}@x', '4') for i in range(50)]), SCHEDULE)
+        assert (result['status'] == 'accepted').all()
+
+    # The summary counts the registrations per workshop and status
+    def test_summary(self):
+        result = allocate(registrations(('a@x', '3'), ('b@x', '3'), ('b@x', '2')), SCHEDULE)
+        summary = allocation_summary(result, SCHEDULE).set_index('workshop_id')
+        assert summary.loc['3', ['seats', 'accepted', 'waitlist']].tolist() == [1, 1, 1]
+        assert summary.loc['1', 'accepted'] == 0
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from obiwow import artifact_store
+from obiwow.artifact_store import ArtifactStore, fingerprint_inputs
+
+
+def sample_frame():
+    return pd.DataFrame({'Workshop name': ['Intro to R', 'Python'],
+                         'Max capacity': [20, 30],
+                         'Date': ['01.01.23', '02.01.23']},
+                        index=[3, 7])
+
+
+class TestArtifactStore:
+
+    # Stored frames are loaded back with the same values and index
+    def test_roundtrip(self, tmp_path):
+        store = ArtifactStore(tmp_path)
+        store.save('schedule', 'abc', sample_frame())
+        pd.testing.assert_frame_equal(store.load('schedule', 'abc'), sample_frame())
+        assert store.fingerprint('schedule') == 'abc'
+
+    # Frames are pickled when pyarrow is not installed
+    def test_roundtrip_without_pyarrow(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(artifact_store, 'HAS_PYARROW', False)
+        store = ArtifactStore(tmp_path)
+        store.save('schedule', 'abc', sample_frame())
+        assert (tmp_path / 'schedule.pkl').exists()
+        pd.testing.assert_frame_equal(store.load('schedule', 'abc'), sample_frame())
+
+    # A frame built from other inputs is not returned
+    def test_fingerprint_mismatch(self, tmp_path):
+        store = ArtifactStore(tmp_path)
+        store.save('schedule', 'abc', sample_frame())
+        assert store.load('schedule', 'def') is None
+        assert store.load('missing') is None
+
+
+class TestFingerprintInputs:
+
+    # The fingerprint changes with the content of the files and the configuration
+    def test_changes_with_inputs(self, tmp_path):
+        path = tmp_path / 'schedule.csv'
+        path.write_text('ID,Workshop name\n1,Intro\n')
+        first = fingerprint_inputs([str(path)], {'delimiter': ','})
+        assert fingerprint_inputs([str(path)], {'delimiter': ','}) == first
+        assert fingerprint_inputs([str(path)], {'delimiter': ';'}) != first
+        path.write_text('ID,Workshop name\n1,Intro to R\n')
+        assert fingerprint_inputs([str(path)], {'delimiter': ','}) != first
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+
+import pytest
+
+from obiwow.cli import COMMANDS, build_parser, import_command, main
+
+
+class TestCli:
+
+    # Lists every command in the help message
+    def test_help_lists_commands(self, capsys):
+        with pytest.raises(SystemExit):
+            build_parser().parse_args(['--help'])
+        output = capsys.readouterr().out
+        for command in COMMANDS:
+            assert command in output
+
+    # Prints the help and returns an error code without a command
+    def test_no_command(self, capsys):
+        assert main([]) == 1
+        assert 'usage: obiwow' in capsys.readouterr().out
+
+    # Imports the module of a command and measures the import time
+    def test_import_command(self):
+        entry, import_seconds = import_command('stats')
+        assert callable(entry)
+        assert import_seconds >= 0
+
+    # Passes the remaining arguments to the command and reports the import time
+    def test_runs_command_with_import_times(self, tmp_path, capsys):
+        dump = tmp_path / 'dump.txt'
+        dump.write_text('h1;h2;workshop;email\n1;x;WS_A;a@x\n2;x;WS_A;b@x\n')
+        assert main(['--import-times', 'stats', str(dump), '--state', str(tmp_path / 'stats.json')]) == 0
+        captured = capsys.readouterr()
+        assert 'WS_A\t2' in captured.out
+        assert "imported 'obiwow.registration_stats'" in captured.err
+
+    # Starts the light commands without importing pandas, Mako or PyYAML
+    def test_help_does_not_import_heavy_modules(self):
+        code = ("import sys; from obiwow.cli import build_parser, import_command; "
+                "build_parser().format_help(); import_command('stats'); "
+                "print(any(m in sys.modules for m in ('pandas', 'mako', 'yaml')))")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == 'False'
@@ -557,7 +557,7 @@ class TestWriteIcalFiles:
 class TestWriteScheduleJson:
 
     # Converts a DataFrame to a JSON file with correct formatting
-    def test_dataframe_to_json_formatting(self):
+    def test_dataframe_to_json_formatting(self, tmp_path):
         import pandas as pd
         import os
         from obiwow.data_reader_parser import write_schedule_json
@@ -584,7 +584,7 @@ class TestWriteScheduleJson:
             'start_time_column': 'start_time',
             'end_time_column': 'end_time'
         }
-        output_file = 'test_schedule.json'
+        output_file = str(tmp_path / 'test_schedule.json')
 
         write_schedule_json(schedule_df, schedule_columns, output_file)
 
@@ -602,7 +602,7 @@ class TestWriteScheduleJson:
         os.remove(output_file)
 
     # Maps DataFrame columns to JSON keys accurately
-    def test_column_mapping_to_json_keys(self):
+    def test_column_mapping_to_json_keys(self, tmp_path):
         import pandas as pd
         import os
         from obiwow.data_reader_parser import write_schedule_json
@@ -629,7 +629,7 @@ class TestWriteScheduleJson:
             'start_time_column': 'begin_time',
             'end_time_column': 'finish_time'
         }
-        output_file = 'test_schedule.json'
+        output_file = str(tmp_path / 'test_schedule.json')
 
         write_schedule_json(schedule_df, schedule_columns, output_file)
 
@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+
+from obiwow.evaluation_cube import ALL_WORKSHOPS, Topic, build_cube, load_cube, load_topics
+
+TOPICS = {
+    'background': Topic('background', "What is your main background?"),
+    'useful': Topic('useful', "Did you find the workshop useful?", "Kolonne 4", 'scale'),
+    'recommend': Topic('recommend', "Would you recommend this workshop to your colleagues? ", "", 'yes_no'),
+    'further_comments': Topic('further_comments', "", "Do you have further comments or suggestions?"),
+}
+RESPONSES = pd.DataFrame({
+    "What is your main background?": ["Biology", "Biology", "Statistics", "Informatics"],
+    "Did you find the workshop useful?": [5, 4, None, 5],
+    "Kolonne 4": ["Great", None, "Too short", None],
+    "Would you recommend this workshop to your colleagues? ": ["Yes", "Yes", "No", "Yes"],
+    "Do you have further comments or suggestions?": [None, "More coffee", None, "Thanks"],
+})
+WORKSHOP_IDS = ['1', '1', '2', None]
+
+
+@pytest.fixture
+def cube():
+    return build_cube(RESPONSES, WORKSHOP_IDS, TOPICS)
+
+
+class TestBuildCube:
+
+    # Counts per workshop, most frequent first; numbers read as floats are counted as '5', '4'
+    def test_counts(self, cube):
+        assert cube.counts('1', 'useful') == {'5': 1, '4': 1}
+        assert cube.counts('2', 'useful') == {}
+        assert list(cube.counts('1', 'background').items()) == [('Biology', 2)]
+        assert cube.counts('2', 'recommend') == {'No': 1}
+
+    # Responses of unmatched workshops only count for all workshops
+    def test_all_workshops(self, cube):
+        assert cube.counts(ALL_WORKSHOPS, 'useful') == {'5': 2, '4': 1}
+        assert list(cube.counts(ALL_WORKSHOPS, 'recommend')) == ['Yes', 'No']
+        assert cube.n_responses(ALL_WORKSHOPS) == 4
+        assert cube.n_responses('1') == 2
+        assert sorted(cube.workshop_ids()) == ['1', '2']
+
+    # Comments per workshop and topic, in the order of the export
+    def test_comments(self, cube):
+        assert cube.comments('1', 'useful') == ["Great"]
+        assert cube.comments(ALL_WORKSHOPS, 'further_comments') == ["More coffee", "Thanks"]
+        assert cube.comments('2', 'further_comments') == []
+
+    # Columns missing from the export are skipped
+    def test_missing_column(self):
+        topics = dict(TOPICS, lectures=Topic('lectures', "How would you rate the level of the lectures?"))
+        assert build_cube(RESPONSES, WORKSHOP_IDS, topics).counts(ALL_WORKSHOPS, 'lectures') == {}
+
+
+class TestSaveCube:
+
+    # The cube read back has the same counts, comments and topics
+    def test_round_trip(self, tmp_path, cube):
+        cube.save(str(tmp_path / 'cube.json'))
+        loaded = load_cube(str(tmp_path / 'cube.json'))
+        assert list(loaded.counts(ALL_WORKSHOPS, 'background').items()) == \
+            list(cube.counts(ALL_WORKSHOPS, 'background').items())
+        assert loaded.comments('1', 'useful') == ["Great"]
+        assert loaded.topics == TOPICS
+        assert loaded.n_responses('2') == 1
+
+
+class TestLoadTopics:
+
+    # The topics of the form in the configuration
+    def test_config(self):
+        topics = load_topics()
+        assert topics['practicals'].question == "How would you rate the practical sessions? "
+        assert topics['recommend'].kind == 'yes_no'
+        assert topics['further_comments'].question == ""
+
+
+class TestFingerprint:
+
+    # The fingerprint of a workshop only changes when its own responses change
+    def test_fingerprint(self, cube):
+        late = build_cube(pd.concat([RESPONSES, RESPONSES.iloc[[2]]], ignore_index=True),
+                          WORKSHOP_IDS + ['2'], TOPICS)
+        assert late.fingerprint('1') == cube.fingerprint('1')
+        assert late.fingerprint('2') != cube.fingerprint('2')
+        assert late.fingerprint(ALL_WORKSHOPS) != cube.fingerprint(ALL_WORKSHOPS)
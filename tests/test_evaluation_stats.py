@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from obiwow.evaluation_cube import Topic, build_cube
+from obiwow.evaluation_stats import (bootstrap_mean_ci, comparison_table, scale_means, scale_medians,
+                                     write_comparison, yes_rates)
+
+# Counts of the responses 1 to 5
+COUNTS = np.array([[0, 0, 1, 1, 2], [0, 0, 0, 0, 0], [1, 0, 0, 0, 0], [0, 1, 1, 0, 0]])
+
+
+class TestScaleStats:
+
+    # Mean and median per row, the median of an even number of responses between the two middle ones
+    def test_mean_median(self):
+        np.testing.assert_allclose(scale_means(COUNTS), [4.25, np.nan, 1.0, 2.5])
+        np.testing.assert_allclose(scale_medians(COUNTS), [4.5, np.nan, 1.0, 2.5])
+
+    # The intervals contain the mean, collapse when all answers are the same, and are the same for a seed
+    def test_bootstrap(self):
+        intervals = bootstrap_mean_ci(COUNTS, samples=500)
+        assert intervals[0, 0] <= 4.25 <= intervals[0, 1]
+        assert np.isnan(intervals[1]).all()
+        np.testing.assert_allclose(intervals[2], [1.0, 1.0])
+        np.testing.assert_array_equal(intervals, bootstrap_mean_ci(COUNTS, samples=500))
+
+    # Share of 'Yes' among the answers
+    def test_yes_rates(self):
+        np.testing.assert_allclose(yes_rates(np.array([[1, 3], [0, 0]])), [0.75, np.nan])
+
+
+class TestComparisonTable:
+
+    # Workshops ranked by the overall impression, with the response rate against the registrations
+    def test_table(self, tmp_path):
+        topics = {'overall': Topic('overall', "Overall?", kind='scale'),
+                  'recommend': Topic('recommend', "Recommend?", kind='yes_no')}
+        responses = pd.DataFrame({"Overall?": [3, 4, 5, 5, None], "Recommend?": ["No", "Yes", "Yes", "Yes", None]})
+        cube = build_cube(responses, ['1', '1', '2', '2', '3'], topics)
+        df = comparison_table(cube, {'1': "Python", '2': "R", '3': "Nextflow"}, {'1': 4, '2': 2}, samples=200)
+        assert list(df['title']) == ["R", "Python", "Nextflow"]
+        assert list(df['rank'][:2]) == [1, 2] and df['rank'].isna()[2]
+        assert list(df['overall_mean'][:2]) == [5.0, 3.5]
+        assert list(df['response_rate'][:2]) == [1.0, 0.5]
+        assert np.isnan(df['response_rate'][2])
+        assert list(df['recommend_yes_rate'][:2]) == [1.0, 0.5]
+
+        write_comparison(df, str(tmp_path / 'comparison.csv'), str(tmp_path / 'comparison.html'))
+        assert pd.read_csv(tmp_path / 'comparison.csv')['title'].tolist() == ["R", "Python", "Nextflow"]
+        assert '<table' in (tmp_path / 'comparison.html').read_text()
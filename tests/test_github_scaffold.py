@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from obiwow.data_reader_parser import parse_yaml
+from obiwow.github_scaffold import repo_path, slugify, workshop_readmes, write_readmes
+
+CONFIG_DIR = Path(__file__).resolve().parent.parent / 'config'
+NETTSKJEMA_COLUMNS = parse_yaml(str(CONFIG_DIR / 'nettskjema_columns.yaml'))
+SCHEDULE_COLUMNS = parse_yaml(str(CONFIG_DIR / 'schedule_columns.yaml'))
+
+
+def merged_frame():
+    # One row per workshop day, as built by load_or_build_frames
+    return pd.DataFrame({
+        NETTSKJEMA_COLUMNS['title_column']: ["Intro to Python", "Long workshop", "Long workshop", "Cancelled", None],
+        NETTSKJEMA_COLUMNS['description_column']: ["Learn Python", "Two days", "Two days", "", None],
+        SCHEDULE_COLUMNS['title_column']: ["Intro to Python", "Long workshop - Day 1", "Long workshop - Day 2",
+                                           "Cancelled", "Networking event"],
+        SCHEDULE_COLUMNS['id_column']: [1, 5, 5, 6, 7],
+        SCHEDULE_COLUMNS['date_column']: ["10.11.2025", "12.11.2025", "13.11.2025", "13.11.2025", "13.11.2025"],
+        SCHEDULE_COLUMNS['start_time_column']: ["9:00", "9:00", "9:00", "9:00", "16:00"],
+        SCHEDULE_COLUMNS['end_time_column']: ["12:00", "16:00", "16:00", "12:00", "18:00"],
+        SCHEDULE_COLUMNS['main_instructor_column']: ["Ann", "Gus", "Gus", "Bob", None],
+        SCHEDULE_COLUMNS['helper_instructor_column']: ["Bob", None, None, None, None],
+        SCHEDULE_COLUMNS['status_column']: ["yes", "yes", "yes", "cancelled", None],
+    })
+
+
+class TestWorkshopReadmes:
+
+    # One README per workshop; a multi-day workshop has one folder on its first day with all dates
+    def test_readmes(self):
+        readmes = workshop_readmes(merged_frame(), NETTSKJEMA_COLUMNS, SCHEDULE_COLUMNS)
+        assert [readme.folder for readme in readmes] == ["10-Monday/intro-to-python", "12-Wednesday/long-workshop"]
+        python, long_workshop = readmes
+        assert python.content.startswith("# Intro to Python\n\nLearn Python\n")
+        assert "## Instructors\nAnn, Bob\n" in python.content
+        assert "- Wednesday 12 November 2025, 9:00-16:00\n- Thursday 13 November 2025, 9:00-16:00\n" \
+            in long_workshop.content
+        assert "## Software Requirements" in long_workshop.content
+
+    # Folder names as in the repositories of earlier years
+    def test_slugify(self):
+        assert slugify("Nextflow & nf-core: pipelines") == "nextflow-nf-core-pipelines"
+        assert slugify("Ømics in Python ") == "mics-in-python"
+
+
+class TestWriteReadmes:
+
+    # Only the READMEs that changed are written again
+    def test_idempotent(self, tmp_path):
+        readmes = workshop_readmes(merged_frame(), NETTSKJEMA_COLUMNS, SCHEDULE_COLUMNS)
+        assert write_readmes(readmes, str(tmp_path)) == 2
+        assert write_readmes(readmes, str(tmp_path)) == 0
+        (tmp_path / "10-Monday/intro-to-python/README.md").write_text("edited")
+        assert write_readmes(readmes, str(tmp_path)) == 1
+        assert (tmp_path / "12-Wednesday/long-workshop/README.md").read_text() == readmes[1].content
+
+
+class TestRepoPath:
+
+    # The repository of the year, unless given
+    def test_repo_path(self):
+        config = {'paths': {'github': {'dir_path': "../OBiWoW-{year}"}}, 'yearly': {'year': 2025}}
+        assert repo_path(config) == "../OBiWoW-2025"
+        assert repo_path(config, year="2026") == "../OBiWoW-2026"
+        assert repo_path(config, repo="/tmp/repo") == "/tmp/repo"
+        with pytest.raises(ValueError):
+            repo_path({'paths': {}, 'yearly': {'year': "<YEAR>"}})
@@ -0,0 +1,149 @@
+import mailbox
+import smtplib
+import socketserver
+import threading
+from email import message_from_bytes
+from unittest.mock import patch
+
+import pytest
+
+import draft_email
+from obiwow.mail_drafts import AppleMailBackend, Draft, MaildirBackend, MboxBackend, SmtpBackend
+
+DRAFTS = [
+    Draft(subject="Your registration to 'Nextflow'", sender="obiwow@example.org", body="Welcome to Nextflow",
+          bcc=("a@example.org", "b@example.org", "c@example.org")),
+    Draft(subject="Your registration to 'R \"tidyverse\"'", sender="obiwow@example.org", body="Welcome",
+          bcc=("d@example.org",)),
+]
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    # Just enough of SMTP for smtplib: one connection, several mails
+
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b"220 localhost\r\n")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.wfile.write(b"250 localhost\r\n")
+            elif command.startswith("RCPT TO:") and "REFUSED" in command:
+                self.wfile.write(b"550 No such user\r\n")
+            elif command.startswith("RCPT TO:"):
+                recipients.append(line.decode().strip()[8:].strip('<>'))
+                self.wfile.write(b"250 OK\r\n")
+            elif command == "DATA":
+                self.wfile.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                data = b""
+                for data_line in iter(self.rfile.readline, b".\r\n"):
+                    data += data_line
+                self.server.mails.append((recipients, message_from_bytes(data)))
+                recipients = []
+                self.wfile.write(b"250 OK\r\n")
+            elif command == "QUIT":
+                self.wfile.write(b"221 Bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 OK\r\n")
+
+
+@pytest.fixture
+def smtp_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SmtpHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.mails = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestMailboxBackends:
+
+    # All drafts go to one mbox, with the participants in BCC
+    def test_mbox(self, tmp_path):
+        path = str(tmp_path / 'drafts.mbox')
+        assert MboxBackend(path).deliver(DRAFTS) == 2
+        messages = list(mailbox.mbox(path))
+        assert [message['Subject'] for message in messages] == [draft.subject for draft in DRAFTS]
+        assert messages[0]['Bcc'] == "a@example.org, b@example.org, c@example.org"
+
+    # Maildir messages are flagged as drafts
+    def test_maildir(self, tmp_path):
+        assert MaildirBackend(str(tmp_path / 'drafts')).deliver(DRAFTS) == 2
+        messages = list(mailbox.Maildir(str(tmp_path / 'drafts')))
+        assert len(messages) == 2
+        assert all(message.get_flags() == 'D' and message.get_subdir() == 'cur' for message in messages)
+
+
+class TestSmtpBackend:
+
+    # All mails go through one connection, recipients only in the envelope
+    def test_send(self, smtp_server):
+        backend = SmtpBackend(*smtp_server.server_address)
+        assert backend.deliver(DRAFTS) == 2
+        assert smtp_server.connections == 1
+        recipients, message = smtp_server.mails[0]
+        assert recipients == list(DRAFTS[0].bcc)
+        assert message['Bcc'] is None
+        assert message['Subject'] == DRAFTS[0].subject
+
+    # Large BCC lists are split over several mails
+    def test_max_recipients(self, smtp_server):
+        assert SmtpBackend(*smtp_server.server_address, max_recipients=2).deliver(DRAFTS[:1]) == 2
+        assert [recipients for recipients, _ in smtp_server.mails] == [["a@example.org", "b@example.org"],
+                                                                        ["c@example.org"]]
+
+    # Drafts without recipients are reported, not sent to the sender
+    def test_no_recipients(self, smtp_server, capsys):
+        empty = Draft(subject="No participants", sender=DRAFTS[0].sender, body="Body", bcc=())
+        assert SmtpBackend(*smtp_server.server_address).deliver([empty, DRAFTS[1]]) == 1
+        assert [recipients for recipients, _ in smtp_server.mails] == [list(DRAFTS[1].bcc)]
+        assert "No recipients for 'No participants'" in capsys.readouterr().out
+
+    # A failed send raises, with the number of mails sent before it
+    def test_error(self, smtp_server):
+        refused = Draft(subject="Refused", sender="obiwow@example.org", body="Body", bcc=("refused@example.org",))
+        backend = SmtpBackend(*smtp_server.server_address)
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            backend.deliver([DRAFTS[0], refused, DRAFTS[1]])
+        assert backend.delivered == 1
+
+
+class TestAppleMailBackend:
+
+    # One script creates all drafts, with escaped quotes
+    def test_script(self):
+        script = AppleMailBackend().script(DRAFTS)
+        assert script.count('make new outgoing message') == 2
+        assert script.count('make new bcc recipient') == 4
+        assert 'R \\"tidyverse\\"' in script
+
+    # The script goes to osascript on stdin, not as an argument
+    def test_deliver_stdin(self):
+        with patch('obiwow.mail_drafts.subprocess.run') as run:
+            assert AppleMailBackend().deliver(DRAFTS) == 2
+        run.assert_called_once_with(["osascript", "-"], input=AppleMailBackend().script(DRAFTS), text=True,
+                                    check=True)
+
+
+class TestDraftEmail:
+
+    # A backend error is reported with what was delivered, and the script fails
+    def test_backend_error(self, tmp_path, capsys):
+        registrations = tmp_path / 'registrations.csv'
+        registrations.write_text("workshop;var3\nR_basics;a@example.org\n")
+        with pytest.raises(SystemExit) as exit_info:
+            draft_email.main(['-i', str(registrations), '--backend', 'mbox',
+                              '-o', str(tmp_path / 'missing' / 'drafts.mbox')])
+        assert exit_info.value.code == 1
+        output = capsys.readouterr().out
+        assert "Error in mbox backend" in output
+        assert "0 of the mails were delivered before the error" in output
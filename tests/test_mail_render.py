@@ -0,0 +1,76 @@
+import email
+
+import pandas as pd
+
+from obiwow.mail_render import (ConfirmationMailRenderer, EmlMailWriter, TsvMailWriter, format_days,
+                                iter_participants, workshop_fragments)
+from obiwow.schedule_loader import Workshop
+
+SCHEDULE = {
+    '1': Workshop(id='1', title="Intro: Python", dates=('10.11.25',), timeslots=('9:00-12:00',)),
+    '5': Workshop(id='5', title="Nextflow", dates=('12.11.25', '13.11.25'), timeslots=('9:00-16:00',)),
+}
+WEBSITE = "https://example.org/obiwow"
+
+
+def renderer():
+    return ConfirmationMailRenderer(SCHEDULE, "Oslo Bioinformatics Workshop Week 2025", WEBSITE, WEBSITE + "/ics")
+
+
+class TestWorkshopFragments:
+
+    # Multi-day workshops list all their days
+    def test_format_days(self):
+        assert format_days(('10.11.25',)) == 'Monday 10 November'
+        assert format_days(('12.11.25', '13.11.25')) == 'Wednesday 12 November and Thursday 13 November'
+        assert format_days(('TBA',)) == 'TBA'
+
+    # Links, timeslot and day are computed once per workshop
+    def test_fragments(self):
+        fragment = workshop_fragments(SCHEDULE, WEBSITE, WEBSITE + "/ics")['1']
+        assert fragment == {'title': 'Intro Python', 'url': WEBSITE + '#1', 'timeslot': '9:00-12:00',
+                            'day': 'Monday 10 November', 'ics_url': WEBSITE + '/ics/1.ics'}
+
+
+class TestConfirmationMailRenderer:
+
+    # Accepted workshops have a calendar link, the waiting list does not
+    def test_render(self):
+        html = renderer().render('Ann', ['1'], ['5'])
+        assert '\n' not in html and '\t' not in html
+        assert html.startswith('<p>Dear Ann</p>')
+        assert 'We are confirming your registration' in html
+        assert f'<a href="{WEBSITE}/ics/1.ics">Add to calendar</a>' in html
+        assert 'waiting list' in html
+        assert f'{WEBSITE}/ics/5.ics' not in html
+
+    # Sections without workshops are left out
+    def test_render_waiting_only(self):
+        html = renderer().render('Bob', [], ['1'])
+        assert 'We are confirming' not in html
+        assert 'waiting list' in html
+
+
+class TestMailWriters:
+
+    # Participants are grouped in order of their first registration
+    def test_iter_participants(self):
+        allocation = pd.DataFrame({'email': ['b@x', 'a@x', 'b@x', 'b@x'], 'name': ['Bob', 'Ann', 'Bob', 'Bob'],
+                                   'workshop_id': ['1', '1', '5', '1'],
+                                   'status': ['accepted', 'waitlist', 'waitlist', 'duplicate']})
+        assert list(iter_participants(allocation)) == [('b@x', 'Bob', ['1'], ['5']), ('a@x', 'Ann', [], ['1'])]
+
+    # mail.tsv has one line per participant
+    def test_tsv(self, tmp_path):
+        path = tmp_path / 'mail.tsv'
+        with TsvMailWriter(str(path)) as writer:
+            writer.write('a@x', 'Ann', renderer().render('Ann', ['1'], []))
+        assert [line.split('\t')[:2] for line in path.read_text().splitlines()] == [['a@x', 'Ann']]
+
+    # One .eml file is written per participant
+    def test_eml(self, tmp_path):
+        with EmlMailWriter(str(tmp_path), 'Registration') as writer:
+            writer.write('a@x', 'Ann', renderer().render('Ann', ['1'], []))
+        message = email.message_from_bytes((tmp_path / 'a@x.eml').read_bytes())
+        assert (message['To'], message['Subject'], message.get_content_type()) == ('a@x', 'Registration',
+                                                                                   'text/html')
@@ -0,0 +1,90 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from obiwow.nettskjema import NettskjemaError, SubmissionStore, sync_forms
+
+FORMS = {
+    '100': [{'submissionId': i, 'respondentEmail': f"p{i}@example.org", 'answers': []} for i in range(1, 8)],
+    '200': [{'submissionId': i, 'respondentEmail': f"e{i}@example.org", 'answers': []} for i in range(50, 53)],
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Stand-in for the submissions endpoint, with pages and failures on demand
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.paths.append(self.path)
+        url = urlsplit(self.path)
+        params = {key: int(values[0]) for key, values in parse_qs(url.query).items()}
+        form_id = url.path.split('/')[-2]
+        if self.headers['Authorization'] != 'Bearer secret':
+            return self._send(401, {'statusCode': 401})
+        if server.failures:
+            server.failures -= 1
+            return self._send(503, {'statusCode': 503})
+        submissions = [s for s in server.forms.get(form_id, [])
+                       if s['submissionId'] >= params.get('fromSubmissionId', 0)]
+        self._send(200, submissions[:params.get('limit', len(submissions))])
+
+    def _send(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.daemon_threads = True
+    server.forms = {form_id: list(submissions) for form_id, submissions in FORMS.items()}
+    server.paths = []
+    server.failures = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/api/v2"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestSyncForms:
+
+    # Several forms are fetched page by page into the store
+    def test_sync(self, api, tmp_path):
+        counts = sync_forms('secret', {'registrations': '100', 'evaluations': '200'}, str(tmp_path), api.url,
+                            page_size=3)
+        assert counts == {'registrations': 7, 'evaluations': 3}
+        store = SubmissionStore(str(tmp_path))
+        assert [s['submissionId'] for s in store.load('registrations')] == list(range(1, 8))
+        assert store.last_id('evaluations', '200') == 52
+        assert sum('/forms/100/' in path for path in api.paths) == 3
+
+    # Later syncs only fetch submissions after the high-water mark
+    def test_incremental(self, api, tmp_path):
+        sync_forms('secret', {'registrations': '100'}, str(tmp_path), api.url)
+        api.forms['100'].append({'submissionId': 8, 'respondentEmail': "new@example.org", 'answers': []})
+        api.paths.clear()
+        assert sync_forms('secret', {'registrations': '100'}, str(tmp_path), api.url) == {'registrations': 1}
+        assert 'fromSubmissionId=8' in api.paths[0]
+        assert len(SubmissionStore(str(tmp_path)).load('registrations')) == 8
+
+    # Temporary failures are retried, other errors are not
+    def test_retries(self, api, tmp_path):
+        api.failures = 2
+        assert sync_forms('secret', {'registrations': '100'}, str(tmp_path), api.url, backoff=0.01) == \
+            {'registrations': 7}
+        with pytest.raises(NettskjemaError) as error:
+            sync_forms('wrong', {'registrations': '100'}, str(tmp_path), api.url, full=True, backoff=0.01)
+        assert error.value.status == 401
@@ -0,0 +1,52 @@
+from obiwow.participant_calendar import ParticipantCalendars, workshop_events, write_participant_calendars
+from obiwow.schedule_loader import Workshop
+
+SCHEDULE = {
+    '1': Workshop(id='1', title="Intro: Python, part 1", dates=('10.11.25',), rooms=('Sed (room 1454)',),
+                  timeslots=('9:00-12:00',)),
+    '5': Workshop(id='5', title="Nextflow", dates=('12.11.25', '13.11.25'), rooms=('Caml',),
+                  timeslots=('9:00-16:00',)),
+    '9': Workshop(id='9', title="Networking event", dates=('14.11.25',), timeslots=('',)),
+}
+WEBSITE = "https://example.org/obiwow"
+
+
+class TestWorkshopEvents:
+
+    # One event per session, with escaped text
+    def test_events(self):
+        events = workshop_events(SCHEDULE['5'], WEBSITE)
+        assert events.count('BEGIN:VEVENT') == 2
+        assert events.count('DTSTAMP:20250101T000000Z') == 2
+        assert 'DTSTART;TZID=Europe/Oslo:20251113T090000' in events
+        assert 'SUMMARY:Intro: Python\\, part 1' in workshop_events(SCHEDULE['1'], WEBSITE)
+
+    # Sessions without a timeslot have no event
+    def test_no_timeslot(self):
+        assert workshop_events(SCHEDULE['9'], WEBSITE) == ''
+
+
+class TestParticipantCalendars:
+
+    # A calendar has the time zone of invite.ics and the events of all workshops
+    def test_render(self):
+        calendars = ParticipantCalendars(SCHEDULE, WEBSITE)
+        calendar = calendars.render(calendars.key(['5', '1']))
+        assert calendar.startswith('BEGIN:VCALENDAR')
+        assert 'TZID:Europe/Oslo' in calendar
+        assert calendar.count('BEGIN:VEVENT') == 3
+        assert calendar.index('obiwow-1-') < calendar.index('obiwow-5-')
+        assert calendar.endswith('END:VCALENDAR\n')
+
+    # Participants with the same workshops share a file, files are only written when they change
+    def test_write(self, tmp_path, capsys):
+        calendars = ParticipantCalendars(SCHEDULE, WEBSITE)
+        participants = [('a@x', ['1', '5']), ('b@x', ['5', '1']), ('c@x', ['1']), ('d@x', [])]
+        file_names = write_participant_calendars(participants, str(tmp_path), calendars)
+        assert file_names['a@x'] == file_names['b@x'] != file_names['c@x']
+        assert 'd@x' not in file_names
+        assert len(list(tmp_path.glob('*.ics'))) == 2
+
+        write_participant_calendars(participants[:1], str(tmp_path), calendars)
+        assert '1 distinct calendars, 0 written' in capsys.readouterr().out
+        assert [path.name for path in tmp_path.glob('*.ics')] == [file_names['a@x']]
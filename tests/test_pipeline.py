@@ -0,0 +1,111 @@
+import threading
+
+import pytest
+
+from obiwow.pipeline import Stage, resolve_stages, run_pipeline
+
+
+def double(x):
+    return 2 * x
+
+
+def add(a, b_high):
+    return a + b_high
+
+
+def negate(b_low):
+    return -b_low
+
+
+def split(x):
+    return x - 1, x + 1
+
+
+STAGES = [
+    Stage('a', double, inputs=('x',), outputs=('a',)),
+    Stage('b', split, inputs=('x',), outputs=('b_low', 'b_high')),
+    Stage('sum', add, inputs=('a', 'b_high'), outputs=('sum',)),
+    Stage('other', negate, inputs=('b_low',), outputs=('other',)),
+]
+
+
+class TestResolveStages:
+
+    # Selects a target and the stages it depends on, in declaration order
+    def test_target_with_dependencies(self):
+        stages = resolve_stages(STAGES, ['sum'], available=['x'])
+        assert [stage.name for stage in stages] == ['a', 'b', 'sum']
+
+    # Selects all stages without targets
+    def test_all_stages(self):
+        assert len(resolve_stages(STAGES, available=['x'])) == 4
+
+    # Raises for unknown targets
+    def test_unknown_target(self):
+        with pytest.raises(ValueError, match="Unknown stage"):
+            resolve_stages(STAGES, ['missing'], available=['x'])
+
+    # Raises when an input has no producer
+    def test_missing_producer(self):
+        with pytest.raises(ValueError, match="No stage produces 'x'"):
+            resolve_stages(STAGES, ['a'])
+
+    # Skips stages whose outputs are already given
+    def test_skips_available_outputs(self):
+        stages = resolve_stages(STAGES, ['sum'], available=['x', 'b_low', 'b_high'])
+        assert [stage.name for stage in stages] == ['a', 'sum']
+
+    # Raises when a value is produced twice
+    def test_duplicate_output(self):
+        with pytest.raises(ValueError, match="more than one stage"):
+            resolve_stages(STAGES + [Stage('again', double, inputs=('x',), outputs=('a',))], available=['x'])
+
+
+class TestRunPipeline:
+
+    # Runs all stages and passes outputs between them
+    @pytest.mark.parametrize('executor', ['serial', 'thread', 'process'])
+    def test_runs_all_stages(self, executor):
+        values = run_pipeline(STAGES, {'x': 3}, executor=executor)
+        assert values['sum'] == 6 + 4
+        assert values['other'] == -2
+
+    # Only runs the target and its dependencies
+    def test_single_target(self):
+        values = run_pipeline(STAGES, {'x': 3}, targets=['a'])
+        assert values == {'x': 3, 'a': 6}
+
+    # Runs each stage once, even when several stages need its output
+    def test_memoizes_outputs(self):
+        calls = []
+
+        def counted(x):
+            calls.append(x)
+            return x
+
+        def use(shared):
+            return shared
+
+        stages = [Stage('shared', counted, inputs=('x',), outputs=('shared',)),
+                  Stage('left', use, inputs=('shared',), outputs=('left',)),
+                  Stage('right', use, inputs=('shared',), outputs=('right',))]
+        run_pipeline(stages, {'x': 1})
+        assert calls == [1]
+
+    # Runs independent stages at the same time
+    def test_independent_stages_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait_for_other(x):
+            barrier.wait()
+            return x
+
+        stages = [Stage('left', wait_for_other, inputs=('x',), outputs=('left',)),
+                  Stage('right', wait_for_other, inputs=('x',), outputs=('right',))]
+        values = run_pipeline(stages, {'x': 1}, executor='thread', max_workers=2)
+        assert values['left'] == values['right'] == 1
+
+    # Raises for unknown executors
+    def test_unknown_executor(self):
+        with pytest.raises(ValueError, match="Unknown executor"):
+            run_pipeline(STAGES, {'x': 1}, executor='cluster')
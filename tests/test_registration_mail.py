@@ -0,0 +1,29 @@
+import pandas as pd
+
+from obiwow.allocation import allocate
+from obiwow.schedule_loader import Workshop
+from obiwow.waitlist import AllocationState
+from registration_mail import update_allocation
+
+SCHEDULE = {
+    '1': Workshop(id='1', title="Intro to Python", dates=('10.11.25',), timeslots=('9:00-12:00',), max_attendance=2),
+}
+
+
+class TestUpdateAllocation:
+
+    # The list of registered participants is emptied when the last one cancels
+    def test_last_cancellation(self, tmp_path):
+        registrations = pd.DataFrame([('a@x', 'a', '1', "Intro_to_Python")],
+                                     columns=['email', 'name', 'workshop_id', 'form_title'])
+        state_path = str(tmp_path / 'allocation_state.json')
+        AllocationState.from_allocation(allocate(registrations, SCHEDULE), SCHEDULE).save(state_path)
+        registered = tmp_path / 'workshop_email' / "Intro_to_Python" / 'registered.txt'
+        registered.parent.mkdir(parents=True)
+        registered.write_text("a@x")
+
+        update_allocation(state_path, str(tmp_path / 'delta.tsv'), str(tmp_path / 'workshop_email'), SCHEDULE,
+                          [['a@x', '1']], [])
+        assert registered.read_text() == ""
+        assert (tmp_path / 'delta.tsv').read_text().startswith("cancelled\ta@x")
+        assert AllocationState.load(state_path).registered('1') == []
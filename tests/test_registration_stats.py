@@ -0,0 +1,83 @@
+import json
+from collections import Counter
+
+import registrations
+from obiwow.registration_stats import (RegistrationCounts, count_registrations, format_summary, main,
+                                       update_counts, update_counts_from_submissions)
+
+
+class TestCountRegistrations:
+
+    # Counts registrations per workshop and per email, skipping the header
+    def test_counts(self, tmp_path):
+        dump = tmp_path / 'dump.txt'
+        dump.write_text('h1;h2;workshop;email\n1;x;WS_A;a@x\n2;x;WS_A;b@x\n3;x;WS_B;a@x\n')
+        per_workshop, per_email = count_registrations(str(dump))
+        assert per_workshop == {'WS_A': 2, 'WS_B': 1}
+        assert per_email == {'a@x': 2, 'b@x': 1}
+
+    # Ignores incomplete rows
+    def test_short_rows(self, tmp_path):
+        dump = tmp_path / 'dump.txt'
+        dump.write_text('h1;h2;workshop;email\n1;x\n2;x;WS_A;b@x\n')
+        per_workshop, per_email = count_registrations(str(dump))
+        assert per_workshop == {'WS_A': 1}
+
+
+class TestUpdateCounts:
+
+    # Only rows appended since the last update are read, incomplete last rows are read next time
+    def test_appended_rows(self, tmp_path):
+        dump = tmp_path / 'dump.txt'
+        dump.write_text('h1;h2;workshop;email\n1;x;WS_A;a@x\n2;x;WS_A;b')
+        counts = RegistrationCounts()
+        assert update_counts(str(dump), counts) == 1
+        counts.save(str(tmp_path / 'state.json'))
+        with open(dump, 'a') as file:
+            file.write('@x\n3;x;WS_B;a@x\n')
+        counts = RegistrationCounts.load(str(tmp_path / 'state.json'))
+        assert update_counts(str(dump), counts) == 2
+        assert counts.per_workshop == {'WS_A': 2, 'WS_B': 1}
+        assert counts.per_email == {'a@x': 2, 'b@x': 1}
+
+    # A dump that changed before the offset is counted again
+    def test_rewritten_dump(self, tmp_path):
+        dump = tmp_path / 'dump.txt'
+        dump.write_text('h1;h2;workshop;email\n1;x;WS_A;a@x\n')
+        counts = RegistrationCounts()
+        update_counts(str(dump), counts)
+        dump.write_text('h1;h2;workshop;email\n1;x;WS_B;a@x\n2;x;WS_B;b@x\n')
+        assert update_counts(str(dump), counts) == 2
+        assert counts.per_workshop == {'WS_B': 2}
+
+    # Submissions from the API are counted once, by submission ID
+    def test_submissions(self, tmp_path):
+        path = tmp_path / 'registrations.jsonl'
+        submissions = [{'submissionId': i, 'respondentEmail': 'a@x', 'answers': [{'textAnswer': 'WS_A'}]}
+                       for i in (1, 2)]
+        path.write_text(''.join(json.dumps(submission) + '\n' for submission in submissions))
+        counts = RegistrationCounts()
+        title = lambda submission: submission['answers'][0]['textAnswer']
+        assert update_counts_from_submissions(str(path), counts, title) == 2
+        assert update_counts_from_submissions(str(path), counts, title) == 0
+        assert (counts.last_submission_id, counts.per_workshop) == (2, {'WS_A': 2})
+
+
+class TestMain:
+
+    # With --api the client options are passed on and the counts go to the state file, as for a dump
+    def test_api(self, tmp_path, monkeypatch):
+        synced = []
+
+        def sync_forms(token, forms, store, base_url, full):
+            synced.append((token, forms, store, full))
+            submission = {'submissionId': 1, 'respondentEmail': 'a@x',
+                          'answers': [{'questionId': registrations.workshop_title_questionId, 'textAnswer': 'WS_A'}]}
+            (tmp_path / 'store' / 'registrations.jsonl').write_text(json.dumps(submission) + '\n')
+        monkeypatch.setattr(registrations, 'sync_forms', sync_forms)
+        (tmp_path / 'store').mkdir()
+        state = tmp_path / 'registration_stats.json'
+        main(['--api', '--form', 'registrations=123', '--store', str(tmp_path / 'store'), '--token', 'secret',
+              '--state', str(state)])
+        assert synced == [('secret', {'registrations': '123'}, str(tmp_path / 'store'), False)]
+        assert RegistrationCounts.load(str(state)).per_workshop == {'WS_A': 1}
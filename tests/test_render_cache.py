@@ -0,0 +1,130 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from obiwow.render_cache import RenderCache, hash_content, file_fingerprint
+from obiwow.tsv_to_html import generate_workshop_body
+
+
+def workshop_frame(title='Workshop Title'):
+    return pd.DataFrame({
+        'networking_event_column': [False],
+        'ID': [1],
+        'Workshop name': [title],
+        'Date': ['01.01.23'],
+        'start_time_column': ['9:00'],
+        'end_time_column': ['12:00'],
+        'Main instructor': ['Instructor'],
+        'Helper': ['Helper'],
+        'Title': [title],
+        'Room': ['Room A'],
+        'Description': ['Workshop Description'],
+        'Outcome': ['Learning Outcomes'],
+        'Target': ['Target Audience'],
+        'PreReq': ['Prerequisites'],
+        'Material': ['Materials']
+    })
+
+
+nettskjema_columns = {'title_column': 'Title', 'description_column': 'Description',
+                      'outcome_column': 'Outcome', 'target_column': 'Target',
+                      'pre_requisite_column': 'PreReq', 'material_column': 'Material'}
+schedule_columns = {'networking_event_column': 'networking_event_column', 'title_column': 'Workshop name',
+                    'id_column': 'ID', 'date_column': 'Date',
+                    'start_time_column': 'start_time_column', 'end_time_column': 'end_time_column',
+                    'main_instructor_column': 'Main instructor',
+                    'helper_instructor_column': 'Helper', 'room_column': 'Room'}
+yearly = {'ics_folder': '/ics/', 'registration_open': True,
+          'pre_register_link': '/register/', 'post_register_link': '/end/'}
+
+
+class TestHashContent:
+
+    # Produces the same hash regardless of dictionary key order
+    def test_dict_key_order_does_not_matter(self):
+        assert hash_content({'a': 1, 'b': [1, 2]}) == hash_content({'b': [1, 2], 'a': 1})
+
+    # Produces different hashes for different values
+    def test_different_values_differ(self):
+        assert hash_content({'a': 1}) != hash_content({'a': 2})
+
+    # Returns an empty fingerprint for a missing file
+    def test_missing_file_fingerprint(self, tmp_path):
+        assert file_fingerprint(str(tmp_path / 'missing.html')) == ""
+
+
+class TestRenderCache:
+
+    # Stores and returns text entries
+    def test_put_and_get(self, tmp_path):
+        cache = RenderCache(str(tmp_path))
+        cache.put('abc', '<p>content</p>')
+        assert cache.get('abc') == '<p>content</p>'
+        assert cache.hits == 1
+
+    # Returns None and counts a miss for unknown keys
+    def test_missing_key(self, tmp_path):
+        cache = RenderCache(str(tmp_path))
+        assert cache.get('unknown') is None
+        assert cache.misses == 1
+
+    # Evicts the least recently used entry when over the entry limit
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = RenderCache(str(tmp_path), max_entries=2)
+        cache.put('first', 'one')
+        cache.put('second', 'two')
+        os.utime(cache.path_for('first'), (1, 1))
+        os.utime(cache.path_for('second'), (2, 2))
+        cache.get('first')
+        cache.put('third', 'three')
+        assert cache.get('second') is None
+        assert cache.get('first') == 'one'
+        assert cache.get('third') == 'three'
+
+    # Evicts entries when over the byte limit
+    def test_evicts_over_byte_limit(self, tmp_path):
+        cache = RenderCache(str(tmp_path), max_bytes=10)
+        cache.put('first', 'x' * 8)
+        os.utime(cache.path_for('first'), (1, 1))
+        cache.put('second', 'y' * 8)
+        assert cache.get('first') is None
+        assert cache.get('second') == 'y' * 8
+
+    # The directory is listed once, on the first write, not on every write
+    def test_scans_once(self, tmp_path, monkeypatch):
+        cache = RenderCache(str(tmp_path), max_entries=3)
+        cache.put('old', 'old')
+        scans = []
+        glob = Path.glob
+        monkeypatch.setattr(Path, 'glob', lambda self, pattern: scans.append(pattern) or glob(self, pattern))
+        cache = RenderCache(str(tmp_path), max_entries=3)
+        for i in range(5):
+            cache.put(f"entry{i}", str(i))
+        assert len(scans) == 1
+        assert sorted(path.name for path in tmp_path.iterdir()) == ['entry2.html', 'entry3.html', 'entry4.html']
+
+
+class TestGenerateWorkshopBodyCache:
+
+    # Renders identical output with and without the cache, and reuses it on a rebuild
+    def test_cached_render_matches_uncached(self, tmp_path):
+        cache = RenderCache(str(tmp_path))
+        uncached = generate_workshop_body(workshop_frame(), nettskjema_columns, schedule_columns, yearly, {})
+        first = generate_workshop_body(workshop_frame(), nettskjema_columns, schedule_columns, yearly, {},
+                                       cache=cache)
+        second = generate_workshop_body(workshop_frame(), nettskjema_columns, schedule_columns, yearly, {},
+                                        cache=cache)
+        assert first == uncached == second
+        assert cache.misses == 1
+        assert cache.hits == 1
+
+    # Renders again when the yearly configuration changes
+    def test_yearly_change_invalidates(self, tmp_path):
+        cache = RenderCache(str(tmp_path))
+        generate_workshop_body(workshop_frame(), nettskjema_columns, schedule_columns, yearly, {}, cache=cache)
+        closed = dict(yearly, registration_open=False)
+        result = generate_workshop_body(workshop_frame(), nettskjema_columns, schedule_columns, closed, {},
+                                        cache=cache)
+        assert 'Register here' not in result[0]
+        assert cache.misses == 2
@@ -0,0 +1,96 @@
+import re
+
+import pandas as pd
+import pytest
+
+from obiwow.evaluation_cube import ALL_WORKSHOPS, Topic, build_cube
+from obiwow.report_engine import ChartRenderer, EvaluationReport, render_native_reports, wrap_comments
+
+TOPICS = {
+    'background': Topic('background', "What is your main background?"),
+    'useful': Topic('useful', "Did you find the workshop useful?", "Kolonne 4", 'scale'),
+    'recommend': Topic('recommend', "Would you recommend this workshop to your colleagues? ", "", 'yes_no'),
+    'further_comments': Topic('further_comments', "", "Do you have further comments or suggestions?"),
+}
+RESPONSES = pd.DataFrame({
+    "What is your main background?": ["Biology", "Statistics", "Biology"],
+    "Did you find the workshop useful?": [5, 4, 5],
+    "Kolonne 4": ["Great & useful", None, None],
+    "Would you recommend this workshop to your colleagues? ": ["Yes", "No", "Yes"],
+    "Do you have further comments or suggestions?": [None, "More coffee", "A long comment " * 600],
+})
+
+
+@pytest.fixture
+def cube():
+    return build_cube(RESPONSES, ['1', '1', '2'], TOPICS)
+
+
+def page_count(path):
+    return int(re.search(rb'/Type /Pages [^>]*/Count (\d+)', path.read_bytes()).group(1))
+
+
+def report(tmp_path, workshop_id, suffix='pdf'):
+    return EvaluationReport(f"Workshop {workshop_id}", workshop_id, "OBiWoW", "Evaluation report",
+                            str(tmp_path / workshop_id / f"report.{suffix}"))
+
+
+class TestRenderNativeReports:
+
+    # One PDF per workshop, with a title page and the topic pages; long comments go on extra pages
+    def test_pdf(self, tmp_path, cube):
+        results = render_native_reports(cube, [report(tmp_path, ALL_WORKSHOPS), report(tmp_path, '1')])
+        assert [result.ok for result in results] == [True, True]
+        assert (tmp_path / '1' / 'report.pdf').read_bytes().startswith(b'%PDF')
+        assert page_count(tmp_path / '1' / 'report.pdf') == 5
+        assert page_count(tmp_path / ALL_WORKSHOPS / 'report.pdf') > 5
+
+    # HTML reports have the charts inlined and the comments escaped
+    def test_html(self, tmp_path, cube):
+        result, = render_native_reports(cube, [report(tmp_path, '1', 'html')], fmt='html')
+        page = (tmp_path / '1' / 'report.html').read_text()
+        assert result.ok
+        assert page.count('<svg') == 3
+        assert "Great &amp; useful" in page
+        assert '<?xml' not in page
+
+    # Unknown formats are refused
+    def test_unknown_format(self, tmp_path, cube):
+        with pytest.raises(ValueError):
+            render_native_reports(cube, [report(tmp_path, '1')], fmt='docx')
+
+
+class TestChartRenderer:
+
+    # Charts are drawn once per topic and counts, then read from the cache, also by a new renderer
+    def test_cache(self, tmp_path):
+        charts = ChartRenderer(str(tmp_path / 'charts'))
+        png = charts.chart(TOPICS['useful'], {'5': 2, '4': 1})
+        assert png.startswith(b'\x89PNG')
+        assert charts.chart(TOPICS['useful'], {'5': 2, '4': 1}) == png
+        charts.chart(TOPICS['useful'], {'5': 2, '4': 1}, 'svg')
+        assert charts.drawn == 2
+        charts = ChartRenderer(str(tmp_path / 'charts'))
+        assert charts.chart(TOPICS['useful'], {'5': 2, '4': 1}) == png
+        assert charts.chart(TOPICS['useful'], {'5': 3, '4': 1}) != png
+        assert charts.drawn == 1
+        assert len(list((tmp_path / 'charts').glob('*.png'))) == 2
+        assert len(list((tmp_path / 'charts').glob('*.svg'))) == 1
+
+    # Rendering the reports again only reads the charts from the cache
+    def test_reports_reuse_charts(self, tmp_path, cube, monkeypatch):
+        render_native_reports(cube, [report(tmp_path, '1')], chart_cache_dir=str(tmp_path / 'charts'))
+        assert len(list((tmp_path / 'charts').glob('*.png'))) == 3
+
+        def draw(*args):
+            raise AssertionError("chart drawn again")
+        monkeypatch.setattr(ChartRenderer, 'draw', draw)
+        result, = render_native_reports(cube, [report(tmp_path, '1')], chart_cache_dir=str(tmp_path / 'charts'))
+        assert result.ok
+
+
+class TestWrapComments:
+
+    # Each comment is a bullet, continued lines are indented
+    def test_wrap(self):
+        assert wrap_comments(["one two three", "four"], width=9) == ["• one two", "  three", "• four"]
@@ -0,0 +1,78 @@
+import pandas as pd
+
+from obiwow.evaluation_cube import ALL_WORKSHOPS, Topic, build_cube
+from obiwow.report_engine import EvaluationReport
+from obiwow.report_manifest import (ReportManifest, format_summary, plan_reports, report_fingerprint,
+                                    template_fingerprint)
+from obiwow.report_runner import ReportResult
+
+TOPICS = {'useful': Topic('useful', "Did you find the workshop useful?", "Kolonne 4", 'scale')}
+
+
+def cube(useful, comments, workshop_ids):
+    responses = pd.DataFrame({"Did you find the workshop useful?": useful, "Kolonne 4": comments})
+    return build_cube(responses, workshop_ids, TOPICS)
+
+
+def reports(tmp_path):
+    return [EvaluationReport(name, workshop_id, "OBiWoW", f"Evaluation report for '{name}'",
+                             str(tmp_path / f"{workshop_id}.pdf"))
+            for name, workshop_id in [("All workshops", ALL_WORKSHOPS), ("Python", '1'), ("R", '2')]]
+
+
+def render(tmp_path, evaluation_cube, manifest, template="template", force=False):
+    """
+    Plan the reports, 'render' them by writing their file, and record them in the manifest.
+    """
+    these_reports = reports(tmp_path)
+    fingerprints = [report_fingerprint(evaluation_cube, report, template) for report in these_reports]
+    to_render, skipped = plan_reports(these_reports, fingerprints, manifest, ALL_WORKSHOPS, force=force)
+    for i in to_render:
+        (tmp_path / f"{these_reports[i].workshop_id}.pdf").write_text("pdf")
+        manifest.record(these_reports[i].output_path, fingerprints[i])
+    manifest.save()
+    return [these_reports[i].workshop_id for i in to_render]
+
+
+class TestPlanReports:
+
+    # Only the workshop with new responses and the report of all workshops are rendered again
+    def test_new_response(self, tmp_path):
+        manifest = ReportManifest(str(tmp_path / 'evaluation_reports.json'))
+        assert render(tmp_path, cube([5, 4], [None, None], ['1', '2']), manifest) == [ALL_WORKSHOPS, '1', '2']
+        assert render(tmp_path, cube([5, 4], [None, None], ['1', '2']), manifest) == []
+        late = cube([5, 4, 3], [None, None, "Late"], ['1', '2', '2'])
+        assert render(tmp_path, late, ReportManifest(str(tmp_path / 'evaluation_reports.json'))) == \
+            [ALL_WORKSHOPS, '2']
+
+    # A changed template, a deleted report or --force render reports again
+    def test_template_and_force(self, tmp_path):
+        manifest = ReportManifest(str(tmp_path / 'evaluation_reports.json'))
+        evaluation_cube = cube([5, 4], [None, None], ['1', '2'])
+        render(tmp_path, evaluation_cube, manifest)
+        assert len(render(tmp_path, evaluation_cube, manifest, template="new template")) == 3
+        (tmp_path / '1.pdf').unlink()
+        assert render(tmp_path, evaluation_cube, manifest, template="new template") == [ALL_WORKSHOPS, '1']
+        assert len(render(tmp_path, evaluation_cube, manifest, template="new template", force=True)) == 3
+
+
+class TestTemplateFingerprint:
+
+    # The content of the templates and the options are part of the fingerprint
+    def test_fingerprint(self, tmp_path):
+        template = tmp_path / 'content.qmd'
+        template.write_text("a")
+        before = template_fingerprint([str(template)], 'quarto', 'pdf')
+        assert template_fingerprint([str(template)], 'native', 'pdf') != before
+        template.write_text("b")
+        assert template_fingerprint([str(template)], 'quarto', 'pdf') != before
+
+
+class TestFormatSummary:
+
+    # Rendered reports with their time, then the skipped ones
+    def test_summary(self, tmp_path):
+        all_report, python, r = reports(tmp_path)
+        summary = format_summary([ReportResult("Python", python.output_path, True, 1.5)], [r])
+        assert summary.splitlines() == ["Rendered 1 report(s) in 1.5 s:", "  Python: done in 1.5 s",
+                                        "Skipped 1 unchanged report(s):", "  R"]
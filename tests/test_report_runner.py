@@ -0,0 +1,96 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+from obiwow import report_runner
+from obiwow.report_runner import REPORT_NAME, ReportJob, render_reports
+
+# Stand-in for quarto: writes the pdf next to the document with the title and parameters, fails on request,
+# and logs its working directory and whether it was asked to keep the kernel alive. As in pandoc, the front matter
+# of the document wins over the metadata file
+FAKE_QUARTO = f"""#!{sys.executable}
+import os, sys, time
+from pathlib import Path
+import yaml
+args = sys.argv[1:]
+params = yaml.safe_load(Path(args[args.index('--execute-params') + 1]).read_text())
+metadata = yaml.safe_load(Path(args[args.index('--metadata-file') + 1]).read_text())
+metadata.update(yaml.safe_load(Path(args[1]).read_text().split('---')[1]))
+assert Path('{REPORT_NAME}_content.qmd').is_file()
+with open(os.environ['QUARTO_LOG'], 'a') as log:
+    log.write(f"{{os.getcwd()}} {{'--execute-daemon' in args}}\\n")
+if params['workshop_id'] == 'FAIL':
+    sys.exit('ERROR: render failed')
+time.sleep(0.1)
+Path(args[1]).with_suffix('.pdf').write_text(f"{{metadata['subtitle']}} {{params['workshop_id']}}")
+"""
+
+
+@pytest.fixture
+def quarto(tmp_path, monkeypatch):
+    path = tmp_path / 'quarto'
+    path.write_text(FAKE_QUARTO)
+    path.chmod(0o755)
+    monkeypatch.setenv('QUARTO_LOG', str(tmp_path / 'quarto.log'))
+    return str(path)
+
+
+def job(tmp_path, workshop_id, subtitle="Evaluation report"):
+    return ReportJob(f"Workshop {workshop_id}", {'workshop_id': workshop_id},
+                     str(tmp_path / 'out' / workshop_id / 'report.pdf'), {'subtitle': subtitle})
+
+
+class TestRenderReports:
+
+    # Reports rendered at the same time do not overwrite each other, each batch renders in one folder
+    def test_parallel(self, tmp_path, quarto):
+        jobs = [job(tmp_path, f"ws{i}") for i in range(6)]
+        results = render_reports(jobs, workers=3, quarto=quarto)
+        assert [result.name for result in results] == [f"Workshop ws{i}" for i in range(6)]
+        assert [result.ok for result in results] == [True] * 6
+        assert [(tmp_path / 'out' / f"ws{i}" / 'report.pdf').read_text() for i in range(6)] == \
+            [f"Evaluation report ws{i}" for i in range(6)]
+        log = (tmp_path / 'quarto.log').read_text().splitlines()
+        assert len({line.split()[0] for line in log}) == 3
+        assert all(line.endswith('True') for line in log)
+
+    # Titles are passed as YAML, quotes and apostrophes included
+    def test_quotes(self, tmp_path, quarto):
+        subtitle = "Evaluation report for 'R: the \"basics\"'"
+        result, = render_reports([job(tmp_path, 'ws1', subtitle)], quarto=quarto, daemon=0)
+        assert result.ok
+        assert (tmp_path / 'out' / 'ws1' / 'report.pdf').read_text() == f"{subtitle} ws1"
+        assert (tmp_path / 'quarto.log').read_text().endswith('False\n')
+
+    # The title and subtitle of each report go in the metadata file given to quarto
+    def test_title_in_command(self, tmp_path, monkeypatch):
+        commands = []
+
+        def run(command, cwd, **kwargs):
+            metadata_file = Path(cwd) / command[command.index('--metadata-file') + 1]
+            commands.append((command, yaml.safe_load(metadata_file.read_text())))
+            return subprocess.CompletedProcess(command, 1, "", "ERROR: not rendered")
+        monkeypatch.setattr(report_runner.subprocess, 'run', run)
+        report = ReportJob("Python", {'workshop_id': '1'}, str(tmp_path / 'report.pdf'),
+                           {'title': "Intro to 'Python'", 'subtitle': "Evaluation report"})
+        render_reports([report], daemon=0)
+        (command, metadata), = commands
+        assert command[:3] == ['quarto', 'render', f"{REPORT_NAME}.qmd"]
+        assert metadata == {'title': "Intro to 'Python'", 'subtitle': "Evaluation report"}
+        # Set in the front matter, they would override the metadata file
+        front_matter = yaml.safe_load(report_runner.report_qmd_path().read_text().split('---')[1])
+        assert not {'title', 'subtitle'} & set(front_matter)
+
+    # A failed report is recorded, the others are still rendered
+    def test_failure(self, tmp_path, quarto):
+        bad, good = render_reports([job(tmp_path, 'FAIL'), job(tmp_path, 'good')], workers=1, quarto=quarto)
+        assert not bad.ok and 'render failed' in bad.error
+        assert good.ok and (tmp_path / 'out' / 'good' / 'report.pdf').is_file()
+
+    # A missing quarto executable is reported, not raised
+    def test_missing_quarto(self, tmp_path):
+        result, = render_reports([job(tmp_path, 'all')], quarto=str(tmp_path / 'no_quarto'))
+        assert not result.ok
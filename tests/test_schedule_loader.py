@@ -0,0 +1,94 @@
+import json
+import os
+
+import pytest
+
+from obiwow.schedule_loader import (ScheduleView, Workshop, index_path_for, load_schedule, normalize_title, slugify,
+                                    write_schedule_index)
+
+SCHEDULE = {
+    "1": {"dates": ["10.11.25"], "rooms": ["Sed (room 1454)"], "main_instructor": "Ann", "helper": "Bob",
+          "title": "Intro: Python", "max_attendance": 20, "timeslots": ["9:00-12:00"]},
+    "5": {"dates": ["12.11.25", "13.11.25"], "rooms": ["Caml (room 3438)"], "main_instructor": "Gus", "helper": "",
+          "title": "Nextflow & nf-core/pipelines", "max_attendance": None, "timeslots": ["9:00-16:00"]},
+    "7": {"dates": ["14.11.25"], "rooms": [""], "main_instructor": "Åse", "helper": "",
+          "title": "Omnipy's data wrangling", "max_attendance": "about 15", "timeslots": []},
+}
+
+
+@pytest.fixture
+def schedule_json(tmp_path):
+    path = tmp_path / 'schedule.json'
+    path.write_text(json.dumps(SCHEDULE, indent=4))
+    return path
+
+
+class TestNormalization:
+
+    # Apostrophes, colons and slashes are removed from titles
+    def test_normalize_title(self):
+        assert normalize_title("Omnipy's data: wrangling/mapping") == "Omnipys data wranglingmapping"
+
+    # Slugs have no spaces or special characters
+    def test_slugify(self):
+        assert slugify("Nextflow & nf-core: pipelines") == "Nextflow_nf-core_pipelines"
+        assert slugify("Omnipy's data wrangling") == "Omnipys_data_wrangling"
+
+
+class TestLoadSchedule:
+
+    # The JSON and the sidecar give the same workshops in the same order
+    def test_sidecar_matches_json(self, schedule_json):
+        from_json = load_schedule(schedule_json, use_index=False)
+        write_schedule_index(schedule_json)
+        from_index = load_schedule(schedule_json, use_index=True)
+        assert type(from_index) is not ScheduleView
+        assert list(from_index) == ['1', '5', '7']
+        assert dict(from_index) == dict(from_json)
+        assert from_index.to_dict() == SCHEDULE
+
+    # Workshops are found by ID, normalized title and slug
+    @pytest.mark.parametrize('use_index', [False, True])
+    def test_lookups(self, schedule_json, use_index):
+        write_schedule_index(schedule_json)
+        schedule = load_schedule(schedule_json, use_index=use_index)
+        assert schedule['5'].dates == ('12.11.25', '13.11.25')
+        assert schedule.by_title("Intro Python").id == '1'
+        assert schedule.by_title("Intro: Python").id == '1'
+        assert schedule.by_slug("Omnipys_data_wrangling").id == '7'
+        assert schedule.by_title("Unknown") is None
+
+    # No sidecar is created by reading the schedule
+    def test_no_sidecar(self, schedule_json):
+        assert load_schedule(schedule_json, use_index=True).by_title("Intro Python").id == '1'
+        assert load_schedule(schedule_json).by_title("Intro Python").id == '1'
+        assert not index_path_for(schedule_json).exists()
+
+    # A sidecar is ignored once the JSON changes, and written again
+    def test_stale_sidecar(self, schedule_json):
+        write_schedule_index(schedule_json)
+
+        changed = dict(SCHEDULE, **{"9": dict(SCHEDULE["1"], title="New workshop")})
+        schedule_json.write_text(json.dumps(changed))
+        stat = schedule_json.stat()
+        os.utime(schedule_json, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        assert load_schedule(schedule_json, use_index=True).by_title("New workshop").id == '9'
+        assert type(load_schedule(schedule_json, use_index=True)) is not ScheduleView
+
+    # The sidecar is released when the schedule is closed, workshops already read are kept
+    def test_close(self, schedule_json):
+        write_schedule_index(schedule_json)
+        with load_schedule(schedule_json, use_index=True) as schedule:
+            assert schedule['1'].title == "Intro: Python"
+        assert schedule._buffer.closed
+        assert schedule['1'].title == "Intro: Python"
+        with load_schedule(schedule_json, use_index=False) as schedule:
+            assert schedule['5'].title == "Nextflow & nf-core/pipelines"
+
+    # Older schedule files with a single date and timeslot are read as one-day workshops
+    def test_single_date_format(self):
+        workshop = Workshop.from_dict(3, {"title": "R", "date": "10.11.23", "timeslot": "9:00-12:00",
+                                          "max_attendance": 2})
+        assert workshop.id == '3'
+        assert workshop.dates == ('10.11.23',)
+        assert workshop.timeslots == ('9:00-12:00',)
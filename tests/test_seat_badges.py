@@ -0,0 +1,62 @@
+import pandas as pd
+
+from obiwow.registration_stats import RegistrationCounts
+from obiwow.seat_badges import badge_span, badge_text, seat_badges, update_badges
+
+SCHEDULE_COLUMNS = {'id_column': 'Number', 'title_column': 'Workshop name', 'max_attendance': 'Max capacity',
+                    'networking_event_column': 'Networking event'}
+DF_SCHEDULE = pd.DataFrame({
+    'Number': [1, 2, 5, 5, 6],
+    'Workshop name': ["Intro to Python", "Nextflow", "Long workshop - Day 1", "Long workshop - Day 2",
+                      "Networking event"],
+    'Max capacity': [20.0, 2.0, float('nan'), float('nan'), float('nan')],
+    'Networking event': [False, False, False, False, True],
+})
+
+
+def save_counts(path, per_workshop):
+    counts = RegistrationCounts()
+    counts.per_workshop.update(per_workshop)
+    counts.save(str(path))
+
+
+class TestBadgeText:
+
+    # Seats left, full, or no badge without a limit
+    def test_text(self):
+        assert badge_text(18, 20) == "2 seats left"
+        assert badge_text(19, 20) == "1 seat left"
+        assert badge_text(25, 20).startswith("Full")
+        assert badge_text(3, None) == ""
+
+
+class TestSeatBadges:
+
+    # Form titles are matched to the schedule, workshops without a limit have no badge
+    def test_badges(self, tmp_path):
+        save_counts(tmp_path / 'counts.json', {'Intro_to_Python': 5, 'Nextflow': 2})
+        badges = seat_badges(DF_SCHEDULE, SCHEDULE_COLUMNS, str(tmp_path / 'counts.json'))
+        assert badges == {'1': badge_span('1', "15 seats left"),
+                          '2': badge_span('2', "Full, registrations go on the waiting list")}
+
+    # No counts, no badges
+    def test_no_counts(self, tmp_path):
+        assert seat_badges(DF_SCHEDULE, SCHEDULE_COLUMNS, str(tmp_path / 'missing.json')) == {}
+
+
+class TestUpdateBadges:
+
+    # Only the text of the badges is replaced, in every place they appear
+    def test_update(self, tmp_path):
+        page = tmp_path / 'page.html'
+        page.write_text(f"<p>{badge_span('1', '3 seats left')}</p><h2>{badge_span('1', '3 seats left')}</h2>")
+        assert update_badges(str(page), {'1': badge_span('1', '1 seat left')}) == 1
+        assert page.read_text().count('1 seat left') == 2
+        assert update_badges(str(page), {'1': badge_span('1', '1 seat left')}) == 0
+
+    # The page must be generated again when workshops get or lose a badge
+    def test_other_workshops(self, tmp_path):
+        page = tmp_path / 'page.html'
+        page.write_text(f"<p>{badge_span('1', '3 seats left')}</p>")
+        assert update_badges(str(page), {'2': badge_span('2', '1 seat left')}) is None
+        assert update_badges(str(page), {}) is None
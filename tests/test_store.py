@@ -0,0 +1,73 @@
+import csv
+
+import pytest
+
+from obiwow.schedule_loader import Workshop
+from obiwow.store import Store
+from obiwow.title_matcher import TitleMatcher
+
+SCHEDULE = {
+    '1': Workshop(id='1', title="Intro to Python", dates=('10.11.25',), rooms=('Sed',), timeslots=('9:00-12:00',),
+                  max_attendance='20'),
+    '2': Workshop(id='2', title="Nextflow", dates=('12.11.25', '13.11.25'), rooms=('Caml',),
+                  timeslots=('9:00-16:00',), max_attendance=2),
+    '3': Workshop(id='3', title="Networking event", dates=('14.11.25',)),
+}
+
+
+def write_rows(path, rows, delimiter):
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]), delimiter=delimiter)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with Store(str(tmp_path / 'obiwow.sqlite')) as store:
+        store.import_schedule(SCHEDULE)
+        yield store
+
+
+class TestImports:
+
+    # One schedule row per day, dates stored as ISO dates
+    def test_schedule(self, store):
+        assert store.table_counts()['schedule'] == 4
+        assert store.workshops_on('13.11.25') == ['2']
+        assert store.workshops_on('2025-11-10') == ['1']
+
+    # Registrations are matched to workshops; importing a newer export only adds the new rows
+    def test_registrations(self, store, tmp_path):
+        path = tmp_path / 'registration_results.tsv'
+        rows = [{'NR': '1', 'workshop': 'Intro_to_Python', 'var2': 'Ann', 'var3': 'ann@x.no'},
+                {'NR': '2', 'workshop': 'Nextflow', 'var2': 'Bob', 'var3': 'bob@x.no'},
+                {'NR': '3', 'workshop': 'Nextflow', 'var2': 'Ann', 'var3': 'ann@x.no'}]
+        write_rows(path, rows[:2], '\t')
+        matcher = TitleMatcher.from_schedule(SCHEDULE)
+        store.import_registrations(str(path), matcher)
+        write_rows(path, rows, '\t')
+        assert store.import_registrations(str(path), matcher) == 3
+        assert store.table_counts()['registrations'] == 3
+        assert store.registration_counts() == {'1': 1, '2': 2}
+        assert store.registered_emails('2') == ['bob@x.no', 'ann@x.no']
+        assert store.registrations_of('ann@x.no') == ['1', '2']
+        assert store.fill_rates()[0] == ('2', 'Nextflow', 2, 2)
+
+    # Exports without an ID column are identified by email and title
+    def test_registrations_without_id(self, store, tmp_path):
+        path = tmp_path / 'registrations.csv'
+        write_rows(path, [{'workshop': 'Nextflow', 'var3': 'ann@x.no'}] * 2, ';')
+        store.import_registrations(str(path), delimiter=';')
+        assert store.table_counts()['registrations'] == 1
+
+    # Evaluation responses keep all their answers
+    def test_evaluations(self, store, tmp_path):
+        path = tmp_path / 'evaluation.csv'
+        write_rows(path, [{'Timestamp': '2025/11/14 10:00', 'Which workshop are you writing your answers for?':
+                           'Intro to Python', 'Did you find the workshop useful?': '5'}], ',')
+        store.import_evaluations(str(path), TitleMatcher.from_schedule(SCHEDULE))
+        # Importing the same export again does not duplicate the responses
+        assert store.import_evaluations(str(path), TitleMatcher.from_schedule(SCHEDULE)) == 1
+        rows = store.connection.execute("SELECT workshop_id, submitted_at FROM evaluation_responses").fetchall()
+        assert rows == [('1', '2025/11/14 10:00')]
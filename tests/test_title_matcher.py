@@ -0,0 +1,65 @@
+import csv
+
+from obiwow.title_matcher import TitleMatcher, title_trigrams
+
+TITLES = {
+    '1': "Intro to Python",
+    '2': "Reproducible research with Nextflow & building pipelines with nf-core",
+    '3': "Using Omnipy for data wrangling and metadata mapping",
+    '4': "R for biologists: tidyverse",
+}
+
+
+class TestTitleTrigrams:
+
+    # Trigrams ignore case, punctuation and underscores
+    def test_normalization(self):
+        assert title_trigrams("Intro_to: Python") == title_trigrams("intro to python")
+        assert "  i" in title_trigrams("Intro")
+
+
+class TestTitleMatcher:
+
+    # Titles equal after removing ', : and / are exact matches
+    def test_exact(self):
+        match = TitleMatcher(TITLES).match("R for biologists tidyverse")
+        assert (match.workshop_id, match.score, match.exact) == ('4', 1.0, True)
+
+    # Titles with underscores are exact matches
+    def test_underscores(self):
+        assert TitleMatcher(TITLES).match("Intro_to_Python").exact
+
+    # Truncated titles are guessed from trigrams with a score below 1
+    def test_truncated(self):
+        match = TitleMatcher(TITLES).match("Reproducible research with Nextflow ")
+        assert match.workshop_id == '2'
+        assert not match.exact
+        assert 0.5 <= match.score < 1
+
+    # Aliases map renamed workshops to their schedule title
+    def test_alias(self):
+        matcher = TitleMatcher(TITLES, aliases={'Executable metadata crosswalks through Omnipy':
+                                                'Using Omnipy for data wrangling and metadata mapping'})
+        assert matcher.match('Executable metadata crosswalks through Omnipy').workshop_id == '3'
+
+    # Unrelated titles are not matched
+    def test_no_match(self):
+        matcher = TitleMatcher(TITLES)
+        assert matcher.match("Networking event") is None
+        assert matcher.match_ids(["Networking event", "Intro to Python"]) == [None, '1']
+
+    # Each distinct title is only scored once
+    def test_memoized(self):
+        matcher = TitleMatcher(TITLES)
+        assert matcher.match("Intro to Pyth") is matcher.match("Intro to Pyth")
+
+    # The audit table lists guessed and unmatched titles, not exact ones
+    def test_write_audit(self, tmp_path):
+        matcher = TitleMatcher(TITLES)
+        matcher.match_ids(["Intro to Python", "Intro to Pyth", "Networking event"])
+        path = tmp_path / 'title_mapping.tsv'
+        assert matcher.write_audit(str(path)) == 2
+        with open(path, newline='') as file:
+            rows = list(csv.DictReader(file, delimiter='\t'))
+        assert [(row['form_title'], row['workshop_id']) for row in rows] == [("Intro to Pyth", '1'),
+                                                                            ("Networking event", '')]
@@ -3,7 +3,7 @@ import pandas as pd
 from unittest.mock import patch
 
 from obiwow.tsv_to_html import room_info, make_list, generate_workshop_body, generate_schedule_table, \
-    generate_full_html_page
+    generate_full_html_page, build_workshop_contexts, clean_column, get_clean_value
 
 
 class TestRoomInfo:
@@ -455,4 +455,86 @@ class TestGenerateFullHtmlPage:
         workshop_body_html = ["<div>Workshop 1</div>", "<div>Workshop 2</div>"]
         yearly = {}
         with pytest.raises(KeyError):
-            generate_full_html_page(schedule_table_html, workshop_body_html, yearly)
\ No newline at end of file
+            generate_full_html_page(schedule_table_html, workshop_body_html, yearly)
+
+class TestRenderWorkshopBodies:
+    nettskjema_columns = {'title_column': 'Title', 'description_column': 'Description',
+                          'outcome_column': 'Outcome', 'target_column': 'Target',
+                          'pre_requisite_column': 'PreReq', 'material_column': 'Material'}
+    schedule_columns = {'networking_event_column': 'networking_event_column', 'title_column': 'Workshop name',
+                        'id_column': 'ID', 'date_column': 'Date',
+                        'start_time_column': 'start_time_column', 'end_time_column': 'end_time_column',
+                        'main_instructor_column': 'Main instructor',
+                        'helper_instructor_column': 'Helper', 'room_column': 'Room'}
+    yearly = {'ics_folder': '/ics/', 'registration_open': True,
+              'pre_register_link': '/register/', 'post_register_link': '/end/'}
+
+    def schedule(self, n):
+        return pd.DataFrame({
+            'networking_event_column': [False] * n,
+            'ID': list(range(1, n + 1)),
+            'Workshop name': [f'Workshop {i}' for i in range(n)],
+            'Date': ['01.01.23'] * n,
+            'start_time_column': ['9:00'] * n,
+            'end_time_column': ['12:00'] * n,
+            'Main instructor': ['Instructor'] * n,
+            'Helper': ['Helper'] * n,
+            'Title': [f'Workshop {i}' for i in range(n)],
+            'Room': ['Room A'] * n,
+            'Description': [f'Description {i}' for i in range(n)],
+            'Outcome': ['1. First 2. Second'] * n,
+            'Target': ['Target Audience'] * n,
+            'PreReq': ['- Python - R'] * n,
+            'Material': ['Materials'] * n
+        })
+
+    # Builds picklable template contexts in schedule order
+    def test_build_contexts_in_order(self):
+        import pickle
+        contexts = build_workshop_contexts(self.schedule(3), self.nettskjema_columns, self.schedule_columns,
+                                           self.yearly, {})
+        assert [context['workshop_number'] for context in contexts] == ['1', '2', '3']
+        assert pickle.loads(pickle.dumps(contexts)) == contexts
+
+    # Rooms listed in rooms.yaml without details have no URL
+    def test_room_without_details(self):
+        contexts = build_workshop_contexts(self.schedule(1), self.nettskjema_columns, self.schedule_columns,
+                                           self.yearly, {'Room A': None})
+        assert contexts[0]['room_name'] == 'Room A'
+        assert contexts[0]['room_map_url'] is None
+
+    # Renders byte-identical output on a process pool and in the current process
+    def test_parallel_matches_serial(self):
+        df = self.schedule(12)
+        serial = generate_workshop_body(df, self.nettskjema_columns, self.schedule_columns, self.yearly, {})
+        parallel = generate_workshop_body(df, self.nettskjema_columns, self.schedule_columns, self.yearly, {},
+                                          workers=3)
+        assert parallel == serial
+        assert len(serial) == 12
+
+    # Gives the first day of a multi-day workshop the full date span up to the last day
+    def test_multiday_date_span(self):
+        df = self.schedule(2)
+        df['Workshop name'] = ['Long - Day 1', 'Long - Day 2']
+        df['Date'] = ['10.11.2025', '11.11.2025']
+        df['end_time_column'] = ['16:00', '16:00']
+        df['Description'] = ['Same', 'Other day']
+        df['multi_day_final'] = [False, True]
+        contexts = build_workshop_contexts(df, self.nettskjema_columns, self.schedule_columns, self.yearly, {})
+        assert contexts[0]['workshop_date'] == 'Monday 10 November 2025 9:00 - Tuesday 11 November 2025 16:00'
+        assert contexts[1]['workshop_date'] == 'Tuesday 11 November 2025'
+
+
+class TestCleanColumn:
+
+    # Cleans values with the same rules as get_clean_value
+    def test_matches_get_clean_value(self):
+        df = pd.DataFrame({'col': [' text ', 3.0, float('nan'), None, 2.5]})
+        result = clean_column(df, 'col', default='default').tolist()
+        expected = [get_clean_value(row, 'col', default='default') for _, row in df.iterrows()]
+        assert result == expected == ['text', '3', 'default', 'default', '2.5']
+
+    # Returns the default for a missing column
+    def test_missing_column(self):
+        df = pd.DataFrame({'col': ['a', 'b']})
+        assert clean_column(df, 'other', default='x').tolist() == ['x', 'x']
@@ -0,0 +1,90 @@
+import pandas as pd
+
+from obiwow.allocation import allocate
+from obiwow.schedule_loader import Workshop
+from obiwow.waitlist import AllocationState
+
+SCHEDULE = {
+    '1': Workshop(id='1', title="Intro to Python", dates=('10.11.25',), timeslots=('9:00-12:00',), max_attendance=2),
+    '2': Workshop(id='2', title="R for biologists", dates=('10.11.25',), timeslots=('11:00-14:00',),
+                  max_attendance=1),
+}
+
+
+def state_for(*rows):
+    registrations = pd.DataFrame([(email, email.split('@')[0], workshop_id, f"W{workshop_id}")
+                                  for email, workshop_id in rows],
+                                 columns=['email', 'name', 'workshop_id', 'form_title'])
+    return AllocationState.from_allocation(allocate(registrations, SCHEDULE), SCHEDULE)
+
+
+def emails(registrations):
+    return [registration.email for registration in registrations]
+
+
+class TestAllocationState:
+
+    # The state starts from the allocation of the first run
+    def test_from_allocation(self):
+        state = state_for(('a@x', '1'), ('b@x', '1'), ('c@x', '1'), ('d@x', '1'))
+        assert emails(state.registered('1')) == ['a@x', 'b@x']
+        assert emails(state.waitlist('1')) == ['c@x', 'd@x']
+
+    # Cancelling an accepted registration promotes the first on the waiting list
+    def test_cancel_promotes(self):
+        state = state_for(('a@x', '1'), ('b@x', '1'), ('c@x', '1'), ('d@x', '1'))
+        delta = state.cancel('A@x', '1')
+        assert emails(delta.cancelled) == ['a@x']
+        assert emails(delta.accepted) == ['c@x']
+        assert delta.changed_workshops == {'1'}
+        assert emails(state.registered('1')) == ['b@x', 'c@x']
+
+    # Cancelling from the waiting list changes no list of registered participants
+    def test_cancel_waiting(self):
+        state = state_for(('a@x', '1'), ('b@x', '1'), ('c@x', '1'), ('d@x', '1'))
+        delta = state.cancel('c@x', '1')
+        assert not delta.accepted and not delta.changed_workshops
+        assert emails(state.cancel('a@x', '1').accepted) == ['d@x']
+
+    # Unknown registrations give an empty delta
+    def test_cancel_unknown(self):
+        assert not state_for(('a@x', '1')).cancel('z@x', '1')
+
+    # A registration skipped for a clash is promoted when the clashing seat is given up
+    def test_cancel_promotes_clashing(self):
+        state = state_for(('a@x', '1'), ('a@x', '2'), ('b@x', '2'))
+        assert emails(state.registered('2')) == ['b@x']
+        state.cancel('b@x', '2')
+        assert emails(state.registered('2')) == []
+        delta = state.cancel('a@x', '1')
+        assert emails(delta.accepted) == ['a@x']
+        assert delta.changed_workshops == {'1', '2'}
+
+    # More seats promote from the waiting list, fewer seats move the last accepted back
+    def test_set_capacity(self):
+        state = state_for(('a@x', '1'), ('b@x', '1'), ('c@x', '1'), ('d@x', '1'))
+        assert emails(state.set_capacity('1', 3).accepted) == ['c@x']
+        delta = state.set_capacity('1', 1)
+        assert emails(delta.waitlisted) == ['b@x', 'c@x']
+        assert emails(state.waitlist('1')) == ['b@x', 'c@x', 'd@x']
+        assert emails(state.set_capacity('1', None).accepted) == ['b@x', 'c@x', 'd@x']
+
+    # A registration skipped for a clash is promoted when fewer seats move the clashing one back
+    def test_set_capacity_promotes_clashing(self):
+        state = state_for(('b@x', '1'), ('a@x', '1'), ('a@x', '2'))
+        assert emails(state.waitlist('2')) == ['a@x']
+        delta = state.set_capacity('1', 1)
+        assert emails(delta.waitlisted) == ['a@x']
+        assert [(registration.email, registration.workshop_id) for registration in delta.accepted] == [('a@x', '2')]
+        assert delta.changed_workshops == {'1', '2'}
+        assert emails(state.registered('2')) == ['a@x']
+
+    # The state is saved and loaded with its waiting lists and cancellations
+    def test_save_load(self, tmp_path):
+        state = state_for(('a@x', '1'), ('b@x', '1'), ('c@x', '1'), ('d@x', '1'))
+        state.cancel('c@x', '1')
+        path = str(tmp_path / 'allocation_state.json')
+        state.save(path)
+        loaded = AllocationState.load(path)
+        assert emails(loaded.registered('1')) == ['a@x', 'b@x']
+        assert emails(loaded.cancel('a@x', '1').accepted) == ['d@x']